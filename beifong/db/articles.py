@@ -1,65 +1,160 @@
 import json
 from datetime import datetime
-from .connection import db_connection, execute_query
+from .config import get_sources_db_path
+from .connection import execute_query
+from .compression import compress_text, decompress_text, drop_raw_content
+from .write_queue import run_write
+from .timestamps import published_ts_or_now
 
+CRAWLED_ARTICLE_INSERT_QUERY = """
+INSERT INTO crawled_articles 
+(entry_id, source_id, feed_id, title, url, published_date, published_ts)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+CRAWLED_ARTICLE_INSERT_IGNORE_QUERY = CRAWLED_ARTICLE_INSERT_QUERY + "ON CONFLICT DO NOTHING\n"
+
+# Bodies live in article_bodies, keyed by article id, so crawled_articles rows stay narrow for list and queue scans.
+# The row is matched by url (unique) because buffered inserts have no lastrowid.
+ARTICLE_BODY_INSERT_QUERY = """
+INSERT INTO article_bodies (article_id, raw_content, clean_text, metadata)
+SELECT id, ?, ?, ? FROM crawled_articles WHERE url = ?
+ON CONFLICT DO NOTHING
+"""
+
+ARTICLE_BODY_COLUMNS = ("raw_content", "clean_text", "content", "metadata")
+
+ENTRY_STATUS_UPDATE_QUERY = """
+UPDATE feed_entries
+SET crawl_attempts = crawl_attempts + 1, crawl_status = ?
+WHERE id = ?
+"""
+
+# An entry whose URL is already stored under another entry fails, as it did when each article was inserted on its own.
+CRAWLED_ENTRY_STATUS_UPDATE_QUERY = """
+UPDATE feed_entries
+SET crawl_attempts = crawl_attempts + 1,
+    crawl_status = CASE
+        WHEN EXISTS (SELECT 1 FROM crawled_articles WHERE url = ? AND entry_id = feed_entries.id) THEN 'success'
+        ELSE 'failed'
+    END
+WHERE id = ?
+"""
+
+UNPROCESSED_ARTICLES_QUERY = """
+SELECT id, entry_id, source_id, feed_id, title, url, published_date, ai_attempts
+FROM crawled_articles
+WHERE ai_status IN ('pending', 'error')
+      AND ai_attempts < ?
+      AND processed = 0
+ORDER BY published_ts DESC
+LIMIT ?
+"""
+
+ARTICLE_CATEGORY_INSERT_QUERY = """
+INSERT INTO article_categories (article_id, category_name)
+VALUES (?, ?)
+ON CONFLICT DO NOTHING
+"""
+
+
+def _crawled_article_params(entry):
+    published_date = entry.get("published_date", datetime.now().isoformat())
+    return (
+        entry["id"],
+        entry.get("source_id"),
+        entry.get("feed_id"),
+        entry.get("title", ""),
+        entry.get("link", ""),
+        published_date,
+        published_ts_or_now(published_date),
+    )
+
+
+def _article_body_params(tracking_db_path, entry, raw_content, metadata, clean_text):
+    return (compress_text(tracking_db_path, raw_content), clean_text, json.dumps(metadata), entry.get("link", ""))
+
+
+def store_crawled_article(tracking_db_path, entry, raw_content, metadata, clean_text=None):
+    def write(cursor):
+        cursor.execute(CRAWLED_ARTICLE_INSERT_QUERY, _crawled_article_params(entry))
+        cursor.execute(ARTICLE_BODY_INSERT_QUERY, _article_body_params(tracking_db_path, entry, raw_content, metadata, clean_text))
 
-def store_crawled_article(tracking_db_path, entry, raw_content, metadata):
-    metadata_json = json.dumps(metadata)
-    query = """
-    INSERT INTO crawled_articles 
-    (entry_id, source_id, feed_id, title, url, published_date, raw_content, metadata)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """
     try:
-        params = (
-            entry["id"],
-            entry.get("source_id"),
-            entry.get("feed_id"),
-            entry.get("title", ""),
-            entry.get("link", ""),
-            entry.get("published_date", datetime.now().isoformat()),
-            raw_content,
-            metadata_json,
-        )
-        execute_query(tracking_db_path, query, params)
+        run_write(tracking_db_path, write)
         return True
     except Exception:
         return False
 
 
-def update_entry_status(tracking_db_path, entry_id, status):
-    query = """
-    UPDATE feed_entries
-    SET crawl_attempts = crawl_attempts + 1, crawl_status = ?
-    WHERE id = ?
+def queue_crawled_article(writer, entry, raw_content, metadata, clean_text=None):
+    """
+    Queue the article and its entry's crawl status. The entry ends up 'failed'
+    if its URL was already stored; writer.changes[CRAWLED_ARTICLE_INSERT_IGNORE_QUERY]
+    counts the articles actually inserted.
     """
-    return execute_query(tracking_db_path, query, (status, entry_id))
+    writer.add(CRAWLED_ARTICLE_INSERT_IGNORE_QUERY, _crawled_article_params(entry))
+    writer.add(ARTICLE_BODY_INSERT_QUERY, _article_body_params(writer.db_path, entry, raw_content, metadata, clean_text))
+    writer.add(CRAWLED_ENTRY_STATUS_UPDATE_QUERY, (entry.get("link", ""), entry["id"]))
 
 
-def get_unprocessed_articles(tracking_db_path, limit=5, max_attempts=1):
-    reset_stuck_articles(tracking_db_path)
-    query = """
-    SELECT id, entry_id, source_id, feed_id, title, url, published_date, raw_content, metadata, ai_attempts
-    FROM crawled_articles
-    WHERE (ai_status = 'pending' OR ai_status = 'error')
-          AND ai_attempts < ?
-          AND processed = 0
-    ORDER BY published_date DESC
-    LIMIT ?
-    """
-    articles = execute_query(tracking_db_path, query, (max_attempts, limit), fetch=True)
+def update_entry_status(tracking_db_path, entry_id, status):
+    return execute_query(tracking_db_path, ENTRY_STATUS_UPDATE_QUERY, (status, entry_id))
+
+
+def queue_entry_status(writer, entry_id, status):
+    writer.add(ENTRY_STATUS_UPDATE_QUERY, (status, entry_id))
+
+
+def get_unprocessed_articles(tracking_db_path, limit=5, max_attempts=1, reset_stuck=True):
+    # reset_stuck=False when this process still has articles in flight (they are 'processing' until committed).
+    if reset_stuck:
+        reset_stuck_articles(tracking_db_path)
+    articles = execute_query(tracking_db_path, UNPROCESSED_ARTICLES_QUERY, (max_attempts, limit), fetch=True)
+    bodies = get_article_bodies(tracking_db_path, [a["id"] for a in articles], ("clean_text", "metadata"))
+    # Crawled before clean text was stored; analysis extracts it from the raw HTML.
+    legacy = get_article_bodies(tracking_db_path, [i for i, body in bodies.items() if body["clean_text"] is None], ("raw_content",))
     for article in articles:
-        if article.get("metadata"):
-            try:
-                article["metadata"] = json.loads(article["metadata"])
-            except json.JSONDecodeError:
-                article["metadata"] = {}
+        article.update(bodies.get(article["id"], {"clean_text": None, "metadata": {}}))
+        article.update(legacy.get(article["id"], {}))
     if articles:
         article_ids = [a["id"] for a in articles]
         mark_articles_as_processing(tracking_db_path, article_ids)
     return articles
 
 
+def get_article_bodies(tracking_db_path, article_ids, columns=ARTICLE_BODY_COLUMNS):
+    """
+    Body columns for article_ids as {article_id: {column: value}}, in one query.
+
+    raw_content comes back decompressed and metadata parsed; articles without a
+    stored body are missing from the result.
+    """
+    unknown = set(columns) - set(ARTICLE_BODY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown article body columns: {sorted(unknown)}")
+    if not article_ids:
+        return {}
+    placeholders = ",".join(["?"] * len(article_ids))
+    query = f"SELECT article_id, {', '.join(columns)} FROM article_bodies WHERE article_id IN ({placeholders})"
+    bodies = {}
+    for row in execute_query(tracking_db_path, query, tuple(article_ids), fetch=True):
+        body = {column: row[column] for column in columns}
+        if "raw_content" in body:
+            body["raw_content"] = decompress_text(tracking_db_path, body["raw_content"])
+        if "metadata" in body:
+            try:
+                body["metadata"] = json.loads(body["metadata"]) if body["metadata"] else {}
+            except json.JSONDecodeError:
+                body["metadata"] = {}
+        bodies[row["article_id"]] = body
+    return bodies
+
+
+def get_article_raw_content(tracking_db_path, article_id):
+    return get_article_bodies(tracking_db_path, [article_id], ("raw_content",)).get(article_id, {}).get("raw_content")
+
+
 def reset_stuck_articles(tracking_db_path):
     query = """
     UPDATE crawled_articles 
@@ -72,46 +167,31 @@ def reset_stuck_articles(tracking_db_path):
 def mark_articles_as_processing(tracking_db_path, article_ids):
     if not article_ids:
         return 0
-    with db_connection(tracking_db_path) as conn:
-        cursor = conn.cursor()
-        placeholders = ",".join(["?"] * len(article_ids))
-        query = f"""
-        UPDATE crawled_articles 
-        SET ai_status = 'processing' 
-        WHERE id IN ({placeholders})
-        """
+    placeholders = ",".join(["?"] * len(article_ids))
+    query = f"""
+    UPDATE crawled_articles 
+    SET ai_status = 'processing' 
+    WHERE id IN ({placeholders})
+    """
+
+    def write(cursor):
         cursor.execute(query, article_ids)
-        conn.commit()
         return cursor.rowcount
 
+    return run_write(tracking_db_path, write)
+
+
+def _replace_article_categories(cursor, article_id, categories):
+    cursor.execute("DELETE FROM article_categories WHERE article_id = ?", (article_id,))
+    names = {category.lower().strip() for category in categories if isinstance(category, str) and category.strip()}
+    cursor.executemany(ARTICLE_CATEGORY_INSERT_QUERY, [(article_id, name) for name in sorted(names)])
+    return len(names)
+
 
 def save_article_categories(tracking_db_path, article_id, categories):
     if not categories:
         return 0
-    with db_connection(tracking_db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-        DELETE FROM article_categories
-        WHERE article_id = ?
-        """,
-            (article_id,),
-        )
-        count = 0
-        for category in categories:
-            try:
-                cursor.execute(
-                    """
-                INSERT INTO article_categories (article_id, category_name)
-                VALUES (?, ?)
-                """,
-                    (article_id, category.lower().strip()),
-                )
-                count += 1
-            except Exception as _:
-                pass
-        conn.commit()
-        return count
+    return run_write(tracking_db_path, lambda cursor: _replace_article_categories(cursor, article_id, categories))
 
 
 def get_article_categories(tracking_db_path, article_id):
@@ -124,63 +204,142 @@ def get_article_categories(tracking_db_path, article_id):
     return [row["category_name"] for row in results]
 
 
-def update_article_status(tracking_db_path, article_id, results=None, success=False, error_message=None):
-    with db_connection(tracking_db_path) as conn:
-        cursor = conn.cursor()
+def write_article_status(cursor, article_id, results=None, success=False, error_message=None):
+    cursor.execute(
+        """
+    UPDATE crawled_articles
+    SET ai_attempts = ai_attempts + 1
+    WHERE id = ?
+    """,
+        (article_id,),
+    )
+    if success and results:
+        categories = []
+        if "categories" in results:
+            if isinstance(results["categories"], str):
+                try:
+                    categories = json.loads(results["categories"])
+                except json.JSONDecodeError:
+                    categories = [c.strip() for c in results["categories"].split(",") if c.strip()]
+            elif isinstance(results["categories"], list):
+                categories = results["categories"]
+        cursor.execute(
+            """
+        UPDATE crawled_articles
+        SET summary = ?, processed = 1, ai_status = 'success'
+        WHERE id = ?
+        """,
+            (results.get("summary", ""), article_id),
+        )
+        updated = cursor.rowcount
+        cursor.execute(
+            """
+        INSERT INTO article_bodies (article_id, content) VALUES (?, ?)
+        ON CONFLICT (article_id) DO UPDATE SET content = excluded.content
+        """,
+            (article_id, results.get("content", "")),
+        )
+        drop_raw_content(cursor, [article_id])
+        if categories:
+            _replace_article_categories(cursor, article_id, categories)
+        copy_analysis_to_duplicates(cursor, article_id)
+        return updated
+    else:
         cursor.execute(
             """
         UPDATE crawled_articles
-        SET ai_attempts = ai_attempts + 1
+        SET ai_status = 'error', ai_error = ?
         WHERE id = ?
+        """,
+            (error_message, article_id),
+        )
+        cursor.execute(
+            """
+        UPDATE crawled_articles
+        SET ai_status = 'failed'
+        WHERE id = ? AND ai_attempts >= 3
         """,
             (article_id,),
         )
-        if success and results:
-            categories = []
-            if "categories" in results:
-                if isinstance(results["categories"], str):
-                    try:
-                        categories = json.loads(results["categories"])
-                    except json.JSONDecodeError:
-                        categories = [c.strip() for c in results["categories"].split(",") if c.strip()]
-                elif isinstance(results["categories"], list):
-                    categories = results["categories"]
-            cursor.execute(
-                """
-            UPDATE crawled_articles
-            SET summary = ?, content = ?, processed = 1, ai_status = 'success'
-            WHERE id = ?
-            """,
-                (results.get("summary", ""), results.get("content", ""), article_id),
-            )
-            conn.commit()
-            if categories:
-                save_article_categories(tracking_db_path, article_id, categories)
-        else:
-            cursor.execute(
-                """
-            UPDATE crawled_articles
-            SET ai_status = 'error', ai_error = ?
-            WHERE id = ?
-            """,
-                (error_message, article_id),
-            )
-            cursor.execute(
-                """
-            UPDATE crawled_articles
-            SET ai_status = 'failed'
-            WHERE id = ? AND ai_attempts >= 3
-            """,
-                (article_id,),
-            )
-            conn.commit()
-        return cursor.rowcount
+        failed = cursor.rowcount
+        if failed:
+            promote_duplicate(cursor, article_id)
+        return failed
+
+
+def copy_analysis_to_duplicates(cursor, article_id):
+    """
+    Give near-duplicates linked to article_id (ai_status 'duplicate') its
+    summary, analyzed content and categories, once it has been analyzed.
+    Returns how many duplicates were filled in.
+    """
+    cursor.execute("SELECT summary FROM crawled_articles WHERE id = ? AND ai_status = 'success'", (article_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return 0
+    cursor.execute("SELECT id FROM crawled_articles WHERE duplicate_of = ? AND ai_status = 'duplicate' AND processed = 0", (article_id,))
+    duplicate_ids = [duplicate[0] for duplicate in cursor.fetchall()]
+    if not duplicate_ids:
+        return 0
+    placeholders = ",".join(["?"] * len(duplicate_ids))
+    cursor.execute(f"UPDATE crawled_articles SET summary = ?, processed = 1 WHERE id IN ({placeholders})", (row[0], *duplicate_ids))
+    cursor.execute(
+        f"""
+    INSERT INTO article_bodies (article_id, content)
+    SELECT ca.id, b.content FROM crawled_articles ca, article_bodies b
+    WHERE ca.id IN ({placeholders}) AND b.article_id = ?
+    ON CONFLICT (article_id) DO UPDATE SET content = excluded.content
+    """,
+        (*duplicate_ids, article_id),
+    )
+    drop_raw_content(cursor, duplicate_ids)
+    cursor.execute(f"DELETE FROM article_categories WHERE article_id IN ({placeholders})", duplicate_ids)
+    cursor.execute(
+        f"""
+    INSERT INTO article_categories (article_id, category_name)
+    SELECT ca.id, c.category_name FROM crawled_articles ca, article_categories c
+    WHERE ca.id IN ({placeholders}) AND c.article_id = ?
+    """,
+        (*duplicate_ids, article_id),
+    )
+    return len(duplicate_ids)
+
+
+def promote_duplicate(cursor, article_id):
+    """
+    When article_id gives up on analysis, queue its oldest unanalyzed
+    near-duplicate in its place and link the others to that one. Returns the
+    promoted article id, or None.
+    """
+    cursor.execute(
+        "SELECT MIN(id) FROM crawled_articles WHERE duplicate_of = ? AND ai_status = 'duplicate' AND processed = 0",
+        (article_id,),
+    )
+    promoted = cursor.fetchone()[0]
+    if promoted is None:
+        return None
+    cursor.execute("UPDATE crawled_articles SET duplicate_of = NULL, ai_status = 'pending' WHERE id = ?", (promoted,))
+    cursor.execute("UPDATE crawled_articles SET duplicate_of = ? WHERE duplicate_of = ?", (promoted, article_id))
+    return promoted
+
+
+def update_article_status(tracking_db_path, article_id, results=None, success=False, error_message=None):
+    return run_write(tracking_db_path, lambda cursor: write_article_status(cursor, article_id, results, success, error_message))
+
+
+def update_article_statuses(tracking_db_path, updates):
+    """update_article_status for many (article_id, results, success, error_message) tuples in one transaction."""
+
+    def write(cursor):
+        return sum(write_article_status(cursor, *update) for update in updates)
+
+    return run_write(tracking_db_path, write) if updates else 0
 
 
 def get_articles_by_date_range(tracking_db_path, start_date=None, end_date=None, limit=None, offset=0):
     query_parts = [
         "SELECT ca.id, ca.feed_id, ca.source_id, ca.title, ca.url, ca.published_date,",
-        "ca.summary, ca.content",
+        "ca.summary",
         "FROM crawled_articles ca",
         "WHERE ca.processed = 1",
         "AND ca.ai_status = 'success'",
@@ -198,24 +357,23 @@ def get_articles_by_date_range(tracking_db_path, start_date=None, end_date=None,
         query_params.append(limit)
         query_params.append(offset)
     query = " ".join(query_parts)
-    return execute_query(tracking_db_path, query, tuple(query_params), fetch=True)
+    articles = execute_query(tracking_db_path, query, tuple(query_params), fetch=True)
+    bodies = get_article_bodies(tracking_db_path, [article["id"] for article in articles], ("content",))
+    for article in articles:
+        article["content"] = bodies.get(article["id"], {}).get("content")
+    return articles
 
 
 def get_article_by_id(tracking_db_path, article_id):
     query = """
     SELECT id, entry_id, source_id, feed_id, title, url, published_date, 
-           raw_content, content, summary, metadata, ai_status, ai_error, 
-           ai_attempts, crawled_date, processed
+           summary, ai_status, ai_error, ai_attempts, crawled_date, processed
     FROM crawled_articles
     WHERE id = ?
     """
     article = execute_query(tracking_db_path, query, (article_id,), fetch=True, fetch_one=True)
     if article:
-        if article.get("metadata"):
-            try:
-                article["metadata"] = json.loads(article["metadata"])
-            except json.JSONDecodeError:
-                article["metadata"] = {}
+        article.update(get_article_bodies(tracking_db_path, [article_id]).get(article_id, dict.fromkeys(ARTICLE_BODY_COLUMNS)))
         article["categories"] = get_article_categories(tracking_db_path, article_id)
     return article
 
@@ -243,7 +401,8 @@ def get_article_stats(tracking_db_path):
         SUM(CASE WHEN ai_status = 'processing' THEN 1 ELSE 0 END) as processing_articles,
         SUM(CASE WHEN ai_status = 'success' THEN 1 ELSE 0 END) as success_articles,
         SUM(CASE WHEN ai_status = 'error' THEN 1 ELSE 0 END) as error_articles,
-        SUM(CASE WHEN ai_status = 'failed' THEN 1 ELSE 0 END) as failed_articles
+        SUM(CASE WHEN ai_status = 'failed' THEN 1 ELSE 0 END) as failed_articles,
+        SUM(CASE WHEN ai_status = 'duplicate' THEN 1 ELSE 0 END) as duplicate_articles
     FROM crawled_articles
     """
     return execute_query(tracking_db_path, query, fetch=True, fetch_one=True)
@@ -260,17 +419,18 @@ def get_categories_with_counts(tracking_db_path, limit=20):
     return execute_query(tracking_db_path, query, (limit,), fetch=True)
 
 
-def get_articles_with_source_info(tracking_db_path, limit=20, offset=0):
+def get_articles_with_source_info(tracking_db_path, limit=20, offset=0, sources_db_path=None):
     query = """
     SELECT ca.id, ca.title, ca.url, ca.published_date, ca.summary, 
            ft.feed_url, s.name as source_name
     FROM crawled_articles ca
     LEFT JOIN feed_tracking ft ON ca.feed_id = ft.feed_id
-    LEFT JOIN source_feeds sf ON ca.feed_id = sf.id
-    LEFT JOIN sources s ON sf.source_id = s.id
+    LEFT JOIN sources_db.source_feeds sf ON ca.feed_id = sf.id
+    LEFT JOIN sources_db.sources s ON sf.source_id = s.id
     WHERE ca.processed = 1 
     AND ca.ai_status = 'success'
-    ORDER BY ca.published_date DESC
+    ORDER BY ca.published_ts DESC
     LIMIT ? OFFSET ?
     """
-    return execute_query(tracking_db_path, query, (limit, offset), fetch=True)
+    attach = {"sources_db": sources_db_path or get_sources_db_path()}
+    return execute_query(tracking_db_path, query, (limit, offset), fetch=True, attach=attach)
@@ -0,0 +1,79 @@
+from .write_queue import run_write
+
+DEFAULT_MAX_PENDING = 500
+
+
+def execute_many(db_path, query, params_list):
+    params_list = list(params_list)
+    if not params_list:
+        return 0
+
+    def write(cursor):
+        cursor.executemany(query, params_list)
+        return cursor.rowcount
+
+    return run_write(db_path, write)
+
+
+class WriteBuffer:
+    """
+    Write-behind buffer for a single database file.
+
+    Statements are grouped by query text and flushed with executemany inside
+    one transaction, so a processor batch costs one commit instead of one per
+    row. Groups run in the order their query was first added to the buffer, so
+    a flush that splits a row's statements still writes parents first. Use as
+    a context manager to flush on exit.
+    """
+
+    def __init__(self, db_path, max_pending=DEFAULT_MAX_PENDING):
+        self.db_path = db_path
+        self.max_pending = max_pending
+        self.changes = {}
+        self._pending = {}
+        self._pending_count = 0
+        self._order = {}
+
+    def add(self, query, params):
+        self._order.setdefault(query, len(self._order))
+        self._pending.setdefault(query, []).append(tuple(params))
+        self._pending_count += 1
+        if self.max_pending and self._pending_count >= self.max_pending:
+            self.flush()
+
+    def add_many(self, query, params_list):
+        for params in params_list:
+            self.add(query, params)
+
+    def __len__(self):
+        return self._pending_count
+
+    def flush(self):
+        if not self._pending:
+            return 0
+        pending, self._pending, self._pending_count = self._pending, {}, 0
+
+        def write(cursor):
+            changes = {}
+            for query, params_list in sorted(pending.items(), key=lambda item: self._order[item[0]]):
+                cursor.executemany(query, params_list)
+                changes[query] = max(cursor.rowcount, 0)
+            return changes
+
+        changes = run_write(self.db_path, write)
+        for query, count in changes.items():
+            self.changes[query] = self.changes.get(query, 0) + count
+        return sum(len(params_list) for params_list in pending.values())
+
+    def discard(self):
+        self._pending, self._pending_count = {}, 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+        return False
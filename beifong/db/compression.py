@@ -0,0 +1,252 @@
+import os
+import argparse
+import threading
+import zstandard
+from .config import get_tracking_db_path
+from .connection import db_connection, execute_query
+from .write_queue import run_write
+
+RAW_CONTENT_ZSTD_LEVEL = int(os.environ.get("RAW_CONTENT_ZSTD_LEVEL", 9))
+RAW_CONTENT_DICT_SIZE = int(os.environ.get("RAW_CONTENT_DICT_SIZE", 112640))
+RAW_CONTENT_DICT_SAMPLES = int(os.environ.get("RAW_CONTENT_DICT_SAMPLES", 2000))
+# Keep raw HTML after AI analysis succeeds (it is dropped by default; analysis works from clean_text).
+RAW_CONTENT_KEEP_ANALYZED = os.environ.get("RAW_CONTENT_KEEP_ANALYZED", "0").lower() in ("1", "true", "yes")
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPACT_BATCH_SIZE = 200
+
+# Articles whose analysis is done: analyzed themselves, or given the analysis of their canonical copy.
+ANALYZED_ARTICLES_QUERY = "SELECT id FROM crawled_articles WHERE processed = 1 AND ai_status IN ('success', 'duplicate')"
+ACTIVE_DICTIONARY_QUERY = "SELECT dict_id, data FROM content_dictionaries ORDER BY id DESC LIMIT 1"
+DICTIONARY_QUERY = "SELECT data FROM content_dictionaries WHERE dict_id = ?"
+
+_dictionaries = {}
+_active_dict_ids = {}
+_lock = threading.Lock()
+# Compressor and decompressor objects must not be shared between threads.
+_local = threading.local()
+
+
+def _remember_dictionary(dict_id, data):
+    dictionary = zstandard.ZstdCompressionDict(data)
+    with _lock:
+        _dictionaries[dict_id] = dictionary
+    return dictionary
+
+
+def _active_dict_id(db_path):
+    key = os.path.abspath(db_path)
+    with _lock:
+        if key in _active_dict_ids:
+            return _active_dict_ids[key]
+    row = execute_query(db_path, ACTIVE_DICTIONARY_QUERY, fetch=True, fetch_one=True)
+    dict_id = 0
+    if row:
+        dict_id = row["dict_id"]
+        _remember_dictionary(dict_id, row["data"])
+    with _lock:
+        _active_dict_ids[key] = dict_id
+    return dict_id
+
+
+def _dictionary(db_path, dict_id):
+    with _lock:
+        dictionary = _dictionaries.get(dict_id)
+    if dictionary is None:
+        row = execute_query(db_path, DICTIONARY_QUERY, (dict_id,), fetch=True, fetch_one=True)
+        if not row:
+            raise LookupError(f"zstd dictionary {dict_id} is missing from {db_path}")
+        dictionary = _remember_dictionary(dict_id, row["data"])
+    return dictionary
+
+
+def _compressor(db_path, dict_id):
+    compressors = _local.__dict__.setdefault("compressors", {})
+    compressor = compressors.get(dict_id)
+    if compressor is None:
+        dictionary = _dictionary(db_path, dict_id) if dict_id else None
+        compressor = zstandard.ZstdCompressor(level=RAW_CONTENT_ZSTD_LEVEL, dict_data=dictionary)
+        compressors[dict_id] = compressor
+    return compressor
+
+
+def _decompressor(db_path, dict_id):
+    decompressors = _local.__dict__.setdefault("decompressors", {})
+    decompressor = decompressors.get(dict_id)
+    if decompressor is None:
+        dictionary = _dictionary(db_path, dict_id) if dict_id else None
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        decompressors[dict_id] = decompressor
+    return decompressor
+
+
+def frame_dict_id(value):
+    """Dictionary id of a compressed value (0 for none), or None if value is not a zstd frame."""
+    if not isinstance(value, bytes) or not value.startswith(ZSTD_MAGIC):
+        return None
+    return zstandard.get_frame_parameters(value).dict_id
+
+
+def compress_text(db_path, text):
+    """zstd-compress text for storage in db_path, with its active dictionary if one was trained."""
+    if not text:
+        return text
+    return _compressor(db_path, _active_dict_id(db_path)).compress(text.encode("utf-8"))
+
+
+def decompress_text(db_path, value):
+    """Inverse of compress_text; rows written before compression (TEXT) are returned unchanged."""
+    dict_id = frame_dict_id(value)
+    if dict_id is None:
+        return value.decode("utf-8", errors="replace") if isinstance(value, bytes) else value
+    return _decompressor(db_path, dict_id).decompress(value).decode("utf-8", errors="replace")
+
+
+def train_dictionary(db_path, samples=RAW_CONTENT_DICT_SAMPLES, dict_size=RAW_CONTENT_DICT_SIZE):
+    """
+    Train a zstd dictionary on the most recent raw_content and make it the active one.
+
+    New rows are compressed with it; older rows keep the dictionary id in their
+    frame header, so every dictionary ever trained stays in content_dictionaries.
+    Returns the new dictionary id, or None when there are too few samples.
+    """
+    rows = execute_query(
+        db_path,
+        "SELECT raw_content FROM article_bodies WHERE raw_content IS NOT NULL ORDER BY article_id DESC LIMIT ?",
+        (samples,),
+        fetch=True,
+    )
+    corpus = [decompress_text(db_path, row["raw_content"]).encode("utf-8") for row in rows]
+    corpus = [sample for sample in corpus if sample]
+    if len(corpus) < 8:
+        return None
+    dictionary = zstandard.train_dictionary(dict_size, corpus, level=RAW_CONTENT_ZSTD_LEVEL)
+    dict_id = dictionary.dict_id()
+    run_write(
+        db_path,
+        lambda cursor: cursor.execute(
+            "INSERT OR IGNORE INTO content_dictionaries (dict_id, data, sample_count) VALUES (?, ?, ?)",
+            (dict_id, dictionary.as_bytes(), len(corpus)),
+        ),
+    )
+    _remember_dictionary(dict_id, dictionary.as_bytes())
+    with _lock:
+        _active_dict_ids[os.path.abspath(db_path)] = dict_id
+    return dict_id
+
+
+def drop_raw_content(cursor, article_ids=None):
+    """
+    The raw HTML retention policy: drop article_bodies.raw_content of
+    article_ids once their analysis is done, or of every analyzed article when
+    article_ids is None. A no-op with RAW_CONTENT_KEEP_ANALYZED. Returns the
+    number of rows dropped.
+    """
+    if RAW_CONTENT_KEEP_ANALYZED:
+        return 0
+    if article_ids is None:
+        cursor.execute(f"UPDATE article_bodies SET raw_content = NULL WHERE raw_content IS NOT NULL AND article_id IN ({ANALYZED_ARTICLES_QUERY})")
+    else:
+        placeholders = ",".join(["?"] * len(article_ids))
+        cursor.execute(f"UPDATE article_bodies SET raw_content = NULL WHERE raw_content IS NOT NULL AND article_id IN ({placeholders})", article_ids)
+    return cursor.rowcount
+
+
+def _database_bytes(db_path):
+    with db_connection(db_path) as conn:
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+def compact_raw_content(db_path=None, drop_analyzed=True, vacuum=True, batch_size=COMPACT_BATCH_SIZE):
+    """
+    Backfill the storage policy on rows written before it.
+
+    Uncompressed rows, and rows compressed with an older dictionary than the
+    active one, are (re)compressed; with drop_analyzed, drop_raw_content is
+    applied to every analyzed article (new analyses apply it as they are
+    stored). vacuum returns the freed space to the filesystem. Returns counts
+    and byte totals. reclaimed_bytes is how much the file shrank with vacuum;
+    without it the file keeps its size, and reclaimed_bytes is the raw_content
+    bytes freed inside it for new rows to reuse.
+    """
+    if db_path is None:
+        db_path = get_tracking_db_path()
+    stats = {"rows": 0, "compressed": 0, "dropped": 0, "content_bytes_before": 0, "content_bytes_after": 0}
+    stats["database_bytes_before"] = _database_bytes(db_path)
+    if drop_analyzed:
+
+        def drop(cursor):
+            cursor.execute(
+                "SELECT COALESCE(SUM(length(CAST(raw_content AS BLOB))), 0) FROM article_bodies "
+                f"WHERE raw_content IS NOT NULL AND article_id IN ({ANALYZED_ARTICLES_QUERY})"
+            )
+            dropped_bytes = cursor.fetchone()[0]
+            return drop_raw_content(cursor), dropped_bytes
+
+        stats["dropped"], dropped_bytes = run_write(db_path, drop)
+        stats["content_bytes_before"] += dropped_bytes if stats["dropped"] else 0
+    active_dict_id = _active_dict_id(db_path)
+    last_id = 0
+    while True:
+        rows = execute_query(
+            db_path,
+            "SELECT article_id, raw_content FROM article_bodies WHERE article_id > ? AND raw_content IS NOT NULL ORDER BY article_id LIMIT ?",
+            (last_id, batch_size),
+            fetch=True,
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["article_id"]
+        updates = []
+        for row in rows:
+            value = row["raw_content"]
+            size = len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
+            stats["rows"] += 1
+            stats["content_bytes_before"] += size
+            if frame_dict_id(value) == active_dict_id:
+                stats["content_bytes_after"] += size
+                continue
+            compressed = compress_text(db_path, decompress_text(db_path, value))
+            updates.append((compressed, row["article_id"]))
+            stats["content_bytes_after"] += len(compressed) if compressed else 0
+        if updates:
+            run_write(db_path, lambda cursor: cursor.executemany("UPDATE article_bodies SET raw_content = ? WHERE article_id = ?", updates))
+            stats["compressed"] += len(updates)
+    if vacuum:
+        with db_connection(db_path) as conn:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    stats["database_bytes_after"] = _database_bytes(db_path)
+    if vacuum:
+        stats["reclaimed_bytes"] = stats["database_bytes_before"] - stats["database_bytes_after"]
+    else:
+        stats["reclaimed_bytes"] = stats["content_bytes_before"] - stats["content_bytes_after"]
+    return stats
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Compress and prune stored article HTML")
+    parser.add_argument("--train-dictionary", action="store_true", help="Train a new zstd dictionary on recent articles first")
+    parser.add_argument("--keep-analyzed", action="store_true", help="Keep raw HTML of articles whose AI analysis succeeded")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM (freed pages stay in the file for reuse)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from .scrape_cache import prune_scrape_cache
+    from .llm_cache import prune_llm_cache
+
+    args = parse_arguments()
+    tracking_db_path = get_tracking_db_path()
+    if args.train_dictionary:
+        dict_id = train_dictionary(tracking_db_path)
+        print(f"Trained dictionary {dict_id}" if dict_id else "Too few articles to train a dictionary")
+    entries, texts = prune_scrape_cache(tracking_db_path)
+    print(f"Scrape cache: pruned {entries} expired entries and {texts} unreferenced texts")
+    print(f"LLM cache: pruned {prune_llm_cache()} expired or least recently used entries")
+    stats = compact_raw_content(tracking_db_path, drop_analyzed=not args.keep_analyzed, vacuum=not args.no_vacuum)
+    print(f"Rows with raw HTML: {stats['rows']} ({stats['compressed']} compressed, {stats['dropped']} dropped after analysis)")
+    print(f"raw_content: {stats['content_bytes_before']:,} -> {stats['content_bytes_after']:,} bytes")
+    reclaimed = "reclaimed" if not args.no_vacuum else "free for reuse inside the file"
+    print(f"Database: {stats['database_bytes_before']:,} -> {stats['database_bytes_after']:,} bytes ({stats['reclaimed_bytes']:,} {reclaimed})")
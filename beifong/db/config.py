@@ -15,6 +15,7 @@ DEFAULT_DB_PATHS = {
     "internal_sessions_db": "databases/internal_sessions.db",
     "social_media_db": "databases/social_media.db",
     "slack_sessions_db": "databases/slack_sessions.db",
+    "llm_cache_db": "databases/llm_cache.db",
 }
 
 
@@ -64,6 +65,10 @@ def get_browser_session_path():
 def get_slack_sessions_db_path():
     return get_db_path("slack_sessions_db")
 
+
+def get_llm_cache_db_path():
+    return get_db_path("llm_cache_db")
+
 DB_PATH = "databases"
 PODCAST_DIR = "podcasts"
 PODCAST_IMG_DIR = PODCAST_DIR + "/images"
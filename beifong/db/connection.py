@@ -1,27 +1,208 @@
+import os
+import queue
 import sqlite3
+import threading
+from pathlib import Path
 from contextlib import contextmanager
 
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", 5000))
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=10000",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}",
+]
+
+
+def attach_read_only(conn, alias, db_path):
+    """ATTACH db_path as alias in read-only mode; conn must have been opened with uri=True."""
+    if not alias.isidentifier():
+        raise ValueError(f"Invalid schema alias: {alias}")
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (Path(db_path).resolve().as_uri() + "?mode=ro",))
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived connections to a single SQLite file.
+
+    attach maps schema aliases to other database files that every connection
+    attaches read-only, so queries can join across them in one statement.
+    """
+
+    def __init__(self, db_path, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, attach=None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.attach = dict(attach or {})
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "reused": 0, "discarded": 0, "in_use": 0}
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, uri=bool(self.attach))
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        try:
+            for alias, path in self.attach.items():
+                attach_read_only(conn, alias, path)
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            self.stats["opened"] += 1
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(f"Timed out waiting for a connection to {self.db_path} (pool size {self.max_size})")
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._open()
+                    break
+                if self._is_healthy(candidate):
+                    conn = candidate
+                    with self._lock:
+                        self.stats["reused"] += 1
+                else:
+                    self._discard(candidate)
+            with self._lock:
+                self.stats["in_use"] += 1
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        try:
+            conn.row_factory = sqlite3.Row
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self.stats["in_use"] -= 1
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["idle"] = self._idle.qsize()
+        stats["max_size"] = self.max_size
+        checkouts = stats["opened"] + stats["reused"]
+        stats["reuse_ratio"] = round(stats["reused"] / checkouts, 4) if checkouts else 0.0
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def _pool_key(db_path, attach):
+    key = os.path.abspath(db_path)
+    if attach:
+        key += "?attach=" + ",".join(f"{alias}={os.path.abspath(path)}" for alias, path in sorted(attach.items()))
+    return key
+
+
+def get_pool(db_path, attach=None):
+    global _pools, _pools_pid
+    key = _pool_key(db_path, attach)
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools = {}
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, attach=attach)
+            _pools[key] = pool
+        return pool
+
+
+def acquire_connection(db_path):
+    return get_pool(db_path).acquire()
+
+
+def release_connection(db_path, conn):
+    get_pool(db_path).release(conn)
+
+
+def get_pool_stats():
+    with _pools_lock:
+        return {path: pool.get_stats() for path, pool in _pools.items()}
+
+
+def close_all_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
 
 @contextmanager
-def db_connection(db_path):
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+def db_connection(db_path, attach=None):
+    pool = get_pool(db_path, attach)
+    conn = pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.release(conn)
+
 
+def execute_query(db_path, query, params=(), fetch=False, fetch_one=False, attach=None):
+    """
+    Run a single statement against db_path.
 
-def execute_query(db_path, query, params=(), fetch=False, fetch_one=False):
-    with db_connection(db_path) as conn:
+    Reads may pass attach ({alias: path}) to join against other databases,
+    which are attached read-only; writes always go through run_write.
+    """
+    if not (fetch or fetch_one):
+        from .write_queue import run_write
+
+        def write(cursor):
+            cursor.execute(query, params)
+            return cursor.lastrowid
+
+        return run_write(db_path, write)
+    with db_connection(db_path, attach) as conn:
         cursor = conn.cursor()
         cursor.execute(query, params)
 
         if fetch_one:
             result = cursor.fetchone()
             return dict(result) if result else None
-        elif fetch:
-            return [dict(row) for row in cursor.fetchall()]
-        else:
-            conn.commit()
-            return cursor.lastrowid
+        return [dict(row) for row in cursor.fetchall()]
@@ -1,6 +1,90 @@
+import json
 from datetime import datetime
-import sqlite3
-from .connection import db_connection, execute_query
+from .connection import execute_query
+from .write_queue import run_write
+from .batch import execute_many
+from .timestamps import published_ts_or_now
+
+FEED_TRACKING_UPDATE_QUERY = """
+UPDATE feed_tracking 
+SET last_processed = ?, last_etag = ?, last_modified = ?
+WHERE feed_id = ?
+"""
+
+# Poll outcomes counted in feed_tracking's history columns.
+FEED_CHANGED = "changed"
+FEED_NOT_MODIFIED = "not_modified"
+FEED_UNCHANGED = "unchanged"
+FEED_FAILED = "failed"
+
+FEED_SCHEDULE_UPDATE_QUERY = """
+UPDATE feed_tracking
+SET last_checked_ts = ?, poll_interval = ?, next_due_ts = ?,
+    check_count = check_count + 1,
+    not_modified_count = not_modified_count + ?,
+    unchanged_count = unchanged_count + ?,
+    error_count = error_count + ?,
+    new_entry_count = new_entry_count + ?,
+    last_new_entry_ts = CASE WHEN ? > 0 THEN ? ELSE last_new_entry_ts END,
+    idle_streak = CASE WHEN ? > 0 THEN 0 ELSE idle_streak + 1 END
+WHERE feed_id = ?
+"""
+
+# Active feeds with their tracking row (if any) that are due by the given time,
+# read from tracking_db with sources_db attached. Keyset-paged on source_feeds.id.
+DUE_FEEDS_QUERY = """
+SELECT sf.id, sf.source_id, sf.feed_url, sf.feed_type, sf.last_crawled,
+       s.name as source_name, ft.feed_id as tracked_feed_id, ft.last_etag, ft.last_modified,
+       ft.poll_interval, ft.next_due_ts
+FROM sources_db.source_feeds sf
+JOIN sources_db.sources s ON sf.source_id = s.id
+LEFT JOIN feed_tracking ft ON ft.feed_id = sf.id
+WHERE sf.is_active = 1 AND s.is_active = 1 AND sf.id > ?
+      AND (ft.next_due_ts IS NULL OR ft.next_due_ts <= ?)
+ORDER BY sf.id
+LIMIT ?
+"""
+
+# Takes a JSON array of feed ids; returns the ids and links of each feed's most recently published entries.
+RECENT_ENTRY_KEYS_QUERY = """
+SELECT e.feed_id, e.entry_id, e.link, e.entry_fingerprint
+FROM json_each(?) f
+JOIN feed_entries e ON e.id IN (
+    SELECT id FROM feed_entries WHERE feed_id = f.value ORDER BY published_ts DESC, id DESC LIMIT ?
+)
+"""
+
+# An entry already stored for the same feed is refreshed when the publisher edited it (its fingerprint changed).
+# More than one ON CONFLICT clause needs SQLite 3.35 (services.db_init.SQLITE_MIN_VERSION, checked at init).
+FEED_ENTRY_INSERT_QUERY = """
+INSERT INTO feed_entries 
+(feed_id, source_id, entry_id, title, link, published_date, published_ts, content, summary, entry_fingerprint)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (link) DO UPDATE SET
+    title = excluded.title,
+    content = excluded.content,
+    summary = excluded.summary,
+    entry_fingerprint = excluded.entry_fingerprint
+WHERE feed_entries.feed_id = excluded.feed_id
+      AND feed_entries.entry_id = excluded.entry_id
+      AND feed_entries.entry_fingerprint IS NOT excluded.entry_fingerprint
+ON CONFLICT DO NOTHING
+"""
+
+UNCRAWLED_ENTRIES_QUERY = """
+SELECT e.id, e.feed_id, e.source_id, e.title, e.link, e.published_date,
+       e.crawl_attempts, e.entry_id as original_entry_id
+FROM feed_entries e
+WHERE e.crawl_status IN ('pending', 'failed')
+      AND e.crawl_attempts < ?
+      AND e.link IS NOT NULL
+      AND e.link != ''
+      AND NOT EXISTS (
+          SELECT 1 FROM crawled_articles ca WHERE ca.url = e.link
+      )
+ORDER BY e.published_ts DESC
+LIMIT ?
+"""
 
 
 def get_active_feeds(sources_db_path, limit=None, offset=0):
@@ -36,83 +120,77 @@ def count_active_feeds(sources_db_path):
     return result["count"] if result else 0
 
 
+def get_due_feeds(tracking_db_path, sources_db_path, due_before, after_id=0, limit=100):
+    params = (after_id, due_before, limit)
+    return execute_query(tracking_db_path, DUE_FEEDS_QUERY, params, fetch=True, attach={"sources_db": sources_db_path})
+
+
+def get_recent_entry_keys(tracking_db_path, feed_ids, per_feed=200):
+    """entry_id, link and entry_fingerprint of up to per_feed most recently published entries of each feed, in one query."""
+    if not feed_ids:
+        return []
+    return execute_query(tracking_db_path, RECENT_ENTRY_KEYS_QUERY, (json.dumps(list(feed_ids)), per_feed), fetch=True)
+
+
 def get_feed_tracking_info(tracking_db_path, feed_id):
     query = "SELECT * FROM feed_tracking WHERE feed_id = ?"
     return execute_query(tracking_db_path, query, (feed_id,), fetch=True, fetch_one=True)
 
 
-def update_feed_tracking(tracking_db_path, feed_id, etag, modified, entry_hash):
-    query = """
-    UPDATE feed_tracking 
-    SET last_processed = ?, last_etag = ?, last_modified = ?, entry_hash = ?
-    WHERE feed_id = ?
-    """
-    params = (datetime.now().isoformat(), etag, modified, entry_hash, feed_id)
-    return execute_query(tracking_db_path, query, params)
+def update_feed_tracking(tracking_db_path, feed_id, etag, modified):
+    params = (datetime.now().isoformat(), etag, modified, feed_id)
+    return execute_query(tracking_db_path, FEED_TRACKING_UPDATE_QUERY, params)
+
+
+def queue_feed_tracking_update(writer, feed_id, etag, modified):
+    writer.add(FEED_TRACKING_UPDATE_QUERY, (datetime.now().isoformat(), etag, modified, feed_id))
+
+
+def queue_feed_schedule_update(writer, feed_id, outcome, new_entries, poll_interval, next_due_ts, now_ts):
+    """Record one poll (a FEED_* outcome) and the feed's next due time in feed_tracking."""
+    counts = (int(outcome == FEED_NOT_MODIFIED), int(outcome == FEED_UNCHANGED), int(outcome == FEED_FAILED))
+    writer.add(
+        FEED_SCHEDULE_UPDATE_QUERY,
+        (now_ts, poll_interval, next_due_ts, *counts, new_entries, new_entries, now_ts, new_entries, feed_id),
+    )
+
+
+def _feed_entry_params(feed_id, source_id, entry):
+    published_date = entry.get("published_date", datetime.now().isoformat())
+    return (
+        feed_id,
+        source_id,
+        entry.get("entry_id", ""),
+        entry.get("title", ""),
+        entry.get("link", ""),
+        published_date,
+        published_ts_or_now(published_date),
+        entry.get("content", ""),
+        entry.get("summary", ""),
+        entry.get("fingerprint"),
+    )
 
 
 def store_feed_entries(tracking_db_path, feed_id, source_id, entries):
-    count = 0
-    with db_connection(tracking_db_path) as conn:
-        cursor = conn.cursor()
-        for entry in entries:
-            try:
-                cursor.execute(
-                    """
-                INSERT INTO feed_entries 
-                (feed_id, source_id, entry_id, title, link, published_date, content, summary)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        feed_id,
-                        source_id,
-                        entry.get("entry_id", ""),
-                        entry.get("title", ""),
-                        entry.get("link", ""),
-                        entry.get("published_date", datetime.now().isoformat()),
-                        entry.get("content", ""),
-                        entry.get("summary", ""),
-                    ),
-                )
-                count += 1
-            except sqlite3.IntegrityError:
-                pass
-        conn.commit()
-    return count
+    return execute_many(tracking_db_path, FEED_ENTRY_INSERT_QUERY, [_feed_entry_params(feed_id, source_id, entry) for entry in entries])
+
+
+def queue_feed_entries(writer, feed_id, source_id, entries):
+    writer.add_many(FEED_ENTRY_INSERT_QUERY, [_feed_entry_params(feed_id, source_id, entry) for entry in entries])
 
 
 def update_tracking_info(tracking_db_path, feeds):
-    with db_connection(tracking_db_path) as conn:
-        cursor = conn.cursor()
-        for feed in feeds:
-            cursor.execute(
-                """
-            INSERT OR IGNORE INTO feed_tracking 
-            (feed_id, source_id, feed_url, last_processed)
-            VALUES (?, ?, ?, NULL)
-            """,
-                (feed["id"], feed["source_id"], feed["feed_url"]),
-            )
-        conn.commit()
+    query = """
+    INSERT OR IGNORE INTO feed_tracking 
+    (feed_id, source_id, feed_url, last_processed)
+    VALUES (?, ?, ?, NULL)
+    """
+    return execute_many(tracking_db_path, query, [(feed["id"], feed["source_id"], feed["feed_url"]) for feed in feeds])
 
 
 def get_uncrawled_entries(tracking_db_path, limit=20, max_attempts=3):
     reset_stuck_entries(tracking_db_path)
-    query = """
-    SELECT e.id, e.feed_id, e.source_id, e.title, e.link, e.published_date,
-           e.crawl_attempts, e.entry_id as original_entry_id
-    FROM feed_entries e
-    WHERE (e.crawl_status = 'pending' OR e.crawl_status = 'failed') 
-          AND e.crawl_attempts < ?
-          AND e.link IS NOT NULL
-          AND e.link != ''
-          AND NOT EXISTS (
-              SELECT 1 FROM crawled_articles ca WHERE ca.url = e.link
-          )
-    ORDER BY e.published_date DESC
-    LIMIT ?
-    """
-    entries = execute_query(tracking_db_path, query, (max_attempts, limit), fetch=True)
+    entries = execute_query(tracking_db_path, UNCRAWLED_ENTRIES_QUERY, (max_attempts, limit), fetch=True)
     if entries:
         entry_ids = [e["id"] for e in entries]
         mark_entries_as_processing(tracking_db_path, entry_ids)
@@ -131,18 +209,19 @@ def reset_stuck_entries(tracking_db_path):
 def mark_entries_as_processing(tracking_db_path, entry_ids):
     if not entry_ids:
         return 0
-    with db_connection(tracking_db_path) as conn:
-        cursor = conn.cursor()
-        placeholders = ",".join(["?"] * len(entry_ids))
-        query = f"""
-        UPDATE feed_entries 
-        SET crawl_status = 'processing' 
-        WHERE id IN ({placeholders})
-        """
+    placeholders = ",".join(["?"] * len(entry_ids))
+    query = f"""
+    UPDATE feed_entries 
+    SET crawl_status = 'processing' 
+    WHERE id IN ({placeholders})
+    """
+
+    def write(cursor):
         cursor.execute(query, entry_ids)
-        conn.commit()
         return cursor.rowcount
 
+    return run_write(tracking_db_path, write)
+
 
 def ensure_feed_tracking_exists(tracking_db_path, feed_id, source_id, feed_url):
     query = """
@@ -0,0 +1,164 @@
+import re
+import argparse
+from .config import get_db_path
+from .write_queue import run_write
+
+# External-content FTS5 indexes, kept in sync by triggers on the source table.
+# weights are the bm25() column weights, in column order. With side, some columns
+# live in a side table keyed by the base table's rowid; content is then a view
+# joining the two, and both tables carry sync triggers.
+FTS_INDEXES = {
+    "tracking_db": {
+        "table": "crawled_articles_fts",
+        "content": "crawled_articles_search",
+        "rowid": "id",
+        "columns": ("title", "summary", "content"),
+        "weights": (10.0, 4.0, 1.0),
+        "base": "crawled_articles",
+        "side": {"table": "article_bodies", "key": "article_id", "columns": ("content",)},
+    },
+    "social_media_db": {
+        "table": "posts_fts",
+        "content": "posts",
+        "rowid": "rowid",
+        "columns": ("post_text", "user_display_name", "user_handle"),
+        "weights": (1.0, 2.0, 2.0),
+    },
+}
+
+_TOKEN_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def fts_schema(db_name, spec=None):
+    """CREATE statements for db_name's FTS table and its sync triggers, followed by a rebuild."""
+    spec = spec or FTS_INDEXES[db_name]
+    if "side" in spec:
+        return _split_fts_schema(spec)
+    table, content, rowid = spec["table"], spec["content"], spec["rowid"]
+    columns = ", ".join(spec["columns"])
+    new_values = ", ".join(f"new.{column}" for column in spec["columns"])
+    old_values = ", ".join(f"old.{column}" for column in spec["columns"])
+    delete_old = f"INSERT INTO {table} ({table}, rowid, {columns}) VALUES ('delete', old.{rowid}, {old_values});"
+    insert_new = f"INSERT INTO {table} (rowid, {columns}) VALUES (new.{rowid}, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns}, content='{content}', content_rowid='{rowid}', "
+        "tokenize='porter unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {content} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {content} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {columns} ON {content} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {table} ({table}) VALUES ('rebuild')",
+    ]
+
+
+def _split_fts_schema(spec):
+    table, view, rowid, base = spec["table"], spec["content"], spec["rowid"], spec["base"]
+    side, key, side_columns = spec["side"]["table"], spec["side"]["key"], spec["side"]["columns"]
+    columns = ", ".join(spec["columns"])
+    base_columns = [column for column in spec["columns"] if column not in side_columns]
+    view_columns = ", ".join(f"s.{column}" if column in side_columns else f"b.{column}" for column in spec["columns"])
+
+    def base_row(ref):
+        # Values indexed for base row ref (new/old), reading the side columns from the side table.
+        return ", ".join(
+            f"(SELECT {column} FROM {side} WHERE {key} = {ref}.{rowid})" if column in side_columns else f"{ref}.{column}"
+            for column in spec["columns"]
+        )
+
+    def side_row(ref):
+        # Values indexed for side row ref (new/old, None for no side row), reading the base columns from the base table.
+        return ", ".join(
+            (f"{ref}.{column}" if ref else "NULL") if column in side_columns else f"b.{column}" for column in spec["columns"]
+        )
+
+    def side_sync(ref, old, new):
+        delete_old = f"INSERT INTO {table} ({table}, rowid, {columns}) SELECT 'delete', b.{rowid}, {side_row(old)} FROM {base} b WHERE b.{rowid} = {ref}.{key};"
+        insert_new = f"INSERT INTO {table} (rowid, {columns}) SELECT b.{rowid}, {side_row(new)} FROM {base} b WHERE b.{rowid} = {ref}.{key};"
+        return f"{delete_old} {insert_new}"
+
+    def has_side_values(ref):
+        return " OR ".join(f"{ref}.{column} IS NOT NULL" for column in side_columns)
+
+    delete_old = f"INSERT INTO {table} ({table}, rowid, {columns}) VALUES ('delete', old.{rowid}, {base_row('old')});"
+    insert_new = f"INSERT INTO {table} (rowid, {columns}) VALUES (new.{rowid}, {base_row('new')});"
+    side_update_of = ", ".join(side_columns)
+    return [
+        f"CREATE VIEW IF NOT EXISTS {view} AS SELECT b.{rowid} AS {rowid}, {view_columns} FROM {base} b LEFT JOIN {side} s ON s.{key} = b.{rowid}",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns}, content='{view}', content_rowid='{rowid}', "
+        "tokenize='porter unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {base} BEGIN {insert_new} END",
+        # The side row goes with its base row, after the index entry that includes it is removed.
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {base} BEGIN {delete_old} DELETE FROM {side} WHERE {key} = old.{rowid}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {', '.join(base_columns)} ON {base} BEGIN {delete_old} {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_side_ai AFTER INSERT ON {side} WHEN {has_side_values('new')} BEGIN {side_sync('new', None, 'new')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_side_ad AFTER DELETE ON {side} WHEN {has_side_values('old')} BEGIN {side_sync('old', 'old', None)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_side_au AFTER UPDATE OF {side_update_of} ON {side} BEGIN {side_sync('new', 'old', 'new')} END",
+        f"INSERT INTO {table} ({table}) VALUES ('rebuild')",
+    ]
+
+
+def bm25_rank(db_name):
+    spec = FTS_INDEXES[db_name]
+    return f"bm25({spec['table']}, {', '.join(str(weight) for weight in spec['weights'])})"
+
+
+def _phrase(text, prefix=False):
+    words = text.replace('"', " ").split()
+    if not words:
+        return None
+    return f'"{" ".join(words)}"' + ("*" if prefix else "")
+
+
+def match_terms(terms, operator="OR", prefix=False):
+    """
+    FTS5 MATCH expression for a list of search terms (as extracted by the agents).
+
+    Each term is matched as a phrase, so multi-word terms keep their word order;
+    with prefix the last word of each phrase also matches longer words. Returns
+    None when no term has any searchable text.
+    """
+    operator = "AND" if str(operator).upper() == "AND" else "OR"
+    phrases = [phrase for phrase in (_phrase(str(term), prefix) for term in terms) if phrase]
+    return f" {operator} ".join(phrases) or None
+
+
+def match_query(text):
+    """
+    FTS5 MATCH expression for free text typed into a search box.
+
+    "Quoted text" is an exact phrase; other words are prefix matches. All parts
+    must match. FTS5 operators in the input are treated as plain words.
+    """
+    parts = []
+    for quoted, word in _TOKEN_PATTERN.findall(text or ""):
+        phrase = _phrase(quoted) if quoted else _phrase(word, prefix=True)
+        if phrase:
+            parts.append(phrase)
+    return " AND ".join(parts) or None
+
+
+def rebuild_fts(db_name, optimize=True):
+    """Repopulate db_name's FTS index from its content table (e.g. after a bulk import or VACUUM)."""
+    table = FTS_INDEXES[db_name]["table"]
+
+    def write(cursor):
+        cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+    return run_write(get_db_path(db_name), write)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Rebuild the full-text search indexes")
+    parser.add_argument("--db", choices=sorted(FTS_INDEXES), action="append", help="Database to rebuild (default: all)")
+    parser.add_argument("--no-optimize", action="store_true", help="Skip merging index segments after the rebuild")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    for db_name in args.db or sorted(FTS_INDEXES):
+        rows = rebuild_fts(db_name, optimize=not args.no_optimize)
+        print(f"{db_name}: rebuilt {FTS_INDEXES[db_name]['table']} ({rows} rows)")
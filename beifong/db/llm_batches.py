@@ -0,0 +1,114 @@
+from .connection import execute_query
+from .write_queue import run_write
+
+# Column on crawled_articles that claims an article for an open batch job, and the value it gets back if the job does not process it.
+BATCH_ITEM_CLAIMS = {
+    "analysis": ("ai_status", "'pending'"),
+    "embedding": ("embedding_status", "NULL"),
+}
+OPEN_BATCH_STATUSES = ("prepared", "submitted")
+
+BATCH_JOB_COLUMNS = (
+    "id",
+    "kind",
+    "status",
+    "input_path",
+    "input_file_id",
+    "batch_id",
+    "batch_status",
+    "output_file_id",
+    "error_file_id",
+    "item_count",
+    "succeeded",
+    "failed",
+    "released",
+    "error",
+    "created_at",
+    "updated_at",
+)
+
+
+def create_batch_job(tracking_db_path, kind, input_path, item_ids):
+    """Record a prepared job and claim its articles so neither the per-item processors nor another batch pick them up."""
+    column, _ = BATCH_ITEM_CLAIMS[kind]
+
+    def write(cursor):
+        cursor.execute(
+            "INSERT INTO llm_batch_jobs (kind, status, input_path, item_count) VALUES (?, 'prepared', ?, ?)",
+            (kind, input_path, len(item_ids)),
+        )
+        job_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO llm_batch_items (job_id, item_id) VALUES (?, ?)", [(job_id, item_id) for item_id in item_ids])
+        cursor.execute(
+            f"UPDATE crawled_articles SET {column} = 'batched' WHERE id IN (SELECT item_id FROM llm_batch_items WHERE job_id = ?)",
+            (job_id,),
+        )
+        return job_id
+
+    return run_write(tracking_db_path, write)
+
+
+def update_batch_job(tracking_db_path, job_id, **fields):
+    unknown = set(fields) - set(BATCH_JOB_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown batch job columns: {sorted(unknown)}")
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    query = f"UPDATE llm_batch_jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+    return execute_query(tracking_db_path, query, (*fields.values(), job_id))
+
+
+def get_batch_job(tracking_db_path, job_id):
+    return execute_query(tracking_db_path, f"SELECT {', '.join(BATCH_JOB_COLUMNS)} FROM llm_batch_jobs WHERE id = ?", (job_id,), fetch=True, fetch_one=True)
+
+
+def get_open_batch_jobs(tracking_db_path, kind=None):
+    """Jobs not yet ingested or failed, oldest first; these are what an interrupted run resumes."""
+    query = f"SELECT {', '.join(BATCH_JOB_COLUMNS)} FROM llm_batch_jobs WHERE status IN ({', '.join('?' * len(OPEN_BATCH_STATUSES))})"
+    params = list(OPEN_BATCH_STATUSES)
+    if kind:
+        query += " AND kind = ?"
+        params.append(kind)
+    return execute_query(tracking_db_path, query + " ORDER BY id", tuple(params), fetch=True)
+
+
+def get_batch_job_items(tracking_db_path, job_id):
+    rows = execute_query(tracking_db_path, "SELECT item_id FROM llm_batch_items WHERE job_id = ?", (job_id,), fetch=True)
+    return [row["item_id"] for row in rows]
+
+
+def _release_batch_items(cursor, job_id, kind):
+    column, released_value = BATCH_ITEM_CLAIMS[kind]
+    cursor.execute(
+        f"UPDATE crawled_articles SET {column} = {released_value} "
+        f"WHERE {column} = 'batched' AND id IN (SELECT item_id FROM llm_batch_items WHERE job_id = ?)",
+        (job_id,),
+    )
+    return cursor.rowcount
+
+
+def finish_batch_job(tracking_db_path, job, write_results, succeeded, failed, status="ingested", error=None, **fields):
+    """
+    Write a job's results and close it in one transaction.
+
+    write_results(cursor) stores the results; articles of the job it did not
+    touch are released for the next run. An interrupted ingest therefore
+    leaves the job open, and it is ingested again from scratch on resume.
+    fields are further llm_batch_jobs columns to record.
+    """
+    fields.update(status=status, succeeded=succeeded, failed=failed, error=error)
+    unknown = set(fields) - set(BATCH_JOB_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown batch job columns: {sorted(unknown)}")
+
+    def write(cursor):
+        if write_results:
+            write_results(cursor)
+        released = _release_batch_items(cursor, job["id"], job["kind"])
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        cursor.execute(
+            f"UPDATE llm_batch_jobs SET {assignments}, released = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (*fields.values(), released, job["id"]),
+        )
+        return released
+
+    return run_write(tracking_db_path, write)
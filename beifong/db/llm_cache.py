@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from .config import get_llm_cache_db_path
+from .connection import execute_query
+from .write_queue import run_write
+
+LLM_CACHE = os.environ.get("LLM_CACHE", "1").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 30 * 24 * 3600))
+# Least recently used entries beyond this many are evicted.
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 100000))
+# Expired and excess entries are pruned after every this many stores in a process.
+LLM_CACHE_PRUNE_EVERY = 500
+
+LLM_CACHE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        cache_key TEXT PRIMARY KEY,
+        namespace TEXT NOT NULL,
+        model TEXT NOT NULL,
+        template_version TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_ts INTEGER NOT NULL,
+        expires_ts INTEGER NOT NULL,
+        last_used_ts INTEGER NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache(expires_ts)",
+]
+
+LLM_CACHE_LOOKUP_QUERY = "SELECT response, expires_ts FROM llm_cache WHERE cache_key = ?"
+
+LLM_CACHE_UPSERT_QUERY = """
+INSERT INTO llm_cache (cache_key, namespace, model, template_version, response, created_ts, expires_ts, last_used_ts)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (cache_key) DO UPDATE SET
+    response = excluded.response, created_ts = excluded.created_ts,
+    expires_ts = excluded.expires_ts, last_used_ts = excluded.last_used_ts
+"""
+
+_ready_paths = set()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _ensure_schema(db_path):
+    # Scripts and agents can call into the cache without the app having initialized its databases.
+    if db_path in _ready_paths:
+        return
+
+    def write(cursor):
+        for sql in LLM_CACHE_SCHEMA:
+            cursor.execute(sql)
+
+    run_write(db_path, write)
+    _ready_paths.add(db_path)
+
+
+def _record(namespace, **values):
+    with _stats_lock:
+        stats = _stats.setdefault(namespace, {"hits": 0, "misses": 0, "stores": 0, "evicted": 0})
+        for key, value in values.items():
+            stats[key] += value
+
+
+def get_llm_cache_stats():
+    """Hit, miss, store and eviction counters per namespace since the process started."""
+    with _stats_lock:
+        stats = {namespace: dict(values) for namespace, values in _stats.items()}
+    for values in stats.values():
+        lookups = values["hits"] + values["misses"]
+        values["hit_rate"] = round(values["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def _normalize_value(value):
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFKC", value).split())
+    if isinstance(value, dict):
+        return {key: _normalize_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(item) for item in value]
+    return value
+
+
+def normalize_content(content):
+    """content as canonical text: every string NFKC-normalized with whitespace runs collapsed, structures as sorted JSON."""
+    content = _normalize_value(content)
+    return content if isinstance(content, str) else json.dumps(content, sort_keys=True, ensure_ascii=False)
+
+
+def llm_cache_key(namespace, model, template_version, content):
+    """Key for a call: what it does, with which model and prompt version, on which (normalized) content."""
+    content_hash = hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{namespace}\0{model}\0{template_version}\0{content_hash}".encode("utf-8")).hexdigest()
+
+
+def get_cached_response(namespace, key, db_path=None, now=None):
+    """The cached response for key (decoded from JSON), or None when absent or expired."""
+    db_path = db_path or get_llm_cache_db_path()
+    _ensure_schema(db_path)
+    now = int(now or time.time())
+    row = execute_query(db_path, LLM_CACHE_LOOKUP_QUERY, (key,), fetch=True, fetch_one=True)
+    if row is None or row["expires_ts"] <= now:
+        _record(namespace, misses=1)
+        return None
+    _record(namespace, hits=1)
+
+    def touch(cursor):
+        cursor.execute("UPDATE llm_cache SET last_used_ts = ?, hits = hits + 1 WHERE cache_key = ?", (now, key))
+
+    run_write(db_path, touch)
+    return json.loads(row["response"])
+
+
+def store_response(namespace, key, model, template_version, response, ttl=LLM_CACHE_TTL, db_path=None, now=None):
+    """Cache a JSON-serializable response under key."""
+    db_path = db_path or get_llm_cache_db_path()
+    _ensure_schema(db_path)
+    now = int(now or time.time())
+    params = (key, namespace, model, str(template_version), json.dumps(response, ensure_ascii=False), now, now + ttl, now)
+
+    def write(cursor):
+        cursor.execute(LLM_CACHE_UPSERT_QUERY, params)
+
+    run_write(db_path, write)
+    _record(namespace, stores=1)
+    with _stats_lock:
+        stores = sum(values["stores"] for values in _stats.values())
+    if stores % LLM_CACHE_PRUNE_EVERY == 0:
+        evicted = prune_llm_cache(db_path, now=now)
+        _record(namespace, evicted=evicted)
+
+
+def prune_llm_cache(db_path=None, max_entries=LLM_CACHE_MAX_ENTRIES, now=None):
+    """Delete expired entries, then the least recently used ones beyond max_entries; returns how many were deleted."""
+    db_path = db_path or get_llm_cache_db_path()
+    _ensure_schema(db_path)
+    now = int(now or time.time())
+
+    def write(cursor):
+        cursor.execute("DELETE FROM llm_cache WHERE expires_ts <= ?", (now,))
+        deleted = cursor.rowcount
+        cursor.execute(
+            "DELETE FROM llm_cache WHERE cache_key IN "
+            "(SELECT cache_key FROM llm_cache ORDER BY last_used_ts DESC LIMIT -1 OFFSET ?)",
+            (max_entries,),
+        )
+        return deleted + cursor.rowcount
+
+    return run_write(db_path, write)
+
+
+def cached_call(namespace, model, template_version, content, call, ttl=LLM_CACHE_TTL, db_path=None):
+    """
+    call() through the cache: a stored response for the same namespace,
+    model, prompt version and normalized content is returned without
+    calling. call's result must be JSON-serializable; exceptions are not
+    cached. With LLM_CACHE off, call() runs directly.
+    """
+    if not LLM_CACHE:
+        return call()
+    key = llm_cache_key(namespace, model, template_version, content)
+    cached = get_cached_response(namespace, key, db_path)
+    if cached is not None:
+        return cached
+    response = call()
+    store_response(namespace, key, model, template_version, response, ttl, db_path)
+    return response
@@ -0,0 +1,198 @@
+import os
+import time
+import argparse
+import numpy as np
+from utils.minhash import estimated_similarity, minhash, minhash_bands
+from .config import get_tracking_db_path
+from .connection import execute_query
+from .articles import copy_analysis_to_duplicates
+from .write_queue import run_write
+
+NEAR_DUPLICATES = os.environ.get("NEAR_DUPLICATES", "1").lower() in ("1", "true", "yes")
+# Estimated Jaccard similarity of word 3-shingles at which an article counts as a copy of an earlier one.
+# Syndicated copies with their own byline and a reworded sentence score 0.85 or more; different stories filled
+# into the same wire template score 0.5-0.7 and must not be merged, as each would lose its own analysis.
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", 0.8))
+# Signatures of articles crawled longer ago than this are dropped from the index.
+NEAR_DUPLICATE_WINDOW_DAYS = int(os.environ.get("NEAR_DUPLICATE_WINDOW_DAYS", 7))
+# Statuses an article can have to become the canonical copy: analyzed, or still on its way to analysis.
+# Not 'error': duplicates of an article whose analysis failed would wait on its retries.
+CANONICAL_STATUSES = ("pending", "processing", "batched", "success")
+
+# Recent articles sharing an LSH band with a new signature, each with the canonical copy it stands for.
+SIGNATURE_CANDIDATES_QUERY = f"""
+SELECT s.article_id, s.signature, canon.id AS canonical_id
+FROM article_signature_bands b
+JOIN article_signatures s ON s.article_id = b.article_id
+JOIN crawled_articles ca ON ca.id = s.article_id
+JOIN crawled_articles canon ON canon.id = COALESCE(ca.duplicate_of, ca.id)
+WHERE b.band_hash IN ({{placeholders}}) AND s.created_ts >= ?
+      AND canon.ai_status IN ({", ".join(f"'{status}'" for status in CANONICAL_STATUSES)})
+"""
+
+UNSIGNED_TEXTS_QUERY = """
+SELECT ca.id, b.clean_text
+FROM crawled_articles ca
+JOIN article_bodies b ON b.article_id = ca.id
+WHERE ca.url IN ({placeholders})
+      AND NOT EXISTS (SELECT 1 FROM article_signatures s WHERE s.article_id = ca.id)
+"""
+
+
+def link_near_duplicates(tracking_db_path, urls, threshold=NEAR_DUPLICATE_THRESHOLD, window_days=NEAR_DUPLICATE_WINDOW_DAYS, now=None):
+    """
+    Sign the articles just crawled from urls and link each near-duplicate of
+    a recent article to that article's canonical copy.
+
+    Linked articles get duplicate_of and ai_status 'duplicate', so neither
+    analysis nor embedding picks them up; they receive the canonical's
+    summary, content and categories once it is analyzed (right away if it
+    already is). Articles are compared in id order, so the first copy of a
+    story crawled becomes canonical. Returns {article_id: canonical_id}.
+    """
+    if not NEAR_DUPLICATES or not urls:
+        return {}
+    now = int(now or time.time())
+    cutoff = now - window_days * 24 * 3600
+    rows = execute_query(tracking_db_path, UNSIGNED_TEXTS_QUERY.format(placeholders=",".join(["?"] * len(urls))), tuple(urls), fetch=True)
+    signatures = {}
+    for row in rows:
+        signature = minhash(row["clean_text"])
+        if signature is not None:
+            signatures[row["id"]] = (signature, minhash_bands(signature))
+    if not signatures:
+        return {}
+
+    def write(cursor):
+        cursor.execute(
+            "DELETE FROM article_signature_bands WHERE article_id IN (SELECT article_id FROM article_signatures WHERE created_ts < ?)",
+            (cutoff,),
+        )
+        cursor.execute("DELETE FROM article_signatures WHERE created_ts < ?", (cutoff,))
+        links = {}
+        for article_id in sorted(signatures):
+            signature, bands = signatures[article_id]
+            cursor.execute(SIGNATURE_CANDIDATES_QUERY.format(placeholders=",".join(["?"] * len(bands))), (*bands, cutoff))
+            best_similarity, canonical_id = 0.0, None
+            for candidate_id, blob, candidate_canonical in cursor.fetchall():
+                similarity = estimated_similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+                if similarity >= threshold and similarity > best_similarity:
+                    best_similarity, canonical_id = similarity, candidate_canonical
+            cursor.execute(
+                "INSERT INTO article_signatures (article_id, signature, created_ts) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+                (article_id, signature.tobytes(), now),
+            )
+            cursor.executemany(
+                "INSERT INTO article_signature_bands (band_hash, article_id) VALUES (?, ?) ON CONFLICT DO NOTHING",
+                [(band, article_id) for band in bands],
+            )
+            if canonical_id is not None:
+                cursor.execute(
+                    "UPDATE crawled_articles SET duplicate_of = ?, ai_status = 'duplicate' WHERE id = ? AND ai_status = 'pending'",
+                    (canonical_id, article_id),
+                )
+                if cursor.rowcount:
+                    links[article_id] = canonical_id
+        for canonical_id in set(links.values()):
+            copy_analysis_to_duplicates(cursor, canonical_id)
+        return links
+
+    return run_write(tracking_db_path, write)
+
+
+def find_near_duplicates(texts, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    In-memory form of link_near_duplicates for (article_id, text) pairs in
+    crawl order, without a time window: {article_id: canonical_id}.
+    """
+    buckets = {}
+    signatures = {}
+    links = {}
+    for article_id, text in texts:
+        signature = minhash(text)
+        if signature is None:
+            continue
+        bands = minhash_bands(signature)
+        candidates = {candidate for band in bands for candidate in buckets.get(band, ())}
+        best_similarity, canonical_id = 0.0, None
+        for candidate in candidates:
+            similarity = estimated_similarity(signature, signatures[candidate])
+            if similarity >= threshold and similarity > best_similarity:
+                best_similarity, canonical_id = similarity, links.get(candidate, candidate)
+        if canonical_id is not None:
+            links[article_id] = canonical_id
+        signatures[article_id] = signature
+        for band in bands:
+            buckets.setdefault(band, []).append(article_id)
+    return links
+
+
+def get_duplicate_stats(tracking_db_path=None):
+    """How many articles are linked to a canonical copy, and the share of analysis and embedding calls that saves."""
+    tracking_db_path = tracking_db_path or get_tracking_db_path()
+    row = execute_query(
+        tracking_db_path,
+        """
+        SELECT COUNT(*) AS articles,
+               SUM(CASE WHEN duplicate_of IS NOT NULL THEN 1 ELSE 0 END) AS duplicates,
+               COUNT(DISTINCT duplicate_of) AS canonicals
+        FROM crawled_articles
+        """,
+        fetch=True,
+        fetch_one=True,
+    )
+    articles, duplicates = row["articles"], row["duplicates"] or 0
+    return {
+        "articles": articles,
+        "duplicates": duplicates,
+        "canonicals_with_duplicates": row["canonicals"],
+        "api_calls_saved": round(duplicates / articles, 4) if articles else 0.0,
+    }
+
+
+def report_corpus(tracking_db_path=None, threshold=NEAR_DUPLICATE_THRESHOLD, page_size=1000):
+    """Dry run of near-duplicate detection over every stored article text; nothing is written."""
+    tracking_db_path = tracking_db_path or get_tracking_db_path()
+
+    def texts():
+        last_id = 0
+        while True:
+            rows = execute_query(
+                tracking_db_path,
+                "SELECT article_id, clean_text FROM article_bodies WHERE article_id > ? AND clean_text IS NOT NULL ORDER BY article_id LIMIT ?",
+                (last_id, page_size),
+                fetch=True,
+            )
+            if not rows:
+                return
+            for row in rows:
+                yield row["article_id"], row["clean_text"]
+            last_id = rows[-1]["article_id"]
+
+    query = "SELECT COUNT(*) AS n FROM article_bodies WHERE clean_text IS NOT NULL"
+    articles = execute_query(tracking_db_path, query, fetch=True, fetch_one=True)["n"]
+    links = find_near_duplicates(texts(), threshold)
+    return {
+        "articles": articles,
+        "duplicates": len(links),
+        "canonicals_with_duplicates": len(set(links.values())),
+        "api_calls_saved": round(len(links) / articles, 4) if articles else 0.0,
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Report near-duplicate articles and the analysis and embedding calls they save")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD, help="Estimated Jaccard similarity for a near-duplicate")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    tracking_db_path = get_tracking_db_path()
+    linked = get_duplicate_stats(tracking_db_path)
+    print(f"Linked at crawl time: {linked['duplicates']} of {linked['articles']} articles ({linked['api_calls_saved']:.1%} of API calls saved)")
+    corpus = report_corpus(tracking_db_path, args.threshold)
+    print(
+        f"Whole corpus at threshold {args.threshold}: {corpus['duplicates']} of {corpus['articles']} articles are near-duplicates "
+        f"of {corpus['canonicals_with_duplicates']} stories, saving {corpus['api_calls_saved']:.1%} of analysis and embedding calls"
+    )
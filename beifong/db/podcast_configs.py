@@ -1,11 +1,11 @@
-import sqlite3
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from .connection import acquire_connection, release_connection
+from .write_queue import run_write
 
 
 def get_podcast_config(db_path: str, config_id: int) -> Optional[Dict[str, Any]]:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = acquire_connection(db_path)
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -28,12 +28,11 @@ def get_podcast_config(db_path: str, config_id: int) -> Optional[Dict[str, Any]]
         print(f"Error fetching podcast config: {e}")
         return None
     finally:
-        conn.close()
+        release_connection(db_path, conn)
 
 
 def get_all_podcast_configs(db_path: str, active_only: bool = False) -> List[Dict[str, Any]]:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = acquire_connection(db_path)
     try:
         cursor = conn.cursor()
         if active_only:
@@ -65,7 +64,7 @@ def get_all_podcast_configs(db_path: str, active_only: bool = False) -> List[Dic
         print(f"Error fetching podcast configs: {e}")
         return []
     finally:
-        conn.close()
+        release_connection(db_path, conn)
 
 
 def create_podcast_config(
@@ -81,10 +80,9 @@ def create_podcast_config(
     podcast_script_prompt: Optional[str] = None,
     image_prompt: Optional[str] = None,
 ) -> Optional[int]:
-    conn = sqlite3.connect(db_path)
-    try:
-        cursor = conn.cursor()
-        now = datetime.now().isoformat()
+    now = datetime.now().isoformat()
+
+    def write(cursor):
         cursor.execute(
             """
             INSERT INTO podcast_configs
@@ -108,85 +106,77 @@ def create_podcast_config(
                 now,
             ),
         )
-        conn.commit()
         return cursor.lastrowid
+
+    try:
+        return run_write(db_path, write)
     except Exception as e:
-        conn.rollback()
         print(f"Error creating podcast config: {e}")
         return None
-    finally:
-        conn.close()
 
 
 def update_podcast_config(db_path: str, config_id: int, updates: Dict[str, Any]) -> bool:
-    conn = sqlite3.connect(db_path)
-    try:
-        cursor = conn.cursor()
+    set_clauses = []
+    params = []
+    set_clauses.append("updated_at = ?")
+    params.append(datetime.now().isoformat())
+    allowed_fields = [
+        "name",
+        "description",
+        "prompt",
+        "time_range_hours",
+        "limit_articles",
+        "is_active",
+        "tts_engine",
+        "language_code",
+        "podcast_script_prompt",
+        "image_prompt",
+    ]
+    for field, value in (updates or {}).items():
+        if field in allowed_fields:
+            if field == "is_active":
+                value = 1 if value else 0
+            set_clauses.append(f"{field} = ?")
+            params.append(value)
+    params.append(config_id)
+    query = f"""
+    UPDATE podcast_configs
+    SET {", ".join(set_clauses)}
+    WHERE id = ?
+    """
+
+    def write(cursor):
         cursor.execute("SELECT 1 FROM podcast_configs WHERE id = ?", (config_id,))
         if not cursor.fetchone():
             return False
         if not updates:
             return True
-        set_clauses = []
-        params = []
-        set_clauses.append("updated_at = ?")
-        params.append(datetime.now().isoformat())
-        allowed_fields = [
-            "name",
-            "description",
-            "prompt",
-            "time_range_hours",
-            "limit_articles",
-            "is_active",
-            "tts_engine",
-            "language_code",
-            "podcast_script_prompt",
-            "image_prompt",
-        ]
-        for field, value in updates.items():
-            if field in allowed_fields:
-                if field == "is_active":
-                    value = 1 if value else 0
-                set_clauses.append(f"{field} = ?")
-                params.append(value)
-        params.append(config_id)
-        query = f"""
-        UPDATE podcast_configs
-        SET {", ".join(set_clauses)}
-        WHERE id = ?
-        """
         cursor.execute(query, tuple(params))
-        conn.commit()
         return True
+
+    try:
+        return run_write(db_path, write)
     except Exception as e:
-        conn.rollback()
         print(f"Error updating podcast config: {e}")
         return False
-    finally:
-        conn.close()
 
 
 def delete_podcast_config(db_path: str, config_id: int) -> bool:
-    conn = sqlite3.connect(db_path)
-    try:
-        cursor = conn.cursor()
+    def write(cursor):
         cursor.execute("DELETE FROM podcast_configs WHERE id = ?", (config_id,))
-        conn.commit()
-
         return cursor.rowcount > 0
+
+    try:
+        return run_write(db_path, write)
     except Exception as e:
-        conn.rollback()
         print(f"Error deleting podcast config: {e}")
         return False
-    finally:
-        conn.close()
 
 
 def toggle_podcast_config(db_path: str, config_id: int, is_active: bool) -> bool:
-    conn = sqlite3.connect(db_path)
-    try:
-        cursor = conn.cursor()
-        now = datetime.now().isoformat()
+    now = datetime.now().isoformat()
+
+    def write(cursor):
         cursor.execute(
             """
             UPDATE podcast_configs
@@ -195,11 +185,10 @@ def toggle_podcast_config(db_path: str, config_id: int, is_active: bool) -> bool
             """,
             (1 if is_active else 0, now, config_id),
         )
-        conn.commit()
         return cursor.rowcount > 0
+
+    try:
+        return run_write(db_path, write)
     except Exception as e:
-        conn.rollback()
         print(f"Error toggling podcast config: {e}")
         return False
-    finally:
-        conn.close()
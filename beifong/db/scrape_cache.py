@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from .connection import execute_query
+from .compression import compress_text, decompress_text
+from .write_queue import run_write
+
+SCRAPE_CACHE_TTL = int(os.environ.get("SCRAPE_CACHE_TTL", 7 * 24 * 3600))
+# Expired entries are kept this long for revalidation before prune_scrape_cache deletes them.
+SCRAPE_CACHE_RETENTION = int(os.environ.get("SCRAPE_CACHE_RETENTION", 30 * 24 * 3600))
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+# Texts are stored once per content hash, so URL aliases (redirects, tracking parameters) share one copy.
+SCRAPE_TEXT_INSERT_QUERY = "INSERT INTO scrape_texts (content_hash, full_text) VALUES (?, ?) ON CONFLICT DO NOTHING"
+
+SCRAPE_CACHE_UPSERT_QUERY = """
+INSERT INTO scrape_cache
+(url, final_url, content_hash, title, authors, published_date, etag, last_modified, fetched_with, fetched_ts, expires_ts)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url) DO UPDATE SET
+    final_url = excluded.final_url, content_hash = excluded.content_hash, title = excluded.title,
+    authors = excluded.authors, published_date = excluded.published_date, etag = excluded.etag,
+    last_modified = excluded.last_modified, fetched_with = excluded.fetched_with,
+    fetched_ts = excluded.fetched_ts, expires_ts = excluded.expires_ts
+"""
+
+SCRAPE_CACHE_LOOKUP_QUERY = """
+SELECT sc.url, sc.final_url, sc.title, sc.authors, sc.published_date, sc.etag, sc.last_modified, sc.expires_ts, st.full_text
+FROM scrape_cache sc
+JOIN scrape_texts st ON st.content_hash = sc.content_hash
+WHERE sc.url IN ({placeholders})
+"""
+
+CRAWLED_TEXT_LOOKUP_QUERY = """
+SELECT ca.url, ca.title, ca.published_date, ab.clean_text
+FROM crawled_articles ca
+JOIN article_bodies ab ON ab.article_id = ca.id
+WHERE ca.url IN ({placeholders}) AND ab.clean_text IS NOT NULL AND ab.clean_text != ''
+"""
+
+
+def cache_key(url):
+    """url without its fragment and tracking parameters, with a lowercase scheme and host."""
+    parts = urlsplit(url.strip())
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if not key.lower().startswith(TRACKING_PARAMS)]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+def get_crawled_texts(tracking_db_path, urls):
+    """Scrape results for urls the feed crawler already stored, as {url: result}."""
+    if not urls:
+        return {}
+    rows = execute_query(tracking_db_path, CRAWLED_TEXT_LOOKUP_QUERY.format(placeholders=",".join(["?"] * len(urls))), tuple(urls), fetch=True)
+    return {
+        row["url"]: {
+            "original_url": row["url"],
+            "final_url": row["url"],
+            "title": row["title"] or "",
+            "authors": [],
+            "published_date": row["published_date"],
+            "full_text": row["clean_text"],
+            "success": True,
+        }
+        for row in rows
+    }
+
+
+def get_cached_scrapes(tracking_db_path, urls, now=None):
+    """
+    Cached results for urls as {url: entry}, keyed like the input.
+
+    Each entry has the scrape result under "result", "fresh" (within its TTL)
+    and the etag / last_modified validators for revalidating stale entries.
+    """
+    keys = {url: cache_key(url) for url in urls}
+    if not keys:
+        return {}
+    now = int(now or time.time())
+    distinct = list(set(keys.values()))
+    rows = execute_query(
+        tracking_db_path, SCRAPE_CACHE_LOOKUP_QUERY.format(placeholders=",".join(["?"] * len(distinct))), tuple(distinct), fetch=True
+    )
+    by_key = {row["url"]: row for row in rows}
+    entries = {}
+    for url, key in keys.items():
+        row = by_key.get(key)
+        if row is None:
+            continue
+        entries[url] = {
+            "result": {
+                "original_url": url,
+                "final_url": row["final_url"] or url,
+                "title": row["title"] or "",
+                "authors": json.loads(row["authors"]) if row["authors"] else [],
+                "published_date": row["published_date"],
+                "full_text": decompress_text(tracking_db_path, row["full_text"]),
+                "success": True,
+            },
+            "fresh": row["expires_ts"] > now,
+            "etag": row["etag"],
+            "last_modified": row["last_modified"],
+        }
+    return entries
+
+
+def store_scrapes(tracking_db_path, results, ttl=SCRAPE_CACHE_TTL, now=None):
+    """Cache successful scrape results; failures are not cached and are retried on the next scrape."""
+    now = int(now or time.time())
+    texts = {}
+    entries = []
+    for result in results:
+        if not result.get("success") or not result.get("full_text"):
+            continue
+        content_hash = hashlib.sha256(result["full_text"].encode("utf-8")).hexdigest()
+        texts[content_hash] = result["full_text"]
+        entries.append(
+            (
+                cache_key(result["original_url"]),
+                result.get("final_url"),
+                content_hash,
+                result.get("title"),
+                json.dumps(result.get("authors") or []),
+                result.get("published_date"),
+                result.get("etag"),
+                result.get("last_modified"),
+                result.get("fetched_with"),
+                now,
+                now + ttl,
+            )
+        )
+    if not entries:
+        return 0
+    text_params = [(content_hash, compress_text(tracking_db_path, text)) for content_hash, text in texts.items()]
+
+    def write(cursor):
+        cursor.executemany(SCRAPE_TEXT_INSERT_QUERY, text_params)
+        cursor.executemany(SCRAPE_CACHE_UPSERT_QUERY, entries)
+
+    run_write(tracking_db_path, write)
+    return len(entries)
+
+
+def refresh_scrapes(tracking_db_path, urls, ttl=SCRAPE_CACHE_TTL, now=None):
+    """Extend the TTL of entries the origin confirmed unchanged (304) and count the hits."""
+    if not urls:
+        return
+    now = int(now or time.time())
+    params = [(now + ttl, cache_key(url)) for url in urls]
+    run_write(
+        tracking_db_path,
+        lambda cursor: cursor.executemany("UPDATE scrape_cache SET expires_ts = ?, hit_count = hit_count + 1 WHERE url = ?", params),
+    )
+
+
+def record_scrape_hits(tracking_db_path, urls):
+    if not urls:
+        return
+    params = [(cache_key(url),) for url in urls]
+    run_write(tracking_db_path, lambda cursor: cursor.executemany("UPDATE scrape_cache SET hit_count = hit_count + 1 WHERE url = ?", params))
+
+
+def prune_scrape_cache(tracking_db_path, retention=SCRAPE_CACHE_RETENTION, now=None):
+    """Delete entries expired for longer than retention and texts no entry refers to; returns (entries, texts) deleted."""
+    cutoff = int(now or time.time()) - retention
+
+    def prune(cursor):
+        cursor.execute("DELETE FROM scrape_cache WHERE expires_ts < ?", (cutoff,))
+        entries = cursor.rowcount
+        cursor.execute("DELETE FROM scrape_texts WHERE content_hash NOT IN (SELECT content_hash FROM scrape_cache)")
+        return entries, cursor.rowcount
+
+    return run_write(tracking_db_path, prune)
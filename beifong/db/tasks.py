@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from .connection import execute_query, db_connection
+from .connection import execute_query
 
 
 def create_task(
@@ -126,13 +126,8 @@ def create_task_execution(tasks_db_path, task_id, status, error_message=None, ou
     VALUES (?, ?, ?, ?, ?)
     """
     params = (task_id, start_time, status, error_message, output)
-    execute_query(tasks_db_path, query, params)
     try:
-        with db_connection(tasks_db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
-            return cursor.lastrowid  # Return the ID of the inserted row
+        return execute_query(tasks_db_path, query, params)  # Return the ID of the inserted row
     except Exception as e:
         print(f"Database error in create_task_execution: {e}")
         return None  #
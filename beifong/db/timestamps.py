@@ -0,0 +1,34 @@
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def to_published_ts(value, default=None):
+    """
+    Normalize a feed/article date to unix seconds for the indexed published_ts column.
+
+    Accepts ISO 8601 (what we write ourselves) and RFC 822 (what most RSS feeds
+    send). Naive values are treated as UTC, matching SQLite's datetime().
+    """
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(text)
+            except (TypeError, ValueError, IndexError):
+                return default
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def published_ts_or_now(value):
+    return to_published_ts(value, default=int(time.time()))
@@ -0,0 +1,191 @@
+import os
+import time
+import queue
+import random
+import sqlite3
+import threading
+from .connection import db_connection
+
+DB_WRITE_QUEUE = os.environ.get("DB_WRITE_QUEUE", "0").lower() in ("1", "true", "yes")
+DB_WRITE_RETRIES = int(os.environ.get("DB_WRITE_RETRIES", 5))
+DB_WRITE_BACKOFF = float(os.environ.get("DB_WRITE_BACKOFF", 0.05))
+DB_WRITE_BATCH_SIZE = int(os.environ.get("DB_WRITE_BATCH_SIZE", 100))
+DB_WRITE_BATCH_WINDOW = float(os.environ.get("DB_WRITE_BATCH_WINDOW_MS", 0)) / 1000
+
+_stats = {}
+_stats_lock = threading.Lock()
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def _record(db_path, **values):
+    with _stats_lock:
+        stats = _stats.setdefault(
+            os.path.abspath(db_path),
+            {
+                "writes": 0,
+                "failed_writes": 0,
+                "transactions": 0,
+                "lock_retries": 0,
+                "lock_wait_total_ms": 0.0,
+                "lock_wait_max_ms": 0.0,
+            },
+        )
+        for key, value in values.items():
+            if key == "lock_wait_ms":
+                stats["lock_wait_total_ms"] += value
+                stats["lock_wait_max_ms"] = max(stats["lock_wait_max_ms"], value)
+            else:
+                stats[key] += value
+
+
+def get_write_stats():
+    with _stats_lock:
+        stats = {path: dict(values) for path, values in _stats.items()}
+    for path, values in stats.items():
+        values["lock_wait_total_ms"] = round(values["lock_wait_total_ms"], 2)
+        values["lock_wait_max_ms"] = round(values["lock_wait_max_ms"], 2)
+        writer = _writers.get(path)
+        values["queued"] = writer.pending() if writer else 0
+    return stats
+
+
+def _is_lock_error(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def _begin_immediate(conn, db_path):
+    """Take the write lock up front, retrying with backoff and recording how long we waited."""
+    started = time.perf_counter()
+    for attempt in range(DB_WRITE_RETRIES + 1):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            _record(db_path, lock_wait_ms=(time.perf_counter() - started) * 1000)
+            return
+        except sqlite3.OperationalError as e:
+            if not _is_lock_error(e) or attempt == DB_WRITE_RETRIES:
+                _record(db_path, lock_wait_ms=(time.perf_counter() - started) * 1000)
+                raise
+            _record(db_path, lock_retries=1)
+            time.sleep(DB_WRITE_BACKOFF * (2**attempt) * random.uniform(0.5, 1.5))
+
+
+def _run_direct(db_path, fn):
+    with db_connection(db_path) as conn:
+        if conn.in_transaction:
+            conn.rollback()
+        _begin_immediate(conn, db_path)
+        try:
+            result = fn(conn.cursor())
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            _record(db_path, writes=1, failed_writes=1, transactions=1)
+            raise
+    _record(db_path, writes=1, transactions=1)
+    return result
+
+
+class _WriteRequest:
+    __slots__ = ("fn", "done", "result", "error")
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _WriterThread(threading.Thread):
+    """Single writer for one database file; drains queued writes and commits them together."""
+
+    def __init__(self, db_path):
+        super().__init__(name=f"db-writer-{os.path.basename(db_path)}", daemon=True)
+        self.db_path = db_path
+        self._queue = queue.Queue()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def submit(self, fn):
+        request = _WriteRequest(fn)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + DB_WRITE_BATCH_WINDOW
+        while len(batch) < DB_WRITE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _execute_batch(self, batch):
+        failed = 0
+        with db_connection(self.db_path) as conn:
+            if conn.in_transaction:
+                conn.rollback()
+            _begin_immediate(conn, self.db_path)
+            cursor = conn.cursor()
+            try:
+                for request in batch:
+                    cursor.execute("SAVEPOINT queued_write")
+                    try:
+                        request.result = request.fn(cursor)
+                        cursor.execute("RELEASE queued_write")
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO queued_write")
+                        cursor.execute("RELEASE queued_write")
+                        request.error = e
+                        failed += 1
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        _record(self.db_path, writes=len(batch), failed_writes=failed, transactions=1)
+
+    def run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._execute_batch(batch)
+            except Exception as e:
+                _record(self.db_path, writes=len(batch), failed_writes=len(batch), transactions=1)
+                for request in batch:
+                    request.error = request.error or e
+            finally:
+                for request in batch:
+                    request.done.set()
+
+
+def _get_writer(db_path):
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or not writer.is_alive():
+            writer = _WriterThread(db_path)
+            writer.start()
+            _writers[key] = writer
+        return writer
+
+
+def run_write(db_path, fn):
+    """
+    Run fn(cursor) inside a write transaction and return its result.
+
+    fn must not commit. With DB_WRITE_QUEUE enabled, the call is handed to the
+    single writer thread for db_path and committed together with other queued
+    writes (each isolated by a savepoint); otherwise it runs on the caller's
+    thread. Both paths take the lock with BEGIN IMMEDIATE and retry with
+    backoff on "database is locked".
+    """
+    if DB_WRITE_QUEUE and not isinstance(threading.current_thread(), _WriterThread):
+        return _get_writer(db_path).submit(fn)
+    return _run_direct(db_path, fn)
@@ -8,6 +8,9 @@ import aiofiles
 from contextlib import asynccontextmanager
 from routers import article_router, podcast_router, source_router, task_router, podcast_config_router, async_podcast_agent_router, social_media_router
 from services.db_init import init_databases
+from db.connection import get_pool_stats, close_all_pools
+from db.write_queue import get_write_stats
+from db.llm_cache import get_llm_cache_stats
 from dotenv import load_dotenv
 
 
@@ -33,6 +36,7 @@ async def lifespan(app: FastAPI):
     print("Application startup complete!")
     yield
     print("Shutting down application...")
+    close_all_pools()
     print("Shutdown complete")
 
 
@@ -56,6 +60,21 @@ app.include_router(async_podcast_agent_router.router, prefix="/api/podcast-agent
 app.include_router(social_media_router.router, prefix="/api/social-media", tags=["social-media"])
 
 
+@app.get("/api/db/pool-stats")
+async def db_pool_stats():
+    return get_pool_stats()
+
+
+@app.get("/api/db/write-stats")
+async def db_write_stats():
+    return get_write_stats()
+
+
+@app.get("/api/db/llm-cache-stats")
+async def db_llm_cache_stats():
+    return get_llm_cache_stats()
+
+
 @app.get("/stream-audio/{filename}")
 async def stream_audio(filename: str, request: Request):
     audio_path = os.path.join("podcasts/audio", filename)
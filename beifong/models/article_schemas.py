@@ -21,9 +21,10 @@ class Article(ArticleBase):
 
 class PaginatedArticles(BaseModel):
     items: List[Article]
-    total: int
+    total: Optional[int] = None
     page: int
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
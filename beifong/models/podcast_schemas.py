@@ -73,9 +73,10 @@ class PodcastUpdate(BaseModel):
 
 class PaginatedPodcasts(BaseModel):
     items: List[Podcast]
-    total: int
+    total: Optional[int] = None
     page: int
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
@@ -39,12 +39,13 @@ class Post(PostBase):
 
 class PaginatedPosts(BaseModel):
     items: List[Post]
-    total: int
+    total: Optional[int] = None
     page: int
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
 
 class PostFilterParams(BaseModel):
     platform: Optional[str] = None
@@ -105,12 +105,13 @@ class TaskExecution(BaseModel):
 
 class PaginatedTaskExecutions(BaseModel):
     items: List[TaskExecution]
-    total: int
+    total: Optional[int] = None
     page: int
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
 
 
 class TaskStats(BaseModel):
@@ -1,85 +1,286 @@
+import os
 import json
 import time
-import random
+import asyncio
 import argparse
-from bs4 import BeautifulSoup
-from openai import OpenAI
+from openai import AsyncOpenAI
 from db.config import get_tracking_db_path
-from db.articles import get_unprocessed_articles, update_article_status
+from db.articles import get_unprocessed_articles, update_article_statuses
+from db.llm_cache import LLM_CACHE, llm_cache_key, get_cached_response, store_response
+from utils.crawl_url import parse_web_page
 from utils.load_api_keys import load_api_key
+from utils.llm_rate_limit import RateLimiter, create_chat_completion
+from utils.token_budget import count_tokens, fit_to_budget, split_into_chunks, strip_boilerplate
 
 WEB_PAGE_ANALYSE_MODEL = "gpt-4o"
 MODEL_INSTRUCTION = "You are a helpful assistant that analyzes articles and extracts structured information."
+ANALYSIS_MAX_OUTPUT_TOKENS = 1500
+# Bump when the analysis prompts change so cached responses to the old ones are not reused.
+ANALYSIS_PROMPT_VERSION = 1
+ANALYSIS_CONCURRENCY = int(os.environ.get("ANALYSIS_CONCURRENCY", 8))
+ANALYSIS_COMMIT_SIZE = int(os.environ.get("ANALYSIS_COMMIT_SIZE", 20))
+ANALYSIS_COMMIT_INTERVAL = float(os.environ.get("ANALYSIS_COMMIT_INTERVAL", 5))
+# Articles longer than the input budget are analyzed in up to this many chunks of that budget; 0 truncates them instead.
+ANALYSIS_MAX_CHUNKS = int(os.environ.get("ANALYSIS_MAX_CHUNKS", 8))
+# Tokens the chat format adds around each message.
+MESSAGE_OVERHEAD_TOKENS = 4
 
 
-def extract_clean_text(raw_html, max_tokens=8000):
-    soup = BeautifulSoup(raw_html, "html.parser")
-    for element in soup(["script", "style", "nav", "header", "footer", "aside"]):
-        element.decompose()
-    text = soup.get_text(separator="\n", strip=True)
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    text = "\n".join(lines)
-    approx_tokens = len(text) / 4
-    if approx_tokens > max_tokens:
-        text = text[: max_tokens * 4]
+def get_article_text(article):
+    """Article text with boilerplate and repeated lines removed, before any budgeting."""
+    text = article.get("clean_text")
+    if text is None:
+        # Crawled before clean text was stored at crawl time.
+        text = parse_web_page(article.get("raw_content") or "")["clean_text"]
+    return strip_boilerplate(text or "")
+
+
+def extract_clean_text(article, max_tokens=8000):
+    text, _, _ = fit_to_budget(get_article_text(article), max_tokens, WEB_PAGE_ANALYSE_MODEL)
     return text
 
 
-def process_article_with_ai(client, article, max_tokens=8000):
-    clean_text = extract_clean_text(article["raw_content"], max_tokens)
+def count_prompt_tokens(messages):
+    return sum(count_tokens(message["content"], WEB_PAGE_ANALYSE_MODEL) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def _article_description(article):
     metadata = article.get("metadata", {})
-    title = article["title"]
-    url = article["url"]
-    description = ""
     if metadata and isinstance(metadata, dict):
         if "description" in metadata:
-            description = metadata["description"]
+            return metadata["description"]
         elif "og" in metadata and "description" in metadata["og"]:
-            description = metadata["og"]["description"]
+            return metadata["og"]["description"]
+    return ""
+
+
+def build_analysis_messages(article, max_tokens=8000, clean_text=None):
+    if clean_text is None:
+        clean_text = extract_clean_text(article, max_tokens)
+    title = article["title"]
+    url = article["url"]
+    description = _article_description(article)
+    return [
+        {
+            "role": "system",
+            "content": MODEL_INSTRUCTION,
+        },
+        {
+            "role": "user",
+            "content": f"""
+                        Analyze this article and provide a structured output with three components:
+
+                        1. A list of 3-5 relevant categories for this article
+                        2. A concise 2-3 sentence summary of the article
+                        3. The extracted main article content, removing any navigation, ads, or irrelevant elements
+
+                        Article Title: {title}
+                        Article URL: {url}
+                        Description: {description}
+
+                        Article Text:
+                        {clean_text}
+
+                        Provide your response as a JSON object with these keys:
+                        - categories: an array of 3-5 relevant categories (as strings)
+                        - summary: a 2-3 sentence summary of the article
+                        - content: the cleaned main article content
+                        """,
+        },
+    ]
+
+
+def parse_analysis_response(content):
+    response_json = json.loads(content)
+    categories = response_json.get("categories", [])
+    if isinstance(categories, str):
+        categories = [cat.strip() for cat in categories.split(",") if cat.strip()]
+    return {
+        "categories": categories,
+        "summary": response_json.get("summary", ""),
+        "content": response_json.get("content", ""),
+    }
+
+
+def build_chunk_messages(article, chunk, index, total):
+    title = article["title"]
+    return [
+        {
+            "role": "system",
+            "content": MODEL_INSTRUCTION,
+        },
+        {
+            "role": "user",
+            "content": f"""
+                        This is part {index} of {total} of a long article. Analyze this part and provide a structured output with three components:
+
+                        1. A list of 3-5 relevant categories for this part
+                        2. A concise 2-3 sentence summary of this part
+                        3. The extracted main article content of this part, removing any navigation, ads, or irrelevant elements
+
+                        Article Title: {title}
+                        Article URL: {article["url"]}
+
+                        Article Text (part {index} of {total}):
+                        {chunk}
+
+                        Provide your response as a JSON object with these keys:
+                        - categories: an array of 3-5 relevant categories (as strings)
+                        - summary: a 2-3 sentence summary of this part
+                        - content: the cleaned main article content of this part
+                        """,
+        },
+    ]
+
+
+def build_merge_messages(article, summaries):
+    parts = "\n".join(f"Part {index}: {summary}" for index, summary in enumerate(summaries, 1))
+    return [
+        {
+            "role": "system",
+            "content": MODEL_INSTRUCTION,
+        },
+        {
+            "role": "user",
+            "content": f"""
+                        These are summaries of consecutive parts of one article. Combine them into a concise 2-3 sentence summary of the whole article.
+
+                        Article Title: {article["title"]}
+
+                        {parts}
+
+                        Provide your response as a JSON object with one key:
+                        - summary: a 2-3 sentence summary of the article
+                        """,
+        },
+    ]
+
+
+def merge_categories(category_lists, limit=5):
+    """Categories named by the most chunks first (ties in order of appearance), ignoring case."""
+    counts, names = {}, {}
+    for categories in category_lists:
+        for category in dict.fromkeys(category.strip() for category in categories if category.strip()):
+            key = category.casefold()
+            names.setdefault(key, category)
+            counts[key] = counts.get(key, 0) + 1
+    ranked = sorted(counts, key=lambda key: -counts[key])
+    return [names[key] for key in ranked[:limit]]
+
+
+def _chat_request(messages):
+    return {
+        "model": WEB_PAGE_ANALYSE_MODEL,
+        "response_format": {"type": "json_object"},
+        "messages": messages,
+        "temperature": 0.3,
+        "max_tokens": ANALYSIS_MAX_OUTPUT_TOKENS,
+    }
+
+
+def build_analysis_request(article, max_tokens=8000):
+    """chat.completions.create arguments for analyzing one article (also the body of a Batch API request)."""
+    return _chat_request(build_analysis_messages(article, max_tokens))
+
+
+async def _complete(client, limiter, messages, usage):
+    prompt_tokens = count_prompt_tokens(messages)
+    # The API counts max_tokens against the token budget up front.
+    response = await create_chat_completion(client, limiter, prompt_tokens + ANALYSIS_MAX_OUTPUT_TOKENS, **_chat_request(messages))
+    usage["prompt_tokens"] += response.usage.prompt_tokens if response.usage else prompt_tokens
+    usage["requests"] += 1
+    return response.choices[0].message.content
+
+
+async def _analyze_in_chunks(client, limiter, article, chunks, usage):
+    """Map: analyze every chunk concurrently. Reduce: merge their categories, join their content and summarize their summaries."""
+    contents = await asyncio.gather(
+        *(_complete(client, limiter, build_chunk_messages(article, chunk, index, len(chunks)), usage) for index, chunk in enumerate(chunks, 1))
+    )
+    parts = [parse_analysis_response(content) for content in contents]
+    merged = await _complete(client, limiter, build_merge_messages(article, [part["summary"] for part in parts]), usage)
+    return {
+        "categories": merge_categories(part["categories"] for part in parts),
+        "summary": json.loads(merged).get("summary", ""),
+        "content": "\n\n".join(part["content"] for part in parts if part["content"]),
+    }
+
+
+async def _run_analysis(client, limiter, article, text, max_tokens, usage):
+    if ANALYSIS_MAX_CHUNKS and count_tokens(text, WEB_PAGE_ANALYSE_MODEL) > max_tokens:
+        chunks = split_into_chunks(text, max_tokens, WEB_PAGE_ANALYSE_MODEL)
+        usage.update(chunks=min(len(chunks), ANALYSIS_MAX_CHUNKS), truncated=len(chunks) > ANALYSIS_MAX_CHUNKS)
+        return await _analyze_in_chunks(client, limiter, article, chunks[:ANALYSIS_MAX_CHUNKS], usage)
+    clean_text, _, usage["truncated"] = fit_to_budget(text, max_tokens, WEB_PAGE_ANALYSE_MODEL)
+    content = await _complete(client, limiter, build_analysis_messages(article, clean_text=clean_text), usage)
+    return parse_analysis_response(content)
+
+
+# Analyses running in this process by cache key, so concurrent copies of one text wait for a single request.
+_in_flight = {}
+
+
+async def _cached_analysis(client, limiter, article, text, max_tokens, usage):
+    """
+    Analysis results for text from the LLM cache, or from the API when not
+    cached. The key covers what the prompt sends apart from the URL (title,
+    description and cleaned text), so copies of a story syndicated under the
+    same headline share one analysis, while articles with empty or
+    boilerplate-only bodies are still told apart by their titles.
+    """
+    content = {
+        "title": article["title"],
+        "description": _article_description(article),
+        "text": text,
+        "max_tokens": max_tokens,
+        "max_chunks": ANALYSIS_MAX_CHUNKS,
+    }
+    key = llm_cache_key("analysis", WEB_PAGE_ANALYSE_MODEL, ANALYSIS_PROMPT_VERSION, content)
+    if key in _in_flight:
+        usage["cached"] = True
+        return await asyncio.shield(_in_flight[key])
+    cached = await asyncio.to_thread(get_cached_response, "analysis", key)
+    if cached is not None:
+        usage["cached"] = True
+        return cached
+    if key in _in_flight:
+        usage["cached"] = True
+        return await asyncio.shield(_in_flight[key])
+    future = _in_flight[key] = asyncio.get_running_loop().create_future()
     try:
-        response = client.chat.completions.create(
-            model=WEB_PAGE_ANALYSE_MODEL,
-            response_format={"type": "json_object"},
-            messages=[
-                {
-                    "role": "system",
-                    "content": MODEL_INSTRUCTION,
-                },
-                {
-                    "role": "user",
-                    "content": f"""
-                                Analyze this article and provide a structured output with three components:
-
-                                1. A list of 3-5 relevant categories for this article
-                                2. A concise 2-3 sentence summary of the article
-                                3. The extracted main article content, removing any navigation, ads, or irrelevant elements
-
-                                Article Title: {title}
-                                Article URL: {url}
-                                Description: {description}
-
-                                Article Text:
-                                {clean_text}
-
-                                Provide your response as a JSON object with these keys:
-                                - categories: an array of 3-5 relevant categories (as strings)
-                                - summary: a 2-3 sentence summary of the article
-                                - content: the cleaned main article content
-                                """,
-                },
-            ],
-            temperature=0.3,
-            max_tokens=1500,
-        )
-        response_json = json.loads(response.choices[0].message.content)
-        categories = response_json.get("categories", [])
-        if isinstance(categories, str):
-            categories = [cat.strip() for cat in categories.split(",") if cat.strip()]
-        results = {
-            "categories": categories,
-            "summary": response_json.get("summary", ""),
-            "content": response_json.get("content", ""),
-        }
+        results = await _run_analysis(client, limiter, article, text, max_tokens, usage)
+        await asyncio.to_thread(store_response, "analysis", key, WEB_PAGE_ANALYSE_MODEL, ANALYSIS_PROMPT_VERSION, results)
+        future.set_result(results)
+        return results
+    except Exception as e:
+        future.set_exception(e)
+        # Waiters see the exception; nobody else needs to retrieve it.
+        future.exception()
+        raise
+    finally:
+        if not future.done():
+            future.cancel()
+        del _in_flight[key]
+
+
+async def process_article_with_ai(client, limiter, article, max_tokens=8000, usage=None):
+    """
+    Analyze one article whose text is budgeted to max_tokens tokens.
+
+    Longer articles are analyzed in up to ANALYSIS_MAX_CHUNKS chunks of
+    max_tokens (map-reduce); only text beyond that, or beyond max_tokens when
+    ANALYSIS_MAX_CHUNKS is 0, is dropped. Results are reused from the LLM
+    cache for text analyzed before. usage, when given, receives
+    prompt_tokens, requests, chunks, truncated and cached for this article.
+    """
+    usage = usage if usage is not None else {}
+    usage.update(prompt_tokens=0, requests=0, chunks=1, truncated=False, cached=False)
+    text = get_article_text(article)
+    try:
+        if LLM_CACHE:
+            results = await _cached_analysis(client, limiter, article, text, max_tokens, usage)
+        else:
+            results = await _run_analysis(client, limiter, article, text, max_tokens, usage)
         return results, True, None
     except Exception as e:
         error_message = str(e)
@@ -87,35 +288,81 @@ def process_article_with_ai(client, article, max_tokens=8000):
         return None, False, error_message
 
 
-def analyze_articles(tracking_db_path=None, openai_api_key=None, batch_size=5, delay_range=(1, 3)):
+async def _analyze(tracking_db_path, client, limiter, limit, page_size, concurrency):
+    """
+    Analyze up to limit articles with `concurrency` requests in flight.
+
+    A producer pages unprocessed articles into a bounded queue as workers free
+    up; results are written with update_article_statuses every
+    ANALYSIS_COMMIT_SIZE results or ANALYSIS_COMMIT_INTERVAL seconds.
+    """
+    stats = {"total_articles": 0, "success_count": 0, "failed_count": 0, "prompt_tokens": 0, "chunked_count": 0, "truncated_count": 0, "cached_count": 0}
+    queue = asyncio.Queue(maxsize=page_size)
+    pending = []
+    last_commit = time.monotonic()
+
+    async def commit(force=False):
+        nonlocal pending, last_commit
+        due = len(pending) >= ANALYSIS_COMMIT_SIZE or time.monotonic() - last_commit >= ANALYSIS_COMMIT_INTERVAL
+        if not pending or not (force or due):
+            return
+        batch, pending = pending, []
+        last_commit = time.monotonic()
+        await asyncio.to_thread(update_article_statuses, tracking_db_path, batch)
+
+    async def produce():
+        fetched = 0
+        while fetched < limit:
+            # Articles fetched earlier in this run stay 'processing' until committed, so only the first page resets stuck ones.
+            articles = await asyncio.to_thread(get_unprocessed_articles, tracking_db_path, min(page_size, limit - fetched), 1, fetched == 0)
+            if not articles:
+                break
+            fetched += len(articles)
+            for article in articles:
+                await queue.put(article)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work():
+        while (article := await queue.get()) is not None:
+            usage = {}
+            results, success, error_message = await process_article_with_ai(client, limiter, article, usage=usage)
+            pending.append((article["id"], results, success, error_message))
+            stats["total_articles"] += 1
+            stats["prompt_tokens"] += usage["prompt_tokens"]
+            stats["chunked_count"] += usage["chunks"] > 1
+            stats["truncated_count"] += usage["truncated"]
+            stats["cached_count"] += usage["cached"]
+            if success:
+                stats["success_count"] += 1
+                print(f"[{stats['total_articles']}] Analyzed article ID {article['id']}: {', '.join(results['categories'])}")
+            else:
+                stats["failed_count"] += 1
+                print(f"[{stats['total_articles']}] Failed to process article ID {article['id']}: {error_message}")
+            await commit()
+
+    started = time.monotonic()
+    try:
+        await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    finally:
+        await commit(force=True)
+    stats["elapsed_seconds"] = round(time.monotonic() - started, 2)
+    stats["rate_limited"] = limiter.rate_limited
+    return stats
+
+
+async def _analyze_with_client(tracking_db_path, openai_api_key, limit, page_size, concurrency, base_url):
+    # Retries go through the rate limiter, so the SDK's own retry loop is disabled.
+    async with AsyncOpenAI(api_key=openai_api_key, base_url=base_url, max_retries=0) as client:
+        return await _analyze(tracking_db_path, client, RateLimiter(), limit, page_size, concurrency)
+
+
+def analyze_articles(tracking_db_path=None, openai_api_key=None, batch_size=5, concurrency=ANALYSIS_CONCURRENCY, base_url=None):
     if tracking_db_path is None:
         tracking_db_path = get_tracking_db_path()
     if openai_api_key is None:
         raise ValueError("OpenAI API key is required")
-    client = OpenAI(api_key=openai_api_key)
-    articles = get_unprocessed_articles(tracking_db_path, limit=batch_size)
-    stats = {"total_articles": len(articles), "success_count": 0, "failed_count": 0}
-    for i, article in enumerate(articles):
-        article_id = article["id"]
-        title = article["title"]
-        attempt = article.get("ai_attempts", 0) + 1
-        print(f"[{i + 1}/{len(articles)}] Processing article: {title} (Attempt {attempt})")
-        results, success, error_message = process_article_with_ai(client, article)
-        update_article_status(tracking_db_path, article_id, results, success, error_message)
-        if success:
-            categories_display = ", ".join(results["categories"])
-            print(f"Successfully processed article ID {article_id}")
-            print(f"Categories: {categories_display}")
-            print(f"Summary: {results['summary'][:100]}..." if len(results["summary"]) > 100 else f"Summary: {results['summary']}")
-            stats["success_count"] += 1
-        else:
-            print(f"Failed to process article ID {article_id}: {error_message}")
-            stats["failed_count"] += 1
-
-        if i < len(articles) - 1:
-            delay = random.uniform(delay_range[0], delay_range[1])
-            time.sleep(delay)
-    return stats
+    return asyncio.run(_analyze_with_client(tracking_db_path, openai_api_key, batch_size, batch_size, concurrency, base_url))
 
 
 def print_stats(stats):
@@ -123,6 +370,15 @@ def print_stats(stats):
     print(f"Total articles processed: {stats['total_articles']}")
     print(f"Successfully analyzed: {stats['success_count']}")
     print(f"Failed: {stats['failed_count']}")
+    if stats["total_articles"]:
+        print(f"Prompt tokens per article: {stats['prompt_tokens'] / stats['total_articles']:.0f}")
+        print(
+            f"Analyzed in chunks: {stats['chunked_count'] / stats['total_articles']:.1%}, "
+            f"truncated: {stats['truncated_count'] / stats['total_articles']:.1%}"
+        )
+        print(f"Reused from the LLM cache: {stats['cached_count']} ({stats['cached_count'] / stats['total_articles']:.1%})")
+    if stats.get("elapsed_seconds"):
+        print(f"Throughput: {stats['total_articles'] * 60 / stats['elapsed_seconds']:.1f} articles/min ({stats['rate_limited']} rate-limited responses)")
 
 
 def analyze_in_batches(
@@ -130,30 +386,20 @@ def analyze_in_batches(
     openai_api_key=None,
     batch_size=20,
     total_batches=1,
-    delay_between_batches=10,
+    concurrency=ANALYSIS_CONCURRENCY,
+    base_url=None,
 ):
+    """Analyze up to batch_size * total_batches articles in one worker pool, paging batch_size articles at a time."""
     if tracking_db_path is None:
         tracking_db_path = get_tracking_db_path()
     if openai_api_key is None:
         raise ValueError("OpenAI API key is required")
-    total_stats = {"total_articles": 0, "success_count": 0, "failed_count": 0}
-    for i in range(total_batches):
-        print(f"\nProcessing batch {i + 1}/{total_batches}")
-        batch_stats = analyze_articles(
-            tracking_db_path=tracking_db_path,
-            openai_api_key=openai_api_key,
-            batch_size=batch_size,
-        )
-        total_stats["total_articles"] += batch_stats["total_articles"]
-        total_stats["success_count"] += batch_stats["success_count"]
-        total_stats["failed_count"] += batch_stats["failed_count"]
-        if batch_stats["total_articles"] == 0:
-            print("No more articles to process")
-            break
-        if i < total_batches - 1:
-            print(f"Waiting {delay_between_batches} seconds before next batch...")
-            time.sleep(delay_between_batches)
-    return total_stats
+    stats = asyncio.run(
+        _analyze_with_client(tracking_db_path, openai_api_key, batch_size * total_batches, batch_size, concurrency, base_url)
+    )
+    if stats["total_articles"] == 0:
+        print("No more articles to process")
+    return stats
 
 
 def parse_arguments():
@@ -171,6 +417,13 @@ def parse_arguments():
         default=1,
         help="Total number of batches to process",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=ANALYSIS_CONCURRENCY,
+        help="Number of analysis requests kept in flight",
+    )
+    parser.add_argument("--base_url", help="OpenAI-compatible API base URL (defaults to OPENAI_BASE_URL or api.openai.com)")
     return parser.parse_args()
 
 
@@ -184,5 +437,7 @@ if __name__ == "__main__":
         openai_api_key=api_key,
         batch_size=args.batch_size,
         total_batches=args.total_batches,
+        concurrency=args.concurrency,
+        base_url=args.base_url,
     )
     print_stats(stats)
@@ -8,6 +8,11 @@ from db.connection import db_connection, execute_query
 from utils.load_api_keys import load_api_key
 
 EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_INSERT_QUERY = """
+INSERT INTO article_embeddings 
+(article_id, embedding, embedding_model, created_at, in_faiss_index)
+VALUES (?, ?, ?, ?, 0)
+"""
 
 def create_embedding_table(tracking_db_path):
     with db_connection(tracking_db_path) as conn:
@@ -45,10 +50,12 @@ def create_embedding_table(tracking_db_path):
 
 def get_articles_without_embeddings(tracking_db_path, limit=20):
     query = """
-    SELECT ca.id, ca.title, ca.summary, ca.content
+    SELECT ca.id, ca.title, ca.summary, b.content
     FROM crawled_articles ca
+    LEFT JOIN article_bodies b ON b.article_id = ca.id
     WHERE ca.processed = 1 
     AND ca.ai_status = 'success'
+    AND (ca.embedding_status IS NULL OR ca.embedding_status != 'batched')
     AND NOT EXISTS (
         SELECT 1 FROM article_embeddings ae 
         WHERE ae.article_id = ca.id
@@ -108,14 +115,9 @@ def store_embedding(tracking_db_path, article_id, embedding, model):
     from datetime import datetime
     import sqlite3
     embedding_blob = np.array(embedding, dtype=np.float32).tobytes()
-    query = """
-    INSERT INTO article_embeddings 
-    (article_id, embedding, embedding_model, created_at, in_faiss_index)
-    VALUES (?, ?, ?, ?, 0)
-    """
     params = (article_id, embedding_blob, model, datetime.now().isoformat())
     try:
-        execute_query(tracking_db_path, query, params)
+        execute_query(tracking_db_path, EMBEDDING_INSERT_QUERY, params)
         return True
     except sqlite3.IntegrityError:
         print(f"Warning: Embedding already exists for article {article_id}")
@@ -1,18 +1,41 @@
+import os
+import sys
 import time
-import random
-from utils.rss_feed_parser import get_feed_data
+from utils.rss_feed_parser import entry_key
+from utils.feed_fetcher import FeedFetcher, FEED_HOST_DELAY
+from utils.feed_schedule import next_poll_interval, next_due_ts
 from db.config import get_sources_db_path, get_tracking_db_path
+from db.batch import WriteBuffer
 from db.feeds import (
-    get_active_feeds,
+    FEED_ENTRY_INSERT_QUERY,
+    FEED_CHANGED,
+    FEED_NOT_MODIFIED,
+    FEED_UNCHANGED,
+    FEED_FAILED,
     count_active_feeds,
-    get_feed_tracking_info,
-    update_feed_tracking,
-    store_feed_entries,
+    get_due_feeds,
+    get_recent_entry_keys,
+    queue_feed_tracking_update,
+    queue_feed_schedule_update,
+    queue_feed_entries,
     update_tracking_info,
 )
 
+# Stored entries per feed loaded into the seen set; older ones still hit the UNIQUE constraints.
+FEED_SEEN_ENTRIES = int(os.environ.get("FEED_SEEN_ENTRIES", 200))
 
-def fetch_and_process_feeds(sources_db_path=None, tracking_db_path=None, delay_between_feeds=2, batch_size=100):
+
+def fetch_and_process_feeds(
+    sources_db_path=None, tracking_db_path=None, delay_between_feeds=FEED_HOST_DELAY, batch_size=100, force=False
+):
+    """
+    Poll the active feeds that are due and queue new entries.
+
+    Each feed's next due time comes from its poll history (see
+    utils.feed_schedule); force polls every active feed regardless. Each batch
+    of feeds is fetched concurrently by FeedFetcher; delay_between_feeds is the
+    minimum gap between two requests to the same host.
+    """
     if sources_db_path is None:
         sources_db_path = get_sources_db_path()
     if tracking_db_path is None:
@@ -20,68 +43,110 @@ def fetch_and_process_feeds(sources_db_path=None, tracking_db_path=None, delay_b
     total_feeds = count_active_feeds(sources_db_path)
     stats = {
         "total_feeds": total_feeds,
+        "due_feeds": 0,
         "processed_feeds": 0,
         "new_entries": 0,
         "unchanged_feeds": 0,
         "failed_feeds": 0,
     }
-    offset = 0
-    while offset < total_feeds:
-        feeds = get_active_feeds(sources_db_path, limit=batch_size, offset=offset)
-        if not feeds:
-            break
-        update_tracking_info(tracking_db_path, feeds)
-        for feed in feeds:
-            feed_id = feed["id"]
-            source_id = feed["source_id"]
-            feed_url = feed["feed_url"]
-            tracking_info = get_feed_tracking_info(tracking_db_path, feed_id)
-            etag = tracking_info.get("last_etag") if tracking_info else None
-            modified = tracking_info.get("last_modified") if tracking_info else None
-            last_hash = tracking_info.get("entry_hash") if tracking_info else None
+    due_before = sys.maxsize if force else int(time.time())
+    writer = WriteBuffer(tracking_db_path)
+    after_id = 0
+    with FeedFetcher(host_delay=delay_between_feeds) as fetcher:
+        while True:
+            feeds = get_due_feeds(tracking_db_path, sources_db_path, due_before, after_id=after_id, limit=batch_size)
+            if not feeds:
+                break
+            after_id = feeds[-1]["id"]
+            stats["due_feeds"] += len(feeds)
+            update_tracking_info(tracking_db_path, [feed for feed in feeds if feed["tracked_feed_id"] is None])
+            seen = load_seen_entries(tracking_db_path, [feed["id"] for feed in feeds])
+            requests = [
+                {"feed_url": feed["feed_url"], "etag": feed["last_etag"], "modified": feed["last_modified"], "seen": seen.get(feed["id"])}
+                for feed in feeds
+            ]
+            results = fetcher.fetch_many(requests)
+            now_ts = int(time.time())
+            for feed, feed_data in zip(feeds, results):
+                process_feed_result(writer, feed, feed_data, stats, now_ts)
             try:
-                feed_data = get_feed_data(feed_url, etag=etag, modified=modified)
-                if not feed_data["is_rss_feed"]:
-                    print(f"Feed {feed_url} is not a valid RSS feed")
-                    stats["failed_feeds"] += 1
-                    continue
-                if feed_data["status"] == 304:
-                    print(f"Feed {feed_url} not modified since last check")
-                    stats["unchanged_feeds"] += 1
-                    continue
-                current_hash = feed_data["current_hash"]
-                if last_hash and current_hash == last_hash:
-                    print(f"Feed {feed_url} content unchanged based on hash")
-                    stats["unchanged_feeds"] += 1
-                    continue
-                parsed_entries = feed_data["parsed_entries"]
-                if parsed_entries:
-                    new_entries = store_feed_entries(tracking_db_path, feed_id, source_id, parsed_entries)
-                    stats["new_entries"] += new_entries
-                    print(f"Stored {new_entries} new entries from {feed_url}")
-                update_feed_tracking(
-                    tracking_db_path,
-                    feed_id,
-                    feed_data["etag"],
-                    feed_data["modified"],
-                    current_hash,
-                )
-                stats["processed_feeds"] += 1
+                writer.flush()
             except Exception as e:
-                print(f"Error processing feed {feed_url}: {str(e)}")
-                stats["failed_feeds"] += 1
-            time.sleep(random.uniform(1, delay_between_feeds))
-        offset += batch_size
+                print(f"Error storing feed entries for batch after feed {after_id}: {str(e)}")
+    stats["new_entries"] = writer.changes.get(FEED_ENTRY_INSERT_QUERY, 0)
     return stats
 
 
+def load_seen_entries(tracking_db_path, feed_ids):
+    """
+    {feed_id: set of fingerprints} of each feed's recent entries: the stored
+    entry_fingerprint, or entry_key of the id and link for entries stored without one.
+    """
+    seen = {}
+    for row in get_recent_entry_keys(tracking_db_path, feed_ids, FEED_SEEN_ENTRIES):
+        keys = seen.setdefault(row["feed_id"], set())
+        if row["entry_fingerprint"] is not None:
+            keys.add(row["entry_fingerprint"])
+            continue
+        keys.add(entry_key(row["entry_id"] or ""))
+        if row["link"]:
+            keys.add(entry_key(row["link"]))
+    return seen
+
+
+def feed_outcome(feed_data):
+    if feed_data.get("error") or not feed_data.get("is_rss_feed"):
+        return FEED_FAILED
+    if feed_data["status"] == 304:
+        return FEED_NOT_MODIFIED
+    if not feed_data["parsed_entries"]:
+        return FEED_UNCHANGED
+    return FEED_CHANGED
+
+
+def process_feed_result(writer, feed, feed_data, stats, now_ts):
+    """Queue a fetched feed's new entries and its tracking and schedule updates."""
+    feed_id = feed["id"]
+    source_id = feed["source_id"]
+    feed_url = feed["feed_url"]
+    outcome = feed_outcome(feed_data)
+    new_entries = 0
+    try:
+        if outcome == FEED_FAILED:
+            if feed_data.get("error"):
+                print(f"Error processing feed {feed_url}: {feed_data['error']}")
+            else:
+                print(f"Feed {feed_url} is not a valid RSS feed")
+            stats["failed_feeds"] += 1
+        elif outcome == FEED_NOT_MODIFIED:
+            print(f"Feed {feed_url} not modified since last check")
+            stats["unchanged_feeds"] += 1
+        else:
+            parsed_entries = feed_data["parsed_entries"]
+            if parsed_entries:
+                new_entries = len(parsed_entries)
+                queue_feed_entries(writer, feed_id, source_id, parsed_entries)
+                print(f"Queued {new_entries} new or edited entries from {feed_url}")
+                stats["processed_feeds"] += 1
+            else:
+                print(f"Feed {feed_url} has no new entries")
+                stats["unchanged_feeds"] += 1
+            queue_feed_tracking_update(writer, feed_id, feed_data["etag"], feed_data["modified"])
+        interval = next_poll_interval(feed["poll_interval"], new_entries, feed_data.get("entry_count", 0))
+        queue_feed_schedule_update(writer, feed_id, outcome, new_entries, interval, next_due_ts(now_ts, interval), now_ts)
+    except Exception as e:
+        print(f"Error processing feed {feed_url}: {str(e)}")
+        stats["failed_feeds"] += 1
+
+
 def print_stats(stats):
     print("\nFeed Processing Statistics:")
     print(f"Total feeds: {stats['total_feeds']}")
+    print(f"Due feeds: {stats['due_feeds']}")
     print(f"Processed feeds: {stats['processed_feeds']}")
     print(f"Unchanged feeds: {stats['unchanged_feeds']}")
     print(f"Failed feeds: {stats['failed_feeds']}")
-    print(f"New entries: {stats['new_entries']}")
+    print(f"New or edited entries: {stats['new_entries']}")
 
 
 if __name__ == "__main__":
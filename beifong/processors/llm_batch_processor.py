@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+from openai import OpenAI
+from db.config import get_tracking_db_path
+from db.articles import get_unprocessed_articles, write_article_status
+from db.llm_batches import (
+    create_batch_job,
+    update_batch_job,
+    get_batch_job,
+    get_open_batch_jobs,
+    get_batch_job_items,
+    finish_batch_job,
+)
+from processors.ai_analysis_processor import build_analysis_request, parse_analysis_response
+from processors.embedding_processor import (
+    EMBEDDING_MODEL,
+    EMBEDDING_INSERT_QUERY,
+    create_embedding_table,
+    get_articles_without_embeddings,
+    prepare_article_text,
+)
+from utils.load_api_keys import load_api_key
+
+LLM_BATCH_DIR = os.environ.get("LLM_BATCH_DIR", "databases/llm_batches")
+LLM_BATCH_POLL_INTERVAL = float(os.environ.get("LLM_BATCH_POLL_INTERVAL", 60))
+# The Batch API accepts at most 50,000 requests per input file.
+LLM_BATCH_MAX_REQUESTS = int(os.environ.get("LLM_BATCH_MAX_REQUESTS", 50000))
+LLM_BATCH_PAGE_SIZE = 1000
+BATCH_ENDPOINTS = {"analysis": "/v1/chat/completions", "embedding": "/v1/embeddings"}
+TERMINAL_BATCH_STATUSES = ("completed", "expired", "cancelled", "failed")
+
+
+def _custom_id(kind, article_id):
+    return f"{kind}-{article_id}"
+
+
+def _article_id(custom_id):
+    return int(custom_id.rsplit("-", 1)[1])
+
+
+def _write_requests(kind, items):
+    """Write one Batch API request per (article_id, body) to a new JSONL file; returns its path and the article ids."""
+    os.makedirs(LLM_BATCH_DIR, exist_ok=True)
+    path = os.path.join(LLM_BATCH_DIR, f"{kind}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.jsonl")
+    article_ids = []
+    with open(path, "w", encoding="utf-8") as f:
+        for article_id, body in items:
+            request = {"custom_id": _custom_id(kind, article_id), "method": "POST", "url": BATCH_ENDPOINTS[kind], "body": body}
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            article_ids.append(article_id)
+    if not article_ids:
+        os.remove(path)
+    return path, article_ids
+
+
+def _analysis_requests(tracking_db_path, limit):
+    fetched = 0
+    while fetched < limit:
+        # Earlier pages stay 'processing' until the job claims them, so only the first page resets stuck articles.
+        page = get_unprocessed_articles(tracking_db_path, min(LLM_BATCH_PAGE_SIZE, limit - fetched), reset_stuck=fetched == 0)
+        if not page:
+            break
+        fetched += len(page)
+        for article in page:
+            yield article["id"], build_analysis_request(article)
+
+
+def prepare_analysis_batch(tracking_db_path, limit=LLM_BATCH_MAX_REQUESTS):
+    """Write analysis requests for up to limit unprocessed articles and record the job; returns its id, or None if there is nothing to do."""
+    path, article_ids = _write_requests("analysis", _analysis_requests(tracking_db_path, limit))
+    return create_batch_job(tracking_db_path, "analysis", path, article_ids) if article_ids else None
+
+
+def prepare_embedding_batch(tracking_db_path, limit=LLM_BATCH_MAX_REQUESTS):
+    create_embedding_table(tracking_db_path)
+    articles = get_articles_without_embeddings(tracking_db_path, limit=limit)
+    requests = ((article["id"], {"model": EMBEDDING_MODEL, "input": prepare_article_text(article)}) for article in articles)
+    path, article_ids = _write_requests("embedding", requests)
+    return create_batch_job(tracking_db_path, "embedding", path, article_ids) if article_ids else None
+
+
+PREPARE_BATCH = {"analysis": prepare_analysis_batch, "embedding": prepare_embedding_batch}
+
+
+def _find_batch(client, input_file_id):
+    """A batch already created for input_file_id (the run died before recording its id), or None."""
+    for batch in client.batches.list(limit=100):
+        if batch.input_file_id == input_file_id:
+            return batch
+    return None
+
+
+def submit_batch_job(client, tracking_db_path, job):
+    """Upload the job's request file and create its batch; each step is recorded, so resuming never submits a job twice."""
+    input_file_id = job["input_file_id"]
+    if not input_file_id:
+        with open(job["input_path"], "rb") as f:
+            input_file_id = client.files.create(file=f, purpose="batch").id
+        update_batch_job(tracking_db_path, job["id"], input_file_id=input_file_id)
+    batch = _find_batch(client, input_file_id) if job["input_file_id"] else None
+    if batch is None:
+        batch = client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=BATCH_ENDPOINTS[job["kind"]],
+            completion_window="24h",
+            metadata={"beifong_job_id": str(job["id"]), "kind": job["kind"]},
+        )
+    update_batch_job(tracking_db_path, job["id"], status="submitted", batch_id=batch.id, batch_status=batch.status)
+    return batch
+
+
+def _read_lines(client, file_id):
+    if not file_id:
+        return []
+    return [json.loads(line) for line in client.files.content(file_id).text.splitlines() if line.strip()]
+
+
+def _line_error(line):
+    """Error message of a Batch API output line, or None when it holds a successful response."""
+    if line.get("error"):
+        return line["error"].get("message") or str(line["error"])
+    response = line.get("response") or {}
+    if response.get("status_code") != 200:
+        body = response.get("body") or {}
+        return (body.get("error") or {}).get("message") or f"HTTP {response.get('status_code')}"
+    return None
+
+
+def parse_batch_output(kind, lines):
+    """Map Batch API output and error lines to (article_id, result, error_message); result is None on failure."""
+    parsed = []
+    for line in lines:
+        article_id = _article_id(line["custom_id"])
+        error = _line_error(line)
+        if error is None:
+            body = line["response"]["body"]
+            try:
+                if kind == "analysis":
+                    parsed.append((article_id, parse_analysis_response(body["choices"][0]["message"]["content"]), None))
+                else:
+                    parsed.append((article_id, (body["data"][0]["embedding"], body.get("model", EMBEDDING_MODEL)), None))
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                parsed.append((article_id, None, f"Unreadable batch response: {e}"))
+        else:
+            parsed.append((article_id, None, error))
+    return parsed
+
+
+def ingest_batch_job(client, tracking_db_path, job, batch):
+    """Store the results of a finished batch in one transaction; articles without a result are released for the next run."""
+    items = set(get_batch_job_items(tracking_db_path, job["id"]))
+    lines = _read_lines(client, batch.output_file_id) + _read_lines(client, batch.error_file_id)
+    parsed = [entry for entry in parse_batch_output(job["kind"], lines) if entry[0] in items]
+    succeeded = sum(1 for _, result, _ in parsed if result is not None)
+    failed = len(parsed) - succeeded
+    created_at = datetime.now().isoformat()
+
+    def write_results(cursor):
+        if job["kind"] == "analysis":
+            for article_id, results, error in parsed:
+                write_article_status(cursor, article_id, results, results is not None, error)
+        else:
+            rows = [
+                (article_id, np.array(embedding, dtype=np.float32).tobytes(), model, created_at)
+                for article_id, (embedding, model), _ in (entry for entry in parsed if entry[1] is not None)
+            ]
+            cursor.executemany(EMBEDDING_INSERT_QUERY, rows)
+            cursor.executemany("UPDATE crawled_articles SET embedding_status = 'embedded' WHERE id = ?", [(row[0],) for row in rows])
+
+    error = None if batch.status == "completed" else f"batch {batch.status}"
+    released = finish_batch_job(
+        tracking_db_path,
+        job,
+        write_results,
+        succeeded,
+        failed,
+        error=error,
+        batch_status=batch.status,
+        output_file_id=batch.output_file_id,
+        error_file_id=batch.error_file_id,
+    )
+    print(f"Batch job {job['id']} ({job['kind']}, {batch.status}): {succeeded} succeeded, {failed} failed, {released} released")
+    return {"succeeded": succeeded, "failed": failed, "released": released}
+
+
+def poll_batch_jobs(client, tracking_db_path, kind=None):
+    """
+    Advance every open job one step: submit prepared ones, check submitted
+    ones and ingest those that finished. Returns the number still open.
+    """
+    still_open = 0
+    for job in get_open_batch_jobs(tracking_db_path, kind):
+        try:
+            if job["status"] == "prepared":
+                submit_batch_job(client, tracking_db_path, job)
+                still_open += 1
+                continue
+            batch = client.batches.retrieve(job["batch_id"])
+            if batch.status not in TERMINAL_BATCH_STATUSES:
+                if batch.status != job["batch_status"]:
+                    update_batch_job(tracking_db_path, job["id"], batch_status=batch.status)
+                counts = batch.request_counts
+                progress = f" ({counts.completed + counts.failed}/{counts.total})" if counts else ""
+                print(f"Batch job {job['id']} ({job['kind']}): {batch.status}{progress}")
+                still_open += 1
+            elif batch.status == "failed":
+                errors = "; ".join(error.message or "" for error in (batch.errors.data or [])) if batch.errors else ""
+                finish_batch_job(tracking_db_path, job, None, 0, 0, status="failed", error=errors or "batch failed", batch_status=batch.status)
+                print(f"Batch job {job['id']} ({job['kind']}) failed: {errors}")
+            else:
+                ingest_batch_job(client, tracking_db_path, job, batch)
+        except Exception as e:
+            print(f"Error advancing batch job {job['id']}: {e}")
+            still_open += 1
+    return still_open
+
+
+def run_batch(tracking_db_path=None, openai_api_key=None, kind="analysis", limit=LLM_BATCH_MAX_REQUESTS, wait=True, poll_interval=LLM_BATCH_POLL_INTERVAL, base_url=None):
+    """
+    Resume open jobs of this kind, or prepare and submit a new one when none
+    are open, then (with wait) poll until every job is ingested.
+    """
+    if tracking_db_path is None:
+        tracking_db_path = get_tracking_db_path()
+    if openai_api_key is None:
+        raise ValueError("OpenAI API key is required")
+    client = OpenAI(api_key=openai_api_key, base_url=base_url)
+    if not get_open_batch_jobs(tracking_db_path, kind):
+        job_id = PREPARE_BATCH[kind](tracking_db_path, limit)
+        if job_id is None:
+            print(f"No articles need {kind}")
+            return 0
+        job = get_batch_job(tracking_db_path, job_id)
+        print(f"Prepared batch job {job_id} with {job['item_count']} {kind} requests")
+    while True:
+        still_open = poll_batch_jobs(client, tracking_db_path, kind)
+        if not wait or not still_open:
+            return still_open
+        time.sleep(poll_interval)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Bulk article analysis and embeddings through the OpenAI Batch API")
+    parser.add_argument("--api_key", help="OpenAI API Key (overrides environment variables)")
+    parser.add_argument("--kind", choices=sorted(BATCH_ENDPOINTS), default="analysis", help="What to compute")
+    parser.add_argument("--limit", type=int, default=LLM_BATCH_MAX_REQUESTS, help="Max articles in a new batch job")
+    parser.add_argument("--no_wait", action="store_true", help="Submit or advance jobs once and exit; rerun later to resume")
+    parser.add_argument("--poll_interval", type=float, default=LLM_BATCH_POLL_INTERVAL, help="Seconds between status checks")
+    parser.add_argument("--base_url", help="OpenAI-compatible API base URL (defaults to OPENAI_BASE_URL or api.openai.com)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    api_key = args.api_key or load_api_key()
+    if not api_key:
+        print("Error: No OpenAI API key provided. Please provide via --api_key or set OPENAI_API_KEY in .env file")
+        exit(1)
+    still_open = run_batch(
+        openai_api_key=api_key,
+        kind=args.kind,
+        limit=min(args.limit, LLM_BATCH_MAX_REQUESTS),
+        wait=not args.no_wait,
+        poll_interval=args.poll_interval,
+        base_url=args.base_url,
+    )
+    print(f"{still_open} batch jobs still open" if still_open else "All batch jobs ingested")
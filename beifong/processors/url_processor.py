@@ -1,47 +1,90 @@
 from db.config import get_tracking_db_path
+from db.batch import WriteBuffer
 from db.feeds import get_uncrawled_entries
-from db.articles import store_crawled_article, update_entry_status
-from utils.crawl_url import get_web_data
+from db.articles import CRAWLED_ARTICLE_INSERT_IGNORE_QUERY, queue_crawled_article, queue_entry_status, update_entry_status
+from db.near_duplicates import link_near_duplicates
+from utils.page_crawler import PageCrawler
 
 
-def crawl_pending_entries(tracking_db_path=None, batch_size=20, delay_range=(1, 3), max_attempts=3):
+def crawl_pending_entries(tracking_db_path=None, batch_size=20, max_attempts=3, crawler=None):
+    """
+    Crawl a batch of pending feed entry links concurrently and queue the articles.
+
+    Pass a PageCrawler to reuse its connection pool across batches; otherwise
+    one is opened for this batch.
+    """
     if tracking_db_path is None:
         tracking_db_path = get_tracking_db_path()
+    if crawler is None:
+        with PageCrawler() as crawler:
+            return crawl_pending_entries(tracking_db_path, batch_size, max_attempts, crawler)
     entries = get_uncrawled_entries(tracking_db_path, limit=batch_size, max_attempts=max_attempts)
     stats = {
         "total_entries": len(entries),
         "success_count": 0,
         "failed_count": 0,
         "skipped_count": 0,
+        "duplicate_count": 0,
     }
+    writer = WriteBuffer(tracking_db_path, max_pending=0)
+    crawled_ids = []
+    crawled_urls = []
+    to_crawl = []
     for entry in entries:
+        if not entry["link"] or entry["link"].strip() == "":
+            queue_entry_status(writer, entry["id"], "skipped")
+            stats["skipped_count"] += 1
+        else:
+            to_crawl.append(entry)
+    print(f"Crawling {len(to_crawl)} URLs")
+    results = crawler.crawl_many([entry["link"] for entry in to_crawl])
+    for entry, web_data in zip(to_crawl, results):
         entry_id = entry["id"]
         url = entry["link"]
-        if not url or url.strip() == "":
-            update_entry_status(tracking_db_path, entry_id, "skipped")
-            stats["skipped_count"] += 1
-            continue
-        print(f"Crawling URL: {url}")
         try:
-            web_data = get_web_data(url)
-            if not web_data or not web_data["raw_html"]:
-                print(f"No content retrieved for {url}")
-                update_entry_status(tracking_db_path, entry_id, "failed")
+            if web_data["skipped"]:
+                print(f"Skipping {url}: {web_data['error']}")
+                queue_entry_status(writer, entry_id, "skipped")
+                stats["skipped_count"] += 1
+                continue
+            if web_data["error"]:
+                print(f"Error crawling {url}: {web_data['error']}")
+                queue_entry_status(writer, entry_id, "failed")
                 stats["failed_count"] += 1
                 continue
-            success = store_crawled_article(tracking_db_path, entry, web_data["raw_html"], web_data["metadata"])
-            if success:
-                update_entry_status(tracking_db_path, entry_id, "success")
-                stats["success_count"] += 1
-                print(f"Successfully crawled: {url}")
-            else:
-                update_entry_status(tracking_db_path, entry_id, "failed")
+            if not web_data["raw_html"]:
+                print(f"No content retrieved for {url}")
+                queue_entry_status(writer, entry_id, "failed")
                 stats["failed_count"] += 1
-                print(f"Failed to store: {url} (likely duplicate)")
+                continue
+            queue_crawled_article(writer, entry, web_data["raw_html"], web_data["metadata"], web_data["clean_text"])
+            crawled_ids.append(entry_id)
+            crawled_urls.append(url)
+            stats["success_count"] += 1
+            print(f"Successfully crawled: {url}" + (" (truncated)" if web_data["truncated"] else ""))
         except Exception as e:
             print(f"Error crawling {url}: {str(e)}")
-            update_entry_status(tracking_db_path, entry_id, "failed")
+            queue_entry_status(writer, entry_id, "failed")
             stats["failed_count"] += 1
+    try:
+        writer.flush()
+    except Exception as e:
+        print(f"Failed to store crawled batch: {str(e)}")
+        for entry_id in crawled_ids:
+            update_entry_status(tracking_db_path, entry_id, "failed")
+        stats["success_count"] -= len(crawled_ids)
+        stats["failed_count"] += len(crawled_ids)
+        return stats
+    already_stored = len(crawled_ids) - writer.changes.get(CRAWLED_ARTICLE_INSERT_IGNORE_QUERY, 0)
+    if already_stored:
+        print(f"Failed to store {already_stored} crawled articles (likely duplicates)")
+        stats["success_count"] -= already_stored
+        stats["failed_count"] += already_stored
+    try:
+        stats["duplicate_count"] = len(link_near_duplicates(tracking_db_path, crawled_urls))
+    except Exception as e:
+        # Unlinked articles are simply analyzed on their own.
+        print(f"Near-duplicate detection failed: {str(e)}")
     return stats
 
 
@@ -50,10 +93,16 @@ def print_stats(stats):
     print(f"Total entries processed: {stats['total_entries']}")
     print(f"Successfully crawled: {stats['success_count']}")
     print(f"Failed: {stats['failed_count']}")
-    print(f"Skipped (no URL): {stats['skipped_count']}")
+    print(f"Skipped (no URL or non-HTML): {stats['skipped_count']}")
+    print(f"Near-duplicates linked to an earlier article: {stats['duplicate_count']}")
 
 
-def crawl_in_batches(tracking_db_path=None, batch_size=20, total_batches=5, delay_between_batches=10):
+def crawl_in_batches(tracking_db_path=None, batch_size=20, total_batches=5):
+    """
+    Crawl up to total_batches batches back to back over one PageCrawler. Its
+    per-host gate (CRAWL_HOST_DELAY) already spaces requests to each site, so
+    there is no pause between batches.
+    """
     if tracking_db_path is None:
         tracking_db_path = get_tracking_db_path()
     total_stats = {
@@ -61,19 +110,20 @@ def crawl_in_batches(tracking_db_path=None, batch_size=20, total_batches=5, dela
         "success_count": 0,
         "failed_count": 0,
         "skipped_count": 0,
+        "duplicate_count": 0,
     }
-    for i in range(total_batches):
-        print(f"\nProcessing batch {i + 1}/{total_batches}")
-        batch_stats = crawl_pending_entries(tracking_db_path=tracking_db_path, batch_size=batch_size)
-        total_stats["total_entries"] += batch_stats["total_entries"]
-        total_stats["success_count"] += batch_stats["success_count"]
-        total_stats["failed_count"] += batch_stats["failed_count"]
-        total_stats["skipped_count"] += batch_stats["skipped_count"]
-        if batch_stats["total_entries"] == 0:
-            print("No more entries to process")
-            break
-        if i < total_batches - 1:
-            print(f"Waiting {delay_between_batches} seconds before next batch...")
+    with PageCrawler() as crawler:
+        for i in range(total_batches):
+            print(f"\nProcessing batch {i + 1}/{total_batches}")
+            batch_stats = crawl_pending_entries(tracking_db_path=tracking_db_path, batch_size=batch_size, crawler=crawler)
+            total_stats["total_entries"] += batch_stats["total_entries"]
+            total_stats["success_count"] += batch_stats["success_count"]
+            total_stats["failed_count"] += batch_stats["failed_count"]
+            total_stats["skipped_count"] += batch_stats["skipped_count"]
+            total_stats["duplicate_count"] += batch_stats["duplicate_count"]
+            if batch_stats["total_entries"] == 0:
+                print("No more entries to process")
+                break
     return total_stats
 
 
@@ -15,6 +15,8 @@ async def read_articles(
     date_from: Optional[str] = Query(None, description="Filter by start date (format: YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Filter by end date (format: YYYY-MM-DD)"),
     search: Optional[str] = Query(None, description="Search in title and summary"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
+    count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count: exact, cached or none"),
 ):
     """
     Get all articles with pagination and filtering.
@@ -26,9 +28,19 @@ async def read_articles(
     - **date_from**: Filter by start date (format: YYYY-MM-DD)
     - **date_to**: Filter by end date (format: YYYY-MM-DD)
     - **search**: Search in title and summary
+    - **cursor**: Keyset cursor from the previous response's next_cursor
+    - **count**: exact (default), cached (may be up to a minute stale) or none
     """
     return await article_service.get_articles(
-        page=page, per_page=per_page, source=source, category=category, date_from=date_from, date_to=date_to, search=search
+        page=page,
+        per_page=per_page,
+        source=source,
+        category=category,
+        date_from=date_from,
+        date_to=date_to,
+        search=search,
+        cursor=cursor,
+        count=count,
     )
 
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from typing import Optional
 from pydantic import BaseModel
 from services.async_podcast_agent_service import podcast_agent_service
@@ -50,9 +50,14 @@ async def check_status(request: StatusRequest):
 
 
 @router.get("/sessions")
-async def list_sessions(page: int = 1, per_page: int = 10):
+async def list_sessions(
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
+    count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count: exact, cached or none"),
+):
     """List all saved podcast sessions with pagination"""
-    return await podcast_agent_service.list_sessions(page, per_page)
+    return await podcast_agent_service.list_sessions(page, per_page, cursor, count)
 
 
 @router.get("/session_history")
@@ -19,6 +19,8 @@ async def get_podcasts(
     language_code: Optional[str] = Query(None, description="Filter by language code"),
     tts_engine: Optional[str] = Query(None, description="Filter by TTS engine"),
     has_audio: Optional[bool] = Query(None, description="Filter by audio availability"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
+    count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count: exact, cached or none"),
 ):
     """
     Get a paginated list of podcasts with optional filtering.
@@ -32,6 +34,8 @@ async def get_podcasts(
         language_code=language_code,
         tts_engine=tts_engine,
         has_audio=has_audio,
+        cursor=cursor,
+        count=count,
     )
 
 
@@ -39,6 +39,8 @@ async def get_task_executions(
     task_id: Optional[int] = Query(None, description="Filter by task ID"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
+    count: str = Query("exact", pattern="^(exact|cached|none)$", description="Total count: exact, cached or none"),
 ):
     """
     Get paginated task executions.
@@ -46,8 +48,10 @@ async def get_task_executions(
     - **task_id**: Filter by task ID
     - **page**: Page number (starting from 1)
     - **per_page**: Number of items per page (max 100)
+    - **cursor**: Keyset cursor from the previous response's next_cursor
+    - **count**: exact (default), cached (may be up to a minute stale) or none
     """
-    return await task_service.get_task_executions(task_id=task_id, page=page, per_page=per_page)
+    return await task_service.get_task_executions(task_id=task_id, page=page, per_page=per_page, cursor=cursor, count=count)
 
 
 @router.get("/types", response_model=Dict[str, Dict[str, str]])
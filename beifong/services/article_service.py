@@ -1,8 +1,52 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from fastapi import HTTPException
 import json
-from services.db_service import tracking_db, sources_db
+from services.db_service import tracking_db, sources_db, articles_db
 from models.article_schemas import Article, PaginatedArticles
+from db.timestamps import to_published_ts
+from db.fulltext import match_query
+from services.pagination import decode_cursor, encode_cursor, keyset_condition, page_metadata, resolve_total_sync
+
+ARTICLE_LIST_SELECT = (
+    "SELECT ca.id, ca.title, ca.url, ca.published_date, ca.published_ts, ca.summary, "
+    "COALESCE(s.name, 'Unknown Source') AS source_name"
+)
+ARTICLE_LIST_FROM = "FROM crawled_articles ca"
+ARTICLE_SOURCE_JOIN = (
+    "LEFT JOIN sources_db.source_feeds sf ON sf.id = ca.feed_id LEFT JOIN sources_db.sources s ON s.id = sf.source_id"
+)
+ARTICLE_LIST_WHERE = "WHERE ca.processed = 1 AND ca.ai_status = 'success'"
+ARTICLE_SOURCE_FILTER = (
+    "AND ca.feed_id IN (SELECT fsf.id FROM sources_db.source_feeds fsf "
+    "JOIN sources_db.sources fs ON fs.id = fsf.source_id WHERE fs.name = ?)"
+)
+ARTICLE_SEARCH_FILTER = "AND ca.id IN (SELECT rowid FROM crawled_articles_fts WHERE crawled_articles_fts MATCH ?)"
+ARTICLE_SORT_COLUMNS = ["ca.published_ts", "ca.id"]
+ARTICLE_LIST_ORDER = "ORDER BY ca.published_ts DESC, ca.id DESC"
+
+
+def _date_filter_ts(name: str, value: str) -> int:
+    ts = to_published_ts(value)
+    if ts is None:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+    return ts
+
+
+def _categories_query(article_ids: List[int]) -> Tuple[str, Tuple[int, ...]]:
+    placeholders = ",".join("?" for _ in article_ids)
+    query = f"""
+    SELECT article_id, category_name
+    FROM article_categories
+    WHERE article_id IN ({placeholders})
+    """
+    return query, tuple(article_ids)
+
+
+def _group_categories(rows: List[Dict[str, Any]]) -> Dict[int, List[str]]:
+    categories = {}
+    for row in rows:
+        categories.setdefault(row["article_id"], []).append(row.get("category_name", ""))
+    return categories
 
 
 class ArticleService:
@@ -17,29 +61,26 @@ class ArticleService:
         date_to: Optional[str] = None,
         search: Optional[str] = None,
         category: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: str = "exact",
     ) -> PaginatedArticles:
-        """Get articles with pagination and filtering."""
+        """
+        Get articles with pagination and filtering.
+
+        Pass the previous response's next_cursor as cursor to page by (published_ts, id)
+        instead of OFFSET; page is then ignored. count selects exact, cached or no total.
+        search goes through the full-text index: words match as prefixes and
+        "quoted text" as a phrase.
+        """
         try:
             offset = (page - 1) * per_page
-            query_parts = [
-                "SELECT ca.id, ca.title, ca.url, ca.published_date, ca.summary, ca.feed_id",
-                "FROM crawled_articles ca",
-                "WHERE ca.processed = 1 AND ca.ai_status = 'success'",
-            ]
+            filters = [ARTICLE_LIST_WHERE]
             query_params = []
             if source:
-                source_id_query = "SELECT id FROM sources WHERE name = ?"
-                source_id_result = await sources_db.execute_query(source_id_query, (source,), fetch=True, fetch_one=True)
-                if source_id_result and source_id_result.get("id"):
-                    feed_ids_query = "SELECT id FROM source_feeds WHERE source_id = ?"
-                    feed_ids_result = await sources_db.execute_query(feed_ids_query, (source_id_result["id"],), fetch=True)
-                    if feed_ids_result:
-                        feed_ids = [item["id"] for item in feed_ids_result]
-                        placeholders = ",".join(["?" for _ in feed_ids])
-                        query_parts.append(f"AND ca.feed_id IN ({placeholders})")
-                        query_params.extend(feed_ids)
+                filters.append(ARTICLE_SOURCE_FILTER)
+                query_params.append(source)
             if category:
-                query_parts.append("""
+                filters.append("""
                     AND EXISTS (
                         SELECT 1 FROM article_categories ac 
                         WHERE ac.article_id = ca.id AND ac.category_name = ?
@@ -47,55 +88,45 @@ class ArticleService:
                 """)
                 query_params.append(category.lower())
             if date_from:
-                query_parts.append("AND datetime(ca.published_date) >= datetime(?)")
-                query_params.append(date_from)
+                filters.append("AND ca.published_ts >= ?")
+                query_params.append(_date_filter_ts("date_from", date_from))
             if date_to:
-                query_parts.append("AND datetime(ca.published_date) <= datetime(?)")
-                query_params.append(date_to)
-            if search:
-                query_parts.append("AND (ca.title LIKE ? OR ca.summary LIKE ?)")
-                search_param = f"%{search}%"
-                query_params.extend([search_param, search_param])
-            count_query = " ".join(query_parts).replace(
-                "SELECT ca.id, ca.title, ca.url, ca.published_date, ca.summary, ca.feed_id",
-                "SELECT COUNT(*)",
-            )
-            total_articles = await tracking_db.execute_query(count_query, tuple(query_params), fetch=True, fetch_one=True)
-            total_count = total_articles.get("COUNT(*)", 0) if total_articles else 0
-            query_parts.append("ORDER BY datetime(ca.published_date) DESC, ca.id DESC")
-            query_parts.append("LIMIT ? OFFSET ?")
-            query_params.extend([per_page, offset])
-            articles_query = " ".join(query_parts)
-            articles = await tracking_db.execute_query(articles_query, tuple(query_params), fetch=True)
-            feed_ids = [article["feed_id"] for article in articles if article.get("feed_id")]
-            source_names = {}
-            if feed_ids:
-                feed_ids_str = ",".join("?" for _ in feed_ids)
-                source_query = f"""
-                SELECT sf.id as feed_id, s.name as source_name
-                FROM source_feeds sf
-                JOIN sources s ON sf.source_id = s.id
-                WHERE sf.id IN ({feed_ids_str})
-                """
-                sources_result = await sources_db.execute_query(source_query, tuple(feed_ids), fetch=True)
-                source_names = {item["feed_id"]: item["source_name"] for item in sources_result}
-            for article in articles:
-                feed_id = article.get("feed_id")
-                article["source_name"] = source_names.get(feed_id, "Unknown Source")
-                article.pop("feed_id", None)
-                article["categories"] = await self.get_article_categories(article["id"])
-            total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 0
-            has_next = page < total_pages
-            has_prev = page > 1
-            return PaginatedArticles(
-                items=articles,
-                total=total_count,
-                page=page,
-                per_page=per_page,
-                total_pages=total_pages,
-                has_next=has_next,
-                has_prev=has_prev,
+                filters.append("AND ca.published_ts <= ?")
+                query_params.append(_date_filter_ts("date_to", date_to))
+            search_match = match_query(search) if search else None
+            if search_match:
+                filters.append(ARTICLE_SEARCH_FILTER)
+                query_params.append(search_match)
+            count_query = " ".join(["SELECT COUNT(*)", ARTICLE_LIST_FROM, *filters])
+            count_params = tuple(query_params)
+            if cursor:
+                condition, cursor_params = keyset_condition(ARTICLE_SORT_COLUMNS, decode_cursor(cursor, "articles", 2))
+                filters.append(f"AND {condition}")
+                query_params.extend(cursor_params)
+                offset = 0
+            query_params.extend([per_page + 1, offset])
+            articles_query = " ".join(
+                [ARTICLE_LIST_SELECT, ARTICLE_LIST_FROM, ARTICLE_SOURCE_JOIN, *filters, ARTICLE_LIST_ORDER, "LIMIT ? OFFSET ?"]
             )
+
+            def read(query):
+                # Count, page and categories in one executor hop: under load, each extra hop queues behind every other request.
+                def fetch_total():
+                    total_articles = query(count_query, count_params, fetch_one=True)
+                    return total_articles.get("COUNT(*)", 0) if total_articles else 0
+
+                total_count = resolve_total_sync(count, ("articles", count_query, count_params), fetch_total)
+                articles = query(articles_query, tuple(query_params))
+                pagination = page_metadata(
+                    articles, page, per_page, total_count, cursor, lambda last: encode_cursor("articles", last["published_ts"], last["id"])
+                )
+                categories = _group_categories(query(*_categories_query([article["id"] for article in articles])))
+                for article in articles:
+                    article["categories"] = categories.get(article["id"], [])
+                return articles, pagination
+
+            articles, pagination = await articles_db.read(read)
+            return PaginatedArticles(items=articles, **pagination)
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
@@ -104,30 +135,15 @@ class ArticleService:
     async def get_article(self, article_id: int) -> Article:
         """Get a specific article by ID."""
         try:
-            article_query = """
-            SELECT id, title, url, published_date, content, summary, feed_id,
-                   metadata, ai_status
-            FROM crawled_articles
-            WHERE id = ? AND processed = 1
+            article_query = f"""
+            SELECT ca.id, ca.title, ca.url, ca.published_date, b.content, ca.summary,
+                   b.metadata, ca.ai_status, COALESCE(s.name, 'Unknown Source') AS source_name
+            {ARTICLE_LIST_FROM} LEFT JOIN article_bodies b ON b.article_id = ca.id {ARTICLE_SOURCE_JOIN}
+            WHERE ca.id = ? AND ca.processed = 1
             """
-            article = await tracking_db.execute_query(article_query, (article_id,), fetch=True, fetch_one=True)
+            article = await articles_db.execute_query(article_query, (article_id,), fetch=True, fetch_one=True)
             if not article:
                 raise HTTPException(status_code=404, detail="Article not found")
-            if article.get("feed_id"):
-                source_query = """
-                SELECT s.name as source_name
-                FROM source_feeds sf
-                JOIN sources s ON sf.source_id = s.id
-                WHERE sf.id = ?
-                """
-                source_result = await sources_db.execute_query(source_query, (article["feed_id"],), fetch=True, fetch_one=True)
-                if source_result:
-                    article["source_name"] = source_result["source_name"]
-                else:
-                    article["source_name"] = "Unknown Source"
-            else:
-                article["source_name"] = "Unknown Source"
-            article.pop("feed_id", None)
             if article.get("metadata"):
                 try:
                     article["metadata"] = json.loads(article["metadata"])
@@ -1,7 +1,7 @@
 import os
 import json
 import uuid
-from fastapi import status
+from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
 import aiosqlite
 import glob
@@ -11,9 +11,24 @@ from db.agent_config_v2 import PODCAST_DIR, PODCAST_AUIDO_DIR, PODCAST_IMG_DIR,
 from services.celery_tasks import agent_chat
 from dotenv import load_dotenv
 from services.internal_session_service import SessionService
+from services.db_service import run_in_db_executor, agent_sessions_db
+from services.pagination import decode_cursor, encode_cursor, keyset_condition, page_metadata, resolve_total_sync
 
 load_dotenv()
 
+# Title and stage come from each session's state in the attached internal sessions database.
+SESSION_LIST_SELECT = """
+SELECT p.session_id, p.updated_at,
+       COALESCE(CASE WHEN json_valid(s.state) THEN json_extract(s.state, '$.title') END, 'Untitled Podcast') AS topic,
+       COALESCE(CASE WHEN json_valid(s.state) THEN json_extract(s.state, '$.stage') END, 'welcome') AS stage
+FROM podcast_sessions p
+LEFT JOIN internal_sessions_db.session_state s ON s.session_id = p.session_id
+"""
+# agno leaves updated_at NULL until a session is first updated; NULLs would never match a keyset condition.
+SESSION_SORT_KEY = "COALESCE(p.updated_at, 0)"
+SESSION_SORT_COLUMNS = [SESSION_SORT_KEY, "p.session_id"]
+SESSION_LIST_ORDER = f"ORDER BY {SESSION_SORT_KEY} DESC, p.session_id DESC"
+
 
 class PodcastAgentService:
     def __init__(self):
@@ -189,7 +204,7 @@ class PodcastAgentService:
                     "is_processing": False,
                 }
 
-            session = SessionService.get_session(session_id)
+            session = await run_in_db_executor(SessionService.get_session, session_id)
             session_state = session.get("state", {})
             return {
                 "session_id": session_id,
@@ -207,56 +222,41 @@ class PodcastAgentService:
                 "is_processing": False,
             }
 
-    async def list_sessions(self, page=1, per_page=10):
+    async def list_sessions(self, page=1, per_page=10, cursor=None, count="exact"):
+        """
+        Saved sessions, most recently updated first, with their title and stage.
+
+        Pass the previous response's next_cursor as cursor to page by (updated_at, session_id)
+        instead of OFFSET; page is then ignored. count selects exact, cached or no total.
+        """
         try:
-            db_path = get_agent_session_db_path()
-            async with aiosqlite.connect(db_path) as conn:
-                conn.row_factory = lambda cursor, row: {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
-                async with conn.execute(
-                    """
-                    select name from sqlite_master
-                    where type='table' and name='podcast_sessions'
-                    """
-                ) as cursor:
-                    table = await cursor.fetchone()
+            if not os.path.exists(agent_sessions_db.db_path):
+                return {"sessions": [], "pagination": page_metadata([], page, per_page, 0, cursor, None)}
+            offset = (page - 1) * per_page
+            where = "WHERE 1=1"
+            params = []
+            if cursor:
+                condition, params = keyset_condition(SESSION_SORT_COLUMNS, decode_cursor(cursor, "podcast_sessions", 2))
+                where = f"WHERE {condition}"
+                offset = 0
+            sessions_query = f"{SESSION_LIST_SELECT} {where} {SESSION_LIST_ORDER} LIMIT ? OFFSET ?"
+            count_query = "SELECT COUNT(*) AS count FROM podcast_sessions"
+
+            def read(query):
+                table = query("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'podcast_sessions'", fetch_one=True)
                 if not table:
-                    return {
-                        "sessions": [],
-                        "pagination": {
-                            "total": 0,
-                            "page": page,
-                            "per_page": per_page,
-                            "total_pages": 0,
-                        },
-                    }
-                async with conn.execute("SELECT COUNT(*) as count FROM podcast_sessions") as cursor:
-                    row = await cursor.fetchone()
-                    total_sessions = row["count"] if row else 0
-                offset = (page - 1) * per_page
-                async with conn.execute(
-                    "SELECT session_id, session_data, updated_at FROM podcast_sessions ORDER BY updated_at DESC LIMIT ? OFFSET ?", (per_page, offset)
-                ) as cursor:
-                    rows = await cursor.fetchall()
-                    sessions = []
-                    for row in rows:
-                        try:
-                            session = SessionService.get_session(row["session_id"])
-                            session_state = session.get("state", {})
-                            title = session_state.get("title", "Untitled Podcast")
-                            stage = session_state.get("stage", "welcome")
-                            updated_at = row["updated_at"]
-                            sessions.append({"session_id": row["session_id"], "topic": title, "stage": stage, "updated_at": updated_at})
-                        except Exception as e:
-                            print(f"Error parsing session data: {e}")
-            return {
-                "sessions": sessions,
-                "pagination": {
-                    "total": total_sessions,
-                    "page": page,
-                    "per_page": per_page,
-                    "total_pages": (total_sessions + per_page - 1) // per_page,
-                },
-            }
+                    return [], page_metadata([], page, per_page, 0, cursor, None)
+                total = resolve_total_sync(count, ("podcast_sessions", count_query, ()), lambda: query(count_query, fetch_one=True)["count"])
+                sessions = query(sessions_query, (*params, per_page + 1, offset))
+                pagination = page_metadata(
+                    sessions, page, per_page, total, cursor, lambda last: encode_cursor("podcast_sessions", last["updated_at"] or 0, last["session_id"])
+                )
+                return sessions, pagination
+
+            sessions, pagination = await agent_sessions_db.read(read)
+            return {"sessions": sessions, "pagination": pagination}
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error listing sessions: {e}")
             return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error": f"Failed to list sessions: {str(e)}"})
@@ -271,7 +271,7 @@ class PodcastAgentService:
                 if not row:
                     return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"error": f"Session with ID {session_id} not found"})
                 try:
-                    session = SessionService.get_session(session_id)
+                    session = await run_in_db_executor(SessionService.get_session, session_id)
                     session_state = session.get("state", {})
                     stage = session_state.get("stage")
                     is_completed = stage == "complete" or session_state.get("podcast_generated", False)
@@ -325,7 +325,7 @@ class PodcastAgentService:
         session_state = {}
         if row["session_data"]:
             try:
-                session = SessionService.get_session(session_id)
+                session = await run_in_db_executor(SessionService.get_session, session_id)
                 session_state = session.get("state", {})
             except Exception as e:
                 print(f"Error parsing session_data: {e}")
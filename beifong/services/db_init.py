@@ -1,24 +1,446 @@
 import os
-import sqlite3
 import asyncio
 import time
-from contextlib import contextmanager
+import sqlite3
 from concurrent.futures import ThreadPoolExecutor
 from services.db_service import get_db_path
+from db.connection import db_connection, attach_read_only
+from db.timestamps import to_published_ts
+from db.articles import UNPROCESSED_ARTICLES_QUERY
+from db.feeds import UNCRAWLED_ENTRIES_QUERY, DUE_FEEDS_QUERY, RECENT_ENTRY_KEYS_QUERY
+from db.fulltext import fts_schema
+from db.scrape_cache import SCRAPE_CACHE_LOOKUP_QUERY, CRAWLED_TEXT_LOOKUP_QUERY
+from db.llm_cache import LLM_CACHE_SCHEMA, LLM_CACHE_LOOKUP_QUERY
+from db.near_duplicates import SIGNATURE_CANDIDATES_QUERY
+from services.pagination import keyset_condition
+from services.article_service import (
+    ARTICLE_LIST_SELECT,
+    ARTICLE_LIST_FROM,
+    ARTICLE_LIST_WHERE,
+    ARTICLE_LIST_ORDER,
+    ARTICLE_SORT_COLUMNS,
+    ARTICLE_SOURCE_JOIN,
+    ARTICLE_SOURCE_FILTER,
+    ARTICLE_SEARCH_FILTER,
+)
+from services.podcast_service import PODCAST_LIST_SELECT, PODCAST_LIST_ORDER, PODCAST_SORT_COLUMNS
+from services.task_service import TASK_EXECUTIONS_SELECT, TASK_EXECUTIONS_ORDER, TASK_EXECUTION_SORT_COLUMNS
+from services.social_media_service import POST_LIST_SELECT, POST_LIST_ORDER, POST_SORT_COLUMNS, POST_SORT_KEY, POST_SEARCH_FILTER
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def _add_published_ts(cursor, table, fallback_column):
+    if not _column_exists(cursor, table, "published_ts"):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN published_ts INTEGER")
+    cursor.execute(f"SELECT id, published_date, {fallback_column} FROM {table} WHERE published_ts IS NULL")
+    updates = [(to_published_ts(row[1]) or to_published_ts(row[2], default=0), row[0]) for row in cursor.fetchall()]
+    cursor.executemany(f"UPDATE {table} SET published_ts = ? WHERE id = ?", updates)
+
+
+def _tracking_published_ts(cursor):
+    _add_published_ts(cursor, "feed_entries", "processed_date")
+    _add_published_ts(cursor, "crawled_articles", "crawled_date")
+
+
+# ALTER TABLE ... DROP COLUMN, used by tracking_db migration 8, and the chained ON CONFLICT clauses of
+# db.feeds.FEED_ENTRY_INSERT_QUERY.
+SQLITE_MIN_VERSION = (3, 35, 0)
+
+# The article index as migration 3 created it, before article bodies moved to their own table (migration 8).
+ARTICLE_FTS_V3 = {"table": "crawled_articles_fts", "content": "crawled_articles", "rowid": "id", "columns": ("title", "summary", "content")}
+ARTICLE_BODY_COLUMNS_V8 = ("raw_content", "clean_text", "content", "metadata")
+
+# Append-only, per database. Each step is a list of SQL statements or a callable taking the cursor.
+MIGRATIONS = {
+    "sources_db": [
+        (
+            1,
+            "source name index for attached article source filters",
+            ["CREATE INDEX IF NOT EXISTS idx_sources_name ON sources(name)"],
+        ),
+    ],
+    "tracking_db": [
+        (1, "normalized published_ts on feed_entries and crawled_articles", _tracking_published_ts),
+        (
+            2,
+            "queue, listing and de-duplicated indexes",
+            [
+                "CREATE INDEX IF NOT EXISTS idx_crawled_articles_ai_queue ON crawled_articles(processed, published_ts) "
+                "WHERE ai_status IN ('pending', 'error')",
+                "CREATE INDEX IF NOT EXISTS idx_crawled_articles_listing ON crawled_articles(processed, ai_status, published_ts)",
+                "CREATE INDEX IF NOT EXISTS idx_feed_entries_crawl_queue ON feed_entries(published_ts) "
+                "WHERE crawl_status IN ('pending', 'failed')",
+                "CREATE INDEX IF NOT EXISTS idx_feed_entries_crawl_processing ON feed_entries(crawl_status) "
+                "WHERE crawl_status = 'processing'",
+                "DROP INDEX IF EXISTS idx_feed_entries_crawl_status",
+                "DROP INDEX IF EXISTS idx_crawled_articles_processed",
+                "DROP INDEX IF EXISTS idx_crawled_articles_url",
+                "DROP INDEX IF EXISTS idx_feed_entries_link",
+            ],
+        ),
+        (
+            3,
+            "full-text index over article title, summary and content",
+            fts_schema("tracking_db", ARTICLE_FTS_V3)
+            + ["CREATE INDEX IF NOT EXISTS idx_article_categories_category ON article_categories(category_name, article_id)"],
+        ),
+        (
+            4,
+            "per-feed poll history and adaptive schedule",
+            [
+                f"ALTER TABLE feed_tracking ADD COLUMN {column}"
+                for column in (
+                    "poll_interval INTEGER",
+                    "next_due_ts INTEGER",
+                    "last_checked_ts INTEGER",
+                    "last_new_entry_ts INTEGER",
+                    "check_count INTEGER NOT NULL DEFAULT 0",
+                    "not_modified_count INTEGER NOT NULL DEFAULT 0",
+                    "unchanged_count INTEGER NOT NULL DEFAULT 0",
+                    "error_count INTEGER NOT NULL DEFAULT 0",
+                    "new_entry_count INTEGER NOT NULL DEFAULT 0",
+                    "idle_streak INTEGER NOT NULL DEFAULT 0",
+                )
+            ],
+        ),
+        (
+            5,
+            "per-feed recent entries index for seen-entry windows",
+            [
+                "CREATE INDEX IF NOT EXISTS idx_feed_entries_feed_published ON feed_entries(feed_id, published_ts)",
+                "DROP INDEX IF EXISTS idx_feed_entries_feed_id",
+            ],
+        ),
+        (6, "clean article text extracted at crawl time", ["ALTER TABLE crawled_articles ADD COLUMN clean_text TEXT"]),
+        (
+            7,
+            "zstd dictionaries for compressed raw_content",
+            [
+                """
+                CREATE TABLE IF NOT EXISTS content_dictionaries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dict_id INTEGER NOT NULL UNIQUE,
+                    data BLOB NOT NULL,
+                    sample_count INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            ],
+        ),
+        (
+            8,
+            "article bodies moved out of crawled_articles into article_bodies",
+            [
+                """
+                CREATE TABLE IF NOT EXISTS article_bodies (
+                    article_id INTEGER PRIMARY KEY,
+                    raw_content BLOB,
+                    clean_text TEXT,
+                    content TEXT,
+                    metadata TEXT
+                )
+                """,
+                f"INSERT OR IGNORE INTO article_bodies (article_id, {', '.join(ARTICLE_BODY_COLUMNS_V8)}) "
+                f"SELECT id, {', '.join(ARTICLE_BODY_COLUMNS_V8)} FROM crawled_articles",
+                "DROP TRIGGER IF EXISTS crawled_articles_fts_ai",
+                "DROP TRIGGER IF EXISTS crawled_articles_fts_ad",
+                "DROP TRIGGER IF EXISTS crawled_articles_fts_au",
+                "DROP TABLE IF EXISTS crawled_articles_fts",
+            ]
+            + [f"ALTER TABLE crawled_articles DROP COLUMN {column}" for column in ARTICLE_BODY_COLUMNS_V8]
+            + fts_schema("tracking_db"),
+        ),
+        (
+            9,
+            "scrape cache for the search and pipeline scrapers",
+            [
+                """
+                CREATE TABLE IF NOT EXISTS scrape_texts (
+                    content_hash TEXT PRIMARY KEY,
+                    full_text BLOB NOT NULL
+                )
+                """,
+                """
+                CREATE TABLE IF NOT EXISTS scrape_cache (
+                    url TEXT PRIMARY KEY,
+                    final_url TEXT,
+                    content_hash TEXT NOT NULL,
+                    title TEXT,
+                    authors TEXT,
+                    published_date TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_with TEXT,
+                    fetched_ts INTEGER NOT NULL,
+                    expires_ts INTEGER NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_scrape_cache_content_hash ON scrape_cache(content_hash)",
+                "CREATE INDEX IF NOT EXISTS idx_scrape_cache_expires ON scrape_cache(expires_ts)",
+            ],
+        ),
+        (
+            10,
+            "Batch API job ledger",
+            [
+                """
+                CREATE TABLE IF NOT EXISTS llm_batch_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'prepared',
+                    input_path TEXT NOT NULL,
+                    input_file_id TEXT,
+                    batch_id TEXT UNIQUE,
+                    batch_status TEXT,
+                    output_file_id TEXT,
+                    error_file_id TEXT,
+                    item_count INTEGER NOT NULL,
+                    succeeded INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    released INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """,
+                """
+                CREATE TABLE IF NOT EXISTS llm_batch_items (
+                    job_id INTEGER NOT NULL,
+                    item_id INTEGER NOT NULL,
+                    PRIMARY KEY (job_id, item_id)
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_llm_batch_jobs_status ON llm_batch_jobs(status, kind)",
+            ],
+        ),
+        (
+            11,
+            "near-duplicate links and MinHash signatures of recent articles",
+            [
+                "ALTER TABLE crawled_articles ADD COLUMN duplicate_of INTEGER",
+                "CREATE INDEX IF NOT EXISTS idx_crawled_articles_duplicate_of ON crawled_articles(duplicate_of) WHERE duplicate_of IS NOT NULL",
+                """
+                CREATE TABLE IF NOT EXISTS article_signatures (
+                    article_id INTEGER PRIMARY KEY,
+                    signature BLOB NOT NULL,
+                    created_ts INTEGER NOT NULL
+                )
+                """,
+                """
+                CREATE TABLE IF NOT EXISTS article_signature_bands (
+                    band_hash INTEGER NOT NULL,
+                    article_id INTEGER NOT NULL,
+                    PRIMARY KEY (band_hash, article_id)
+                ) WITHOUT ROWID
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_article_signatures_created ON article_signatures(created_ts)",
+                "CREATE INDEX IF NOT EXISTS idx_article_signature_bands_article ON article_signature_bands(article_id)",
+            ],
+        ),
+        (
+            12,
+            "drop the category index covered by idx_article_categories_category",
+            ["DROP INDEX IF EXISTS idx_article_categories_category_name"],
+        ),
+        (
+            13,
+            "feed entry fingerprints over id, link, title, summary and updated date",
+            ["ALTER TABLE feed_entries ADD COLUMN entry_fingerprint INTEGER"],
+        ),
+    ],
+    "tasks_db": [
+        (
+            1,
+            "per-task execution history index for keyset pagination",
+            ["CREATE INDEX IF NOT EXISTS idx_task_executions_task_start ON task_executions(task_id, start_time)"],
+        ),
+    ],
+    "internal_sessions_db": [
+        (
+            1,
+            "session listing index for keyset pagination",
+            ["CREATE INDEX IF NOT EXISTS idx_session_state_created_at ON session_state(created_at, session_id)"],
+        ),
+        (
+            2,
+            "drop the session listing index: the podcast agent lists sessions from podcast_sessions",
+            ["DROP INDEX IF EXISTS idx_session_state_created_at"],
+        ),
+    ],
+    "social_media_db": [
+        (
+            1,
+            "expression index for datetime(post_timestamp) filters and sorts",
+            ["CREATE INDEX IF NOT EXISTS idx_posts_post_datetime ON posts(datetime(post_timestamp), post_id)"],
+        ),
+        (2, "full-text index over post text and author", fts_schema("social_media_db")),
+        (
+            3,
+            "NULL-safe sort key index for post keyset pagination",
+            ["CREATE INDEX IF NOT EXISTS idx_posts_sort_key ON posts(COALESCE(datetime(post_timestamp), ''), post_id)"],
+        ),
+    ],
+    "podcasts_db": [
+        (
+            1,
+            "NULL-safe sort key index for podcast keyset pagination",
+            ["CREATE INDEX IF NOT EXISTS idx_podcasts_sort_key ON podcasts(COALESCE(date, ''), id)"],
+        ),
+    ],
+}
+
+
+def _cursor_page(select, where, columns, order, values, params=()):
+    """A listing's next page after the cursor values, built the way its service builds it."""
+    condition, cursor_params = keyset_condition(columns, values)
+    return f"{select} {where}{condition} {order} LIMIT ? OFFSET ?", (*params, *cursor_params, 11, 0)
+
+
+# Queries that run on every page load or processor tick; check_query_plans fails if any needs a full scan.
+HOT_QUERIES = {
+    "tracking_db": {
+        "get_unprocessed_articles": (UNPROCESSED_ARTICLES_QUERY, (1, 5)),
+        "get_uncrawled_entries": (UNCRAWLED_ENTRIES_QUERY, (3, 20)),
+        "get_due_feeds": (DUE_FEEDS_QUERY, (0, 1700000000, 100)),
+        "get_recent_entry_keys": (RECENT_ENTRY_KEYS_QUERY, ("[1, 2]", 200)),
+        "ArticleService.get_articles": (
+            f"{ARTICLE_LIST_SELECT} {ARTICLE_LIST_FROM} {ARTICLE_SOURCE_JOIN} {ARTICLE_LIST_WHERE} {ARTICLE_LIST_ORDER} LIMIT ? OFFSET ?",
+            (20, 0),
+        ),
+        "ArticleService.get_articles (count)": (f"SELECT COUNT(*) {ARTICLE_LIST_FROM} {ARTICLE_LIST_WHERE}", ()),
+        "ArticleService.get_articles (cursor)": _cursor_page(
+            f"{ARTICLE_LIST_SELECT} {ARTICLE_LIST_FROM} {ARTICLE_SOURCE_JOIN}",
+            f"{ARTICLE_LIST_WHERE} AND ",
+            ARTICLE_SORT_COLUMNS,
+            ARTICLE_LIST_ORDER,
+            [1700000000, 1000],
+        ),
+        "ArticleService.get_articles (source)": (
+            f"{ARTICLE_LIST_SELECT} {ARTICLE_LIST_FROM} {ARTICLE_SOURCE_JOIN} {ARTICLE_LIST_WHERE} {ARTICLE_SOURCE_FILTER} "
+            f"{ARTICLE_LIST_ORDER} LIMIT ? OFFSET ?",
+            ("Source", 20, 0),
+        ),
+        "ArticleService.get_articles (search)": (
+            f"{ARTICLE_LIST_SELECT} {ARTICLE_LIST_FROM} {ARTICLE_SOURCE_JOIN} {ARTICLE_LIST_WHERE} {ARTICLE_SEARCH_FILTER} "
+            f"{ARTICLE_LIST_ORDER} LIMIT ? OFFSET ?",
+            ('"ai"*', 20, 0),
+        ),
+        "get_cached_scrapes": (SCRAPE_CACHE_LOOKUP_QUERY.format(placeholders="?, ?"), ("https://a.example/", "https://b.example/")),
+        "get_crawled_texts": (CRAWLED_TEXT_LOOKUP_QUERY.format(placeholders="?, ?"), ("https://a.example/", "https://b.example/")),
+        "link_near_duplicates (candidates)": (SIGNATURE_CANDIDATES_QUERY.format(placeholders="?, ?"), (1, 2, 1700000000)),
+        "link_near_duplicates (duplicates)": (
+            "SELECT id FROM crawled_articles WHERE duplicate_of = ? AND ai_status = 'duplicate' AND processed = 0",
+            (1,),
+        ),
+        "link_near_duplicates (expired)": ("SELECT article_id FROM article_signatures WHERE created_ts < ?", (1700000000,)),
+        "search_articles (categories)": (
+            "SELECT article_id FROM article_categories WHERE category_name IN (?, ?)",
+            ("ai", "science"),
+        ),
+    },
+    "podcasts_db": {
+        "PodcastService.get_podcasts": (f"{PODCAST_LIST_SELECT} {PODCAST_LIST_ORDER} LIMIT ? OFFSET ?", (11, 0)),
+        "PodcastService.get_podcasts (cursor)": _cursor_page(PODCAST_LIST_SELECT, "WHERE ", PODCAST_SORT_COLUMNS, PODCAST_LIST_ORDER, ["2024-01-01", 100]),
+    },
+    "tasks_db": {
+        "TaskService.get_task_executions (cursor)": _cursor_page(
+            TASK_EXECUTIONS_SELECT, "WHERE ", TASK_EXECUTION_SORT_COLUMNS, TASK_EXECUTIONS_ORDER, ["2024-01-01T00:00:00", 100]
+        ),
+        "TaskService.get_task_executions (task, cursor)": _cursor_page(
+            TASK_EXECUTIONS_SELECT, "WHERE task_id = ? AND ", TASK_EXECUTION_SORT_COLUMNS, TASK_EXECUTIONS_ORDER, ["2024-01-01T00:00:00", 100], (1,)
+        ),
+    },
+    "social_media_db": {
+        "SocialMediaService.get_posts": (
+            f"{POST_LIST_SELECT} WHERE 1=1 AND {POST_SORT_KEY} >= datetime(?) {POST_LIST_ORDER} LIMIT ? OFFSET ?",
+            ("2024-01-01", 20, 0),
+        ),
+        "SocialMediaService.get_posts (cursor)": _cursor_page(
+            POST_LIST_SELECT, "WHERE 1=1 AND ", POST_SORT_COLUMNS, POST_LIST_ORDER, ["2024-01-01 00:00:00", "x"]
+        ),
+        # Matches are sorted after the lookup, so only the filter is checked here.
+        "SocialMediaService.get_posts (search)": (f"SELECT post_id FROM posts WHERE 1=1 {POST_SEARCH_FILTER}", ('"ai"*',)),
+    },
+    "llm_cache_db": {
+        "get_cached_response": (LLM_CACHE_LOOKUP_QUERY, ("key",)),
+        "prune_llm_cache (expired)": ("SELECT cache_key FROM llm_cache WHERE expires_ts <= ?", (1700000000,)),
+        "prune_llm_cache (lru)": ("SELECT cache_key FROM llm_cache ORDER BY last_used_ts DESC LIMIT -1 OFFSET ?", (100000,)),
+    },
+}
 
 
-@contextmanager
-def db_connection(db_path):
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA synchronous=NORMAL")
-    conn.execute("PRAGMA cache_size=10000")
-    conn.execute("PRAGMA temp_store=MEMORY")
+# Databases attached read-only (under their own name) when checking a database's hot queries.
+HOT_QUERY_ATTACHMENTS = {
+    "tracking_db": ("sources_db",),
+}
+
+
+def require_sqlite_version():
+    """Fail before any migration runs when the sqlite3 library is too old for the schema and queries."""
+    if sqlite3.sqlite_version_info < SQLITE_MIN_VERSION:
+        required = ".".join(map(str, SQLITE_MIN_VERSION))
+        raise RuntimeError(f"SQLite {required} or newer is required, but Python's sqlite3 module uses SQLite {sqlite3.sqlite_version}")
+
+
+def apply_migrations(cursor, db_name):
+    """Apply pending MIGRATIONS for db_name inside the caller's transaction."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    current = cursor.fetchone()[0]
+    applied = []
+    for version, name, step in MIGRATIONS.get(db_name, []):
+        if version <= current:
+            continue
+        if callable(step):
+            step(cursor)
+        else:
+            for sql in step:
+                cursor.execute(sql)
+        cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+        applied.append(version)
+    if applied:
+        print(f"{db_name}: applied migrations {applied}")
+    return applied
+
+
+def find_full_scans(db_name):
+    """Return (query name, plan detail) for every hot query that scans a table or sorts without an index."""
+    problems = []
+    # Fresh connection: pooled ones keep prepared EXPLAIN statements that do not notice schema changes.
+    conn = sqlite3.connect(get_db_path(db_name), uri=True)
     try:
-        yield conn
+        for attached in HOT_QUERY_ATTACHMENTS.get(db_name, ()):
+            attach_read_only(conn, attached, get_db_path(attached))
+        for name, (query, params) in HOT_QUERIES.get(db_name, {}).items():
+            for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall():
+                detail = row[3]
+                # Virtual tables report "INDEX <idxNum>:<idxStr>"; "INDEX 0:" means no constraint was usable.
+                indexed = " USING " in detail or (" VIRTUAL TABLE INDEX " in detail and not detail.endswith(" INDEX 0:"))
+                if (detail.startswith("SCAN ") and not indexed) or "TEMP B-TREE FOR ORDER BY" in detail:
+                    problems.append((name, detail))
     finally:
         conn.close()
+    return problems
+
+
+def check_query_plans(db_names=None):
+    problems = []
+    for db_name in db_names or HOT_QUERIES:
+        problems.extend((db_name, name, detail) for name, detail in find_full_scans(db_name))
+    if problems:
+        lines = "\n".join(f"  {db_name} {name}: {detail}" for db_name, name, detail in problems)
+        raise RuntimeError(f"Hot queries without a usable index:\n{lines}")
 
 
 def init_sources_db():
@@ -70,6 +492,7 @@ def init_sources_db():
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_source_feeds_is_active ON source_feeds(is_active)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_source_categories_source_id ON source_categories(source_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_source_categories_category_id ON source_categories(category_id)")
+        apply_migrations(cursor, "sources_db")
         conn.commit()
 
     elapsed = time.time() - start_time
@@ -77,6 +500,7 @@ def init_sources_db():
 
 
 def init_tracking_db():
+    require_sqlite_version()
     start_time = time.time()
     db_path = get_db_path("tracking_db")
     with db_connection(db_path) as conn:
@@ -110,6 +534,8 @@ def init_tracking_db():
             UNIQUE(feed_id, entry_id)
         )
         """)
+        # The original schema: new databases run every migration as well, so migration 8 moves these
+        # body columns to article_bodies on a fresh database exactly as it does on an old one.
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS crawled_articles (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -152,21 +578,16 @@ def init_tracking_db():
         )
         """)
         indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_feed_entries_feed_id ON feed_entries(feed_id)",
-            "CREATE INDEX IF NOT EXISTS idx_feed_entries_link ON feed_entries(link)",
-            "CREATE INDEX IF NOT EXISTS idx_crawled_articles_url ON crawled_articles(url)",
             "CREATE INDEX IF NOT EXISTS idx_crawled_articles_entry_id ON crawled_articles(entry_id)",
-            "CREATE INDEX IF NOT EXISTS idx_feed_entries_crawl_status ON feed_entries(crawl_status)",
-            "CREATE INDEX IF NOT EXISTS idx_crawled_articles_processed ON crawled_articles(processed)",
             "CREATE INDEX IF NOT EXISTS idx_crawled_articles_ai_status ON crawled_articles(ai_status)",
             "CREATE INDEX IF NOT EXISTS idx_article_categories_article_id ON article_categories(article_id)",
-            "CREATE INDEX IF NOT EXISTS idx_article_categories_category_name ON article_categories(category_name)",
             "CREATE INDEX IF NOT EXISTS idx_article_embeddings_article_id ON article_embeddings(article_id)",
             "CREATE INDEX IF NOT EXISTS idx_article_embeddings_in_faiss ON article_embeddings(in_faiss_index)",
             "CREATE INDEX IF NOT EXISTS idx_crawled_articles_embedding_status ON crawled_articles(embedding_status)",
         ]
         for index_sql in indexes:
             cursor.execute(index_sql)
+        apply_migrations(cursor, "tracking_db")
         conn.commit()
     elapsed = time.time() - start_time
     print(f"Tracking database initialized in {elapsed:.3f}s")
@@ -202,6 +623,7 @@ def init_podcasts_db():
         ]
         for index_sql in indexes:
             cursor.execute(index_sql)
+        apply_migrations(cursor, "podcasts_db")
         conn.commit()
     elapsed = time.time() - start_time
     print(f"Podcasts database initialized in {elapsed:.3f}s")
@@ -268,6 +690,7 @@ def init_tasks_db():
         ]
         for index_sql in indexes:
             cursor.execute(index_sql)
+        apply_migrations(cursor, "tasks_db")
         conn.commit()
     elapsed = time.time() - start_time
     print(f"Tasks database initialized in {elapsed:.3f}s")
@@ -292,6 +715,7 @@ def init_internal_sessions_db():
         )
         """)
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_state_session_id ON session_state(session_id)")
+        apply_migrations(cursor, "internal_sessions_db")
         conn.commit()
     elapsed = time.time() - start_time
     print(f"Internal sessions database initialized in {elapsed:.3f}s")
@@ -339,11 +763,26 @@ def init_social_media_db():
         ]
         for index_sql in indexes:
             cursor.execute(index_sql)
+        apply_migrations(cursor, "social_media_db")
         conn.commit()
     elapsed = time.time() - start_time
     print(f"Social media database initialized in {elapsed:.3f}s")
 
 
+def init_llm_cache_db():
+    start_time = time.time()
+    db_path = get_db_path("llm_cache_db")
+    with db_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN TRANSACTION")
+        for sql in LLM_CACHE_SCHEMA:
+            cursor.execute(sql)
+        apply_migrations(cursor, "llm_cache_db")
+        conn.commit()
+    elapsed = time.time() - start_time
+    print(f"LLM cache database initialized in {elapsed:.3f}s")
+
+
 async def init_databases():
     total_start = time.time()
     print("Initializing all databases...")
@@ -359,6 +798,7 @@ async def init_databases():
             loop.run_in_executor(executor, init_tasks_db),
             loop.run_in_executor(executor, init_internal_sessions_db),
             loop.run_in_executor(executor, init_social_media_db),
+            loop.run_in_executor(executor, init_llm_cache_db),
         ]
         await asyncio.gather(*tasks)
     total_elapsed = time.time() - total_start
@@ -1,53 +1,119 @@
 import os
-from typing import Dict, List, Any, Tuple, Union
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple, Union, Callable
 from fastapi import HTTPException
 from contextlib import contextmanager
-import sqlite3
 from db.config import get_db_path
+from db.connection import DB_POOL_SIZE, db_connection as pooled_connection
+from db.write_queue import run_write
+
+# Writes are serialized per file by run_write anyway; on their own pool, one waiting out a lock retry never holds a reader's thread.
+DB_WRITE_EXECUTOR_WORKERS = int(os.environ.get("DB_WRITE_EXECUTOR_WORKERS", 1))
+# Readers: at most one per pooled connection left over by the writers, and one more than the CPU count: workers beyond
+# that only take CPU from the event loop, which then answers late (p99 rose from 0.6 s to 3 s on one core with 8 workers).
+DB_EXECUTOR_WORKERS = int(
+    os.environ.get("DB_EXECUTOR_WORKERS", max(1, min(DB_POOL_SIZE - DB_WRITE_EXECUTOR_WORKERS, (os.cpu_count() or 1) + 1)))
+)
+_read_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db-read")
+_write_executor = ThreadPoolExecutor(max_workers=DB_WRITE_EXECUTOR_WORKERS, thread_name_prefix="db-write")
+
+
+def _require_databases(paths):
+    for path in paths:
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail=f"Database {path} not found. Initialize the database first.")
 
 
 @contextmanager
-def db_connection(db_path: str):
+def db_connection(db_path: str, attach: Dict[str, str] = None):
     """Context manager for database connections."""
-    if not os.path.exists(db_path):
-        raise HTTPException(status_code=404, detail=f"Database {db_path} not found. Initialize the database first.")
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
+    _require_databases([db_path, *(attach or {}).values()])
+    with pooled_connection(db_path, attach) as conn:
         yield conn
-    finally:
-        conn.close()
+
+
+async def run_in_db_executor(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking database read on the shared reader pool instead of the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_read_executor, functools.partial(func, *args, **kwargs))
 
 
 class DatabaseService:
     """Service for managing database connections and operations."""
 
-    def __init__(self, db_name: str):
+    def __init__(self, db_name: str, use_executor: bool = True, attach: Tuple[str, ...] = ()):
         """
         Initialize the database service.
 
         Args:
             db_name: Name of the database (sources_db, tracking_db, etc.)
+            use_executor: Run queries off the event loop, reads and writes on separate shared thread pools
+            attach: Other databases to attach read-only, addressable in SQL by their name (e.g. sources_db.sources)
         """
         self.db_path = get_db_path(db_name)
+        self.attach = {name: get_db_path(name) for name in attach}
+        self.use_executor = use_executor
+
+    def _execute_query_sync(self, query: str, params: Tuple, fetch: bool, fetch_one: bool) -> Union[List[Dict[str, Any]], Dict[str, Any], int]:
+        if not (fetch or fetch_one):
+            return self._write_sync(lambda cursor: cursor.execute(query, params).lastrowid)
+        with db_connection(self.db_path, self.attach) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            if fetch_one:
+                result = cursor.fetchone()
+                return dict(result) if result else None
+            return [dict(row) for row in cursor.fetchall()]
+
+    def _read_sync(self, fn: Callable) -> Any:
+        with db_connection(self.db_path, self.attach) as conn:
+
+            def query(sql: str, params: Tuple = (), fetch_one: bool = False):
+                cursor = conn.execute(sql, params)
+                if fetch_one:
+                    row = cursor.fetchone()
+                    return dict(row) if row else None
+                return [dict(row) for row in cursor.fetchall()]
+
+            return fn(query)
+
+    def _execute_write_many_sync(self, query: str, params_list: List[Tuple]) -> int:
+        return self._write_sync(lambda cursor: cursor.executemany(query, params_list).rowcount)
+
+    def _write_sync(self, fn: Callable) -> Any:
+        # Attached databases are read-only, so writes only need this service's own file.
+        _require_databases([self.db_path])
+        return run_write(self.db_path, fn)
+
+    async def _run(self, func: Callable, *args, write: bool = False) -> Any:
+        if not self.use_executor:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_write_executor if write else _read_executor, functools.partial(func, *args))
 
     async def execute_query(
         self, query: str, params: Tuple = (), fetch: bool = False, fetch_one: bool = False
     ) -> Union[List[Dict[str, Any]], Dict[str, Any], int]:
         """Execute a query with error handling for FastAPI."""
         try:
-            with db_connection(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(query, params)
+            return await self._run(self._execute_query_sync, query, params, fetch, fetch_one, write=not (fetch or fetch_one))
+        except Exception as e:
+            if isinstance(e, HTTPException):
+                raise e
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-                if fetch_one:
-                    result = cursor.fetchone()
-                    return dict(result) if result else None
-                elif fetch:
-                    return [dict(row) for row in cursor.fetchall()]
-                else:
-                    conn.commit()
-                    return cursor.lastrowid
+    async def read(self, fn: Callable[[Callable], Any]) -> Any:
+        """
+        Run fn(query) on one pooled connection in a single executor hop, where
+        query(sql, params=(), fetch_one=False) returns rows as dicts.
+
+        Endpoints that run several dependent reads use this so a request waits
+        for the reader pool once instead of once per statement.
+        """
+        try:
+            return await self._run(self._read_sync, fn)
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
@@ -56,20 +122,19 @@ class DatabaseService:
     async def execute_write_many(self, query: str, params_list: List[Tuple]) -> int:
         """Execute multiple write operations in a single transaction."""
         try:
-            with db_connection(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.executemany(query, params_list)
-                conn.commit()
-                return cursor.rowcount
+            return await self._run(self._execute_write_many_sync, query, params_list, write=True)
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
             raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
-
 sources_db = DatabaseService(db_name="sources_db")
 tracking_db = DatabaseService(db_name="tracking_db")
 podcasts_db = DatabaseService(db_name="podcasts_db")
 tasks_db = DatabaseService(db_name="tasks_db")
 social_media_db = DatabaseService(db_name="social_media_db")
+# tracking_db with sources_db attached, for article queries that filter or label by source.
+articles_db = DatabaseService(db_name="tracking_db", attach=("sources_db",))
+# agno's podcast session table with the session states attached, for the podcast agent's session listing.
+agent_sessions_db = DatabaseService(db_name="agent_session_db", attach=("internal_sessions_db",))
@@ -4,20 +4,15 @@ import json
 from datetime import datetime
 from db.config import get_db_path
 from db.agent_config_v2 import INITIAL_SESSION_STATE
-import sqlite3
+from db.connection import db_connection
 from contextlib import contextmanager
 
 
 @contextmanager
 def get_db_connection(db_name: str):
-    """Get a fresh database connection each time."""
-    db_path = get_db_path(db_name)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
+    """Borrow a pooled connection for the named database."""
+    with db_connection(get_db_path(db_name)) as conn:
         yield conn
-    finally:
-        conn.close()
 
 
 class SessionService:
@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import base64
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+
+PAGINATION_COUNT_TTL = float(os.environ.get("PAGINATION_COUNT_TTL", 60))
+# Each distinct filter combination (search text included) gets an entry; the least recently used go first.
+PAGINATION_COUNT_CACHE_SIZE = int(os.environ.get("PAGINATION_COUNT_CACHE_SIZE", 1024))
+COUNT_MODES = ("exact", "cached", "none")
+
+_count_cache: "OrderedDict[Any, Tuple[float, int]]" = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+
+def encode_cursor(kind: str, *values: Any) -> str:
+    """Opaque token for the sort key of the last item on a page."""
+    payload = json.dumps([kind, *values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str, size: int) -> List[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(payload, list) or len(payload) != size + 1 or payload[0] != kind:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload[1:]
+
+
+def keyset_condition(columns: List[str], values: List[Any]) -> Tuple[str, List[Any]]:
+    """
+    Condition selecting rows after the cursor for a DESC ordering on columns.
+
+    The leading-column bound is spelled out so SQLite can turn it into an index
+    range even when the column is an expression such as datetime(post_timestamp).
+    Comparisons with NULL never match, so a nullable leading column has to be
+    passed (and ordered by) as COALESCE(column, '') with the cursor value
+    coalesced the same way.
+    """
+    placeholders = ", ".join("?" for _ in columns)
+    condition = f"{columns[0]} <= ? AND ({', '.join(columns)}) < ({placeholders})"
+    return condition, [values[0], *values]
+
+
+def get_cached_total(key: Any) -> Optional[int]:
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] >= PAGINATION_COUNT_TTL:
+            del _count_cache[key]
+            return None
+        _count_cache.move_to_end(key)
+    return cached[1]
+
+
+def set_cached_total(key: Any, total: int) -> int:
+    with _count_cache_lock:
+        _count_cache[key] = (time.monotonic(), total)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > PAGINATION_COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return total
+
+
+def _known_total(count: str, key: Any) -> Tuple[bool, Optional[int]]:
+    if count not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid count mode: {count}")
+    if count == "none":
+        return True, None
+    if count == "cached":
+        total = get_cached_total(key)
+        if total is not None:
+            return True, total
+    return False, None
+
+
+async def resolve_total(count: str, key: Any, fetch_total: Callable[[], Awaitable[int]]) -> Optional[int]:
+    """
+    Total for a listing according to the requested count mode.
+
+    "exact" runs COUNT(*) every time, "cached" reuses a count up to
+    PAGINATION_COUNT_TTL seconds old, and "none" skips counting.
+    """
+    known, total = _known_total(count, key)
+    return total if known else set_cached_total(key, await fetch_total())
+
+
+def resolve_total_sync(count: str, key: Any, fetch_total: Callable[[], int]) -> Optional[int]:
+    """resolve_total for a blocking fetch_total, e.g. inside DatabaseService.read."""
+    known, total = _known_total(count, key)
+    return total if known else set_cached_total(key, fetch_total())
+
+
+def page_metadata(
+    rows: List[Dict[str, Any]], page: int, per_page: int, total: Optional[int], cursor: Optional[str], next_cursor: Callable[[Dict[str, Any]], str]
+) -> Dict[str, Any]:
+    """
+    Trim the extra look-ahead row and build the pagination fields.
+
+    Queries fetch per_page + 1 rows so has_next is known without a count.
+    """
+    has_next = len(rows) > per_page
+    del rows[per_page:]
+    return {
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "total_pages": (total + per_page - 1) // per_page if total is not None else None,
+        "has_next": has_next,
+        "has_prev": bool(cursor) or page > 1,
+        "next_cursor": next_cursor(rows[-1]) if has_next and rows else None,
+    }
@@ -4,10 +4,17 @@ from typing import List, Dict, Optional, Any
 from datetime import datetime
 from fastapi import HTTPException, UploadFile
 from services.db_service import podcasts_db
-import math
+from services.pagination import decode_cursor, encode_cursor, keyset_condition, page_metadata, resolve_total
 
 AUDIO_DIR = "podcasts/audio"
 IMAGE_DIR = "podcasts/images"
+PODCAST_LIST_SELECT = (
+    "SELECT id, title, date, audio_generated, audio_path, banner_img_path, language_code, tts_engine, created_at FROM podcasts"
+)
+# date is nullable; undated podcasts sort last and stay reachable by cursor.
+PODCAST_SORT_KEY = "COALESCE(date, '')"
+PODCAST_SORT_COLUMNS = [PODCAST_SORT_KEY, "id"]
+PODCAST_LIST_ORDER = f"ORDER BY {PODCAST_SORT_KEY} DESC, id DESC"
 
 
 class PodcastService:
@@ -28,18 +35,18 @@ class PodcastService:
         language_code: str = None,
         tts_engine: str = None,
         has_audio: bool = None,
+        cursor: str = None,
+        count: str = "exact",
     ) -> Dict[str, Any]:
         """
         Get a paginated list of podcasts with optional filtering.
+
+        cursor (the previous response's next_cursor) pages by (date, id) instead of OFFSET.
         """
         try:
             offset = (page - 1) * per_page
             count_query = "SELECT COUNT(*) as count FROM podcasts"
-            query = """
-            SELECT id, title, date, audio_generated, audio_path, banner_img_path,
-                   language_code, tts_engine, created_at
-            FROM podcasts
-            """
+            query = PODCAST_LIST_SELECT
             where_conditions = []
             params = []
             if search:
@@ -62,16 +69,28 @@ class PodcastService:
                 where_conditions.append("audio_generated = ?")
                 params.append(1 if has_audio else 0)
             if where_conditions:
-                where_clause = " WHERE " + " AND ".join(where_conditions)
-                query += where_clause
-                count_query += where_clause
-            query += " ORDER BY date DESC, created_at DESC"
+                count_query += " WHERE " + " AND ".join(where_conditions)
+            count_params = tuple(params)
+
+            async def fetch_total():
+                total_result = await podcasts_db.execute_query(count_query, count_params, fetch=True, fetch_one=True)
+                return total_result.get("count", 0) if total_result else 0
+
+            total_items = await resolve_total(count, ("podcasts", count_query, count_params), fetch_total)
+            if cursor:
+                condition, cursor_params = keyset_condition(PODCAST_SORT_COLUMNS, decode_cursor(cursor, "podcasts", 2))
+                where_conditions.append(condition)
+                params.extend(cursor_params)
+                offset = 0
+            if where_conditions:
+                query += " WHERE " + " AND ".join(where_conditions)
+            query += f" {PODCAST_LIST_ORDER}"
             query += " LIMIT ? OFFSET ?"
-            params.extend([per_page, offset])
-            total_result = await podcasts_db.execute_query(count_query, tuple(params[:-2] if params else ()), fetch=True, fetch_one=True)
-            total_items = total_result.get("count", 0) if total_result else 0
-            total_pages = math.ceil(total_items / per_page) if total_items > 0 else 0
+            params.extend([per_page + 1, offset])
             podcasts = await podcasts_db.execute_query(query, tuple(params), fetch=True)
+            pagination = page_metadata(
+                podcasts, page, per_page, total_items, cursor, lambda last: encode_cursor("podcasts", last["date"] or "", last["id"])
+            )
             for podcast in podcasts:
                 podcast["audio_generated"] = bool(podcast.get("audio_generated", 0))
                 if podcast.get("banner_img_path"):
@@ -80,18 +99,10 @@ class PodcastService:
                     podcast["banner_img"] = None
                 podcast.pop("banner_img_path", None)
                 podcast["identifier"] = str(podcast.get("id", ""))
-            has_next = page < total_pages
-            has_prev = page > 1
-            return {
-                "items": podcasts,
-                "total": total_items,
-                "page": page,
-                "per_page": per_page,
-                "total_pages": total_pages,
-                "has_next": has_next,
-                "has_prev": has_prev,
-            }
+            return {"items": podcasts, **pagination}
         except Exception as e:
+            if isinstance(e, HTTPException):
+                raise e
             raise HTTPException(status_code=500, detail=f"Error loading podcasts: {str(e)}")
 
     async def get_podcast(self, podcast_id: int) -> Optional[Dict[str, Any]]:
@@ -3,8 +3,17 @@ from typing import List, Optional, Dict, Any
 from fastapi import HTTPException
 from services.db_service import social_media_db
 from models.social_media_schemas import PaginatedPosts, Post
+from db.fulltext import match_query
+from services.pagination import decode_cursor, encode_cursor, keyset_condition, page_metadata, resolve_total
 from datetime import datetime, timedelta
 
+POST_SEARCH_FILTER = "AND rowid IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)"
+# post_timestamp is nullable (and datetime() is NULL for text it cannot parse); such posts sort last and stay reachable by cursor.
+POST_SORT_KEY = "COALESCE(datetime(post_timestamp), '')"
+POST_SORT_COLUMNS = [POST_SORT_KEY, "post_id"]
+POST_LIST_SELECT = f"SELECT *, {POST_SORT_KEY} AS sort_timestamp FROM posts"
+POST_LIST_ORDER = f"ORDER BY {POST_SORT_KEY} DESC, post_id DESC"
+
 
 class SocialMediaService:
     """Service for managing social media posts."""
@@ -20,12 +29,14 @@ class SocialMediaService:
         date_from: Optional[str] = None,
         date_to: Optional[str] = None,
         search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: str = "exact",
     ) -> PaginatedPosts:
-        """Get social media posts with pagination and filtering."""
+        """Get social media posts with pagination and filtering; cursor pages by (POST_SORT_KEY, post_id)."""
         try:
             offset = (page - 1) * per_page
             query_parts = [
-                "SELECT * FROM posts",
+                POST_LIST_SELECT,
                 "WHERE 1=1",
             ]
             query_params = []
@@ -42,26 +53,41 @@ class SocialMediaService:
                 query_parts.append("AND categories LIKE ?")
                 query_params.append(f'%"{category}"%')
             if date_from:
-                query_parts.append("AND datetime(post_timestamp) >= datetime(?)")
+                # On the sort key, so the filter and the ORDER BY share one index range.
+                query_parts.append(f"AND {POST_SORT_KEY} >= datetime(?)")
                 query_params.append(date_from)
             if date_to:
                 query_parts.append("AND datetime(post_timestamp) <= datetime(?)")
                 query_params.append(date_to)
-            if search:
-                query_parts.append("AND (post_text LIKE ? OR user_display_name LIKE ? OR user_handle LIKE ?)")
-                search_param = f"%{search}%"
-                query_params.extend([search_param, search_param, search_param])
-            count_query = " ".join(query_parts).replace("SELECT *", "SELECT COUNT(*)")
-            total_posts = await social_media_db.execute_query(count_query, tuple(query_params), fetch=True, fetch_one=True)
-            total_count = total_posts.get("COUNT(*)", 0) if total_posts else 0
-            query_parts.append("ORDER BY datetime(post_timestamp) DESC, post_id DESC")
+            search_match = match_query(search) if search else None
+            if search_match:
+                query_parts.append(POST_SEARCH_FILTER)
+                query_params.append(search_match)
+            count_query = " ".join(query_parts).replace(POST_LIST_SELECT, "SELECT COUNT(*) FROM posts")
+            count_params = tuple(query_params)
+
+            async def fetch_total():
+                total_posts = await social_media_db.execute_query(count_query, count_params, fetch=True, fetch_one=True)
+                return total_posts.get("COUNT(*)", 0) if total_posts else 0
+
+            total_count = await resolve_total(count, ("posts", count_query, count_params), fetch_total)
+            if cursor:
+                condition, cursor_params = keyset_condition(POST_SORT_COLUMNS, decode_cursor(cursor, "posts", 2))
+                query_parts.append(f"AND {condition}")
+                query_params.extend(cursor_params)
+                offset = 0
+            query_parts.append(POST_LIST_ORDER)
             query_parts.append("LIMIT ? OFFSET ?")
-            query_params.extend([per_page, offset])
+            query_params.extend([per_page + 1, offset])
             posts_query = " ".join(query_parts)
             posts_data = await social_media_db.execute_query(posts_query, tuple(query_params), fetch=True)
+            pagination = page_metadata(
+                posts_data, page, per_page, total_count, cursor, lambda last: encode_cursor("posts", last["sort_timestamp"], last["post_id"])
+            )
             posts = []
             for post in posts_data:
                 post_dict = dict(post)
+                post_dict.pop("sort_timestamp", None)
                 if post_dict.get("media"):
                     try:
                         post_dict["media"] = json.loads(post_dict["media"])
@@ -85,18 +111,7 @@ class SocialMediaService:
                     "views": post_dict.pop("engagement_view_count", 0),
                 }
                 posts.append(post_dict)
-            total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 0
-            has_next = page < total_pages
-            has_prev = page > 1
-            return PaginatedPosts(
-                items=posts,
-                total=total_count,
-                page=page,
-                per_page=per_page,
-                total_pages=total_pages,
-                has_next=has_next,
-                has_prev=has_prev,
-            )
+            return PaginatedPosts(items=posts, **pagination)
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
@@ -2,8 +2,13 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from fastapi import HTTPException
 from services.db_service import tasks_db
+from services.pagination import decode_cursor, encode_cursor, keyset_condition, page_metadata, resolve_total
 from models.tasks_schemas import TASK_TYPES
 
+TASK_EXECUTIONS_SELECT = "SELECT id, task_id, start_time, end_time, status, error_message, output FROM task_executions"
+TASK_EXECUTION_SORT_COLUMNS = ["start_time", "id"]
+TASK_EXECUTIONS_ORDER = "ORDER BY start_time DESC, id DESC"
+
 
 class TaskService:
     """Service for managing scheduled tasks."""
@@ -192,41 +197,42 @@ class TaskService:
                 raise e
             raise HTTPException(status_code=500, detail=f"Error updating task: {str(e)}")
 
-    async def get_task_executions(self, task_id: Optional[int] = None, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
-        """Get paginated task executions."""
+    async def get_task_executions(
+        self, task_id: Optional[int] = None, page: int = 1, per_page: int = 10, cursor: Optional[str] = None, count: str = "exact"
+    ) -> Dict[str, Any]:
+        """Get paginated task executions; cursor pages by (start_time, id) instead of OFFSET."""
         try:
             offset = (page - 1) * per_page
+            where_conditions = []
+            params = []
             if task_id:
-                count_query = """
-                SELECT COUNT(*) as count
-                FROM task_executions
-                WHERE task_id = ?
-                """
-                count_params = (task_id,)
-                query = """
-                SELECT id, task_id, start_time, end_time, status, error_message, output
-                FROM task_executions
-                WHERE task_id = ?
-                ORDER BY start_time DESC
-                LIMIT ? OFFSET ?
-                """
-                params = (task_id, per_page, offset)
-            else:
-                count_query = """
-                SELECT COUNT(*) as count
-                FROM task_executions
-                """
-                count_params = ()
-                query = """
-                SELECT id, task_id, start_time, end_time, status, error_message, output
-                FROM task_executions
-                ORDER BY start_time DESC
-                LIMIT ? OFFSET ?
-                """
-                params = (per_page, offset)
-            count_result = await tasks_db.execute_query(count_query, count_params, fetch=True, fetch_one=True)
-            total_items = count_result.get("count", 0) if count_result else 0
-            executions = await tasks_db.execute_query(query, params, fetch=True)
+                where_conditions.append("task_id = ?")
+                params.append(task_id)
+            where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+            count_query = f"""
+            SELECT COUNT(*) as count
+            FROM task_executions
+            {where_clause}
+            """
+            count_params = tuple(params)
+
+            async def fetch_total():
+                count_result = await tasks_db.execute_query(count_query, count_params, fetch=True, fetch_one=True)
+                return count_result.get("count", 0) if count_result else 0
+
+            total_items = await resolve_total(count, ("task_executions", count_query, count_params), fetch_total)
+            if cursor:
+                condition, cursor_params = keyset_condition(TASK_EXECUTION_SORT_COLUMNS, decode_cursor(cursor, "task_executions", 2))
+                where_conditions.append(condition)
+                params.extend(cursor_params)
+                offset = 0
+            where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+            query = f"{TASK_EXECUTIONS_SELECT} {where_clause} {TASK_EXECUTIONS_ORDER} LIMIT ? OFFSET ?"
+            params.extend([per_page + 1, offset])
+            executions = await tasks_db.execute_query(query, tuple(params), fetch=True)
+            pagination = page_metadata(
+                executions, page, per_page, total_items, cursor, lambda last: encode_cursor("task_executions", last["start_time"], last["id"])
+            )
             for execution in executions:
                 if execution.get("task_id"):
                     try:
@@ -234,18 +240,7 @@ class TaskService:
                         execution["task_name"] = task.get("name", "Unknown Task")
                     except Exception as _:
                         execution["task_name"] = "Unknown Task"
-            total_pages = (total_items + per_page - 1) // per_page if total_items > 0 else 0
-            has_next = page < total_pages
-            has_prev = page > 1
-            return {
-                "items": executions,
-                "total": total_items,
-                "page": page,
-                "per_page": per_page,
-                "total_pages": total_pages,
-                "has_next": has_next,
-                "has_prev": has_prev,
-            }
+            return {"items": executions, **pagination}
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
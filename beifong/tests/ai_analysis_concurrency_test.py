@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ANALYSIS_DIR = tempfile.mkdtemp(prefix="beifong_analysis_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(ANALYSIS_DIR, "feed_tracking.db")
+os.environ["LLM_CACHE_DB_PATH"] = os.path.join(ANALYSIS_DIR, "llm_cache.db")
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from db.connection import db_connection
+from db.write_queue import get_write_stats
+from services.db_init import init_tracking_db
+from processors.ai_analysis_processor import analyze_in_batches, ANALYSIS_COMMIT_SIZE
+
+TRACKING_DB_PATH = os.environ["TRACKING_DB_PATH"]
+NUM_ARTICLES = 240
+CONCURRENCY = 16
+# The fake API: 0.4 s per completion, 900 requests/min refilled continuously with a burst of 10, and every 50th request fails once with a 500.
+STUB_LATENCY = 0.4
+STUB_RPM = 900
+STUB_BURST = 10
+STUB_TPM = 2_000_000
+FAIL_EVERY = 50
+# The previous processor: one request at a time with a 1-3 s sleep in between.
+SEQUENTIAL_SECONDS_PER_ARTICLE = STUB_LATENCY + 2.0
+
+
+def build_fake_openai():
+    app = FastAPI()
+    state = {"requests": 0, "rate_limited": 0, "failed": 0, "max_in_flight": 0, "in_flight": 0, "tokens": STUB_BURST, "updated": None}
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if state["updated"] is not None:
+            state["tokens"] = min(STUB_BURST, state["tokens"] + (now - state["updated"]) * STUB_RPM / 60)
+        state["updated"] = now
+        headers = {
+            "x-ratelimit-limit-requests": str(STUB_RPM),
+            "x-ratelimit-limit-tokens": str(STUB_TPM),
+            "x-ratelimit-remaining-tokens": str(STUB_TPM),
+        }
+        if state["tokens"] < 1:
+            state["rate_limited"] += 1
+            wait_ms = int((1 - state["tokens"]) * 60 / STUB_RPM * 1000) + 1
+            headers.update({"x-ratelimit-remaining-requests": "0", "retry-after-ms": str(wait_ms)})
+            error = {"message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}
+            return JSONResponse({"error": error}, status_code=429, headers=headers)
+        state["tokens"] -= 1
+        state["requests"] += 1
+        headers["x-ratelimit-remaining-requests"] = str(int(state["tokens"]))
+        if state["requests"] % FAIL_EVERY == 0:
+            state["failed"] += 1
+            return JSONResponse({"error": {"message": "The server had an error", "type": "server_error"}}, status_code=500)
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(STUB_LATENCY)
+        finally:
+            state["in_flight"] -= 1
+        title = body["messages"][1]["content"].split("Article Title: ", 1)[1].split("\n", 1)[0]
+        content = json.dumps({"categories": ["news", "transport"], "summary": f"Summary of {title}.", "content": f"Body of {title}."})
+        prompt_tokens = sum(len(message["content"]) for message in body["messages"]) // 4
+        completion = {
+            "id": f"chatcmpl-{state['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 40, "total_tokens": prompt_tokens + 40},
+        }
+        return JSONResponse(completion, headers=headers)
+
+    return app
+
+
+def serve_fake_openai(port, ready):
+    ready.set()
+    uvicorn.run(build_fake_openai(), host="127.0.0.1", port=port, log_level="warning")
+
+
+def main():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_fake_openai, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+
+    init_tracking_db()
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.executemany(
+            "INSERT INTO crawled_articles (id, entry_id, title, url, published_ts) VALUES (?, ?, ?, ?, ?)",
+            [(n + 1, n, f"Story {n}", f"https://example.com/{n}", 1700000000 + n) for n in range(NUM_ARTICLES)],
+        )
+        conn.executemany(
+            "INSERT INTO article_bodies (article_id, clean_text, metadata) VALUES (?, ?, '{}')",
+            [(n + 1, f"Story {n}. " + "The council approved the new tram line after a long debate. " * 40) for n in range(NUM_ARTICLES)],
+        )
+        conn.commit()
+    transactions_before = get_write_stats().get(os.path.abspath(TRACKING_DB_PATH), {}).get("transactions", 0)
+
+    started = time.perf_counter()
+    stats = analyze_in_batches(
+        openai_api_key="test-key",
+        batch_size=50,
+        total_batches=NUM_ARTICLES // 50 + 1,
+        concurrency=CONCURRENCY,
+        base_url=f"http://127.0.0.1:{port}/v1",
+    )
+    elapsed = time.perf_counter() - started
+    transactions = get_write_stats()[os.path.abspath(TRACKING_DB_PATH)]["transactions"] - transactions_before
+    server_stats = httpx.get(f"http://127.0.0.1:{port}/stats").json()
+    server.terminate()
+    server.join()
+
+    with db_connection(TRACKING_DB_PATH) as conn:
+        done = conn.execute("SELECT COUNT(*) FROM crawled_articles WHERE ai_status = 'success' AND processed = 1").fetchone()[0]
+        categorized = conn.execute("SELECT COUNT(DISTINCT article_id) FROM article_categories").fetchone()[0]
+        attempts = conn.execute("SELECT MAX(ai_attempts) FROM crawled_articles").fetchone()[0]
+    sequential = NUM_ARTICLES * SEQUENTIAL_SECONDS_PER_ARTICLE
+    ceiling = STUB_RPM / 60
+    print(f"{NUM_ARTICLES} articles, fake API at {STUB_RPM} RPM with {STUB_LATENCY * 1000:.0f} ms latency, {CONCURRENCY} workers")
+    print(f"{'sequential (estimated)':<24} {sequential:7.1f}s  {NUM_ARTICLES / sequential:5.2f} articles/s")
+    print(
+        f"{'worker pool':<24} {elapsed:7.1f}s  {NUM_ARTICLES / elapsed:5.2f} articles/s (limit {ceiling:.0f}/s), "
+        f"max {server_stats['max_in_flight']} in flight, {server_stats['rate_limited']} x 429, {server_stats['failed']} x 500 retried"
+    )
+    print(f"{'status commits':<24} {transactions} transactions for {NUM_ARTICLES} articles")
+    assert stats["success_count"] == NUM_ARTICLES and done == NUM_ARTICLES and categorized == NUM_ARTICLES, stats
+    assert attempts == 1
+    assert transactions <= NUM_ARTICLES // ANALYSIS_COMMIT_SIZE + 10, transactions
+    assert server_stats["rate_limited"] < NUM_ARTICLES // 4, server_stats
+    assert NUM_ARTICLES / elapsed > ceiling * 0.7
+
+
+if __name__ == "__main__":
+    main()
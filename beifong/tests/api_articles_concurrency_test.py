@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import statistics
+import multiprocessing
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCH_DIR = tempfile.mkdtemp(prefix="beifong_bench_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(BENCH_DIR, "feed_tracking.db")
+os.environ["SOURCES_DB_PATH"] = os.path.join(BENCH_DIR, "sources.db")
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from db.connection import db_connection, get_pool_stats
+from services.db_init import init_tracking_db, init_sources_db
+from services.db_service import tracking_db, sources_db, articles_db
+from routers import article_router
+
+NUM_ARTICLES = 50000
+CONCURRENT_CLIENTS = 50
+REQUESTS_PER_CLIENT = 10
+BENCH_PORT = 7931
+CATEGORIES = ["ai", "science", "politics", "sports", "business", "health"]
+# Writes sent while another process holds the tracking write lock: more than there are reader threads.
+STUCK_WRITES = 8
+
+
+def seed_databases():
+    init_sources_db()
+    init_tracking_db()
+    with db_connection(os.environ["SOURCES_DB_PATH"]) as conn:
+        conn.executemany("INSERT INTO sources (id, name) VALUES (?, ?)", [(i, f"Source {i}") for i in range(1, 21)])
+        conn.executemany(
+            "INSERT INTO source_feeds (id, source_id, feed_url) VALUES (?, ?, ?)",
+            [(i, (i % 20) + 1, f"https://feed{i}.example.com/rss") for i in range(1, 101)],
+        )
+        conn.commit()
+    now = datetime.now()
+    with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+        rows = []
+        for i in range(1, NUM_ARTICLES + 1):
+            published = now - timedelta(minutes=i)
+            rows.append((i, (i % 100) + 1, f"Article {i}", f"https://example.com/a/{i}", published.isoformat(), int(published.timestamp()), f"Summary for article {i}"))
+        conn.executemany(
+            """
+            INSERT INTO crawled_articles (id, feed_id, title, url, published_date, published_ts, summary, processed, ai_status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1, 'success')
+            """,
+            rows,
+        )
+        conn.executemany(
+            "INSERT INTO article_categories (article_id, category_name) VALUES (?, ?)",
+            [(i, random.choice(CATEGORIES)) for i in range(1, NUM_ARTICLES + 1)],
+        )
+        conn.commit()
+
+
+def hold_write_lock(held, release):
+    """Another writer on the tracking database, as the crawler and analysis processors are, holding the lock until told."""
+    with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        held.set()
+        release.wait()
+        conn.commit()
+
+
+async def read_beside_stuck_writes(client):
+    """Listing latency while STUCK_WRITES API writes wait for a write lock held elsewhere."""
+    held, release = multiprocessing.Event(), multiprocessing.Event()
+    lock_holder = multiprocessing.Process(target=hold_write_lock, args=(held, release), daemon=True)
+    lock_holder.start()
+    held.wait()
+    writes = [asyncio.create_task(client.post(f"/touch/{n}")) for n in range(1, STUCK_WRITES + 1)]
+    await asyncio.sleep(0.2)
+    start = time.perf_counter()
+    try:
+        # Queued behind the writes, the read would wait for as long as the lock is held.
+        response = await client.get("/api/articles/?page=1&per_page=20", timeout=5)
+        latency = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.text
+    except httpx.TimeoutException:
+        latency = float("inf")
+    release.set()
+    lock_holder.join()
+    assert all(write.status_code == 200 for write in await asyncio.gather(*writes))
+    return latency
+
+
+async def run_clients(client):
+    latencies = []
+
+    async def worker():
+        for _ in range(REQUESTS_PER_CLIENT):
+            page = random.randint(1, 200)
+            start = time.perf_counter()
+            response = await client.get(f"/api/articles/?page={page}&per_page=20")
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+
+    async def probe():
+        while len(latencies) < CONCURRENT_CLIENTS * REQUESTS_PER_CLIENT:
+            start = time.perf_counter()
+            await client.get("/ping")
+            probe_latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.01)
+
+    probe_latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(probe(), *[worker() for _ in range(CONCURRENT_CLIENTS)])
+    return latencies, probe_latencies, time.perf_counter() - start
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return statistics.median(latencies), latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+
+
+def summarize(label, latencies, probe_latencies, elapsed):
+    p50, p99 = percentiles(latencies)
+    probe_p50, probe_p99 = percentiles(probe_latencies)
+    print(
+        f"{label:<26} /api/articles p50={p50:7.1f} ms p99={p99:7.1f} ms  "
+        f"/ping p50={probe_p50:6.1f} ms p99={probe_p99:7.1f} ms  {len(latencies) / elapsed:6.1f} req/s"
+    )
+
+
+def serve(use_executor, port):
+    # Below the load generator's priority: on a machine with few cores the server's executor threads would
+    # otherwise take CPU from the clients, and the clients' scheduling delay would be measured as server latency.
+    os.nice(5)
+    tracking_db.use_executor = use_executor
+    sources_db.use_executor = use_executor
+    articles_db.use_executor = use_executor
+    app = FastAPI()
+    app.include_router(article_router.router, prefix="/api/articles")
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/touch/{article_id}")
+    async def touch(article_id: int):
+        await tracking_db.execute_query("UPDATE crawled_articles SET ai_attempts = ai_attempts + 1 WHERE id = ?", (article_id,))
+        return {"ok": True}
+
+    @app.get("/pool-stats")
+    async def pool_stats():
+        return get_pool_stats()
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(use_executor, port):
+    server = multiprocessing.Process(target=serve, args=(use_executor, port), daemon=True)
+    server.start()
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/ping")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.05)
+
+
+async def main():
+    print(f"Seeding {NUM_ARTICLES} articles in {BENCH_DIR} ...")
+    seed_databases()
+    limits = httpx.Limits(max_connections=CONCURRENT_CLIENTS + 1)
+    p50, p99 = {}, {}
+    for label, use_executor in [("blocking (on event loop)", False), ("executor (off loop)", True)]:
+        server = start_server(use_executor, BENCH_PORT)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{BENCH_PORT}", limits=limits, timeout=120) as client:
+            await client.get("/api/articles/?page=1&per_page=20")
+            latencies, probe_latencies, elapsed = await run_clients(client)
+            summarize(label, latencies, probe_latencies, elapsed)
+            p50[use_executor], p99[use_executor] = percentiles(latencies)
+            pool_stats = (await client.get("/pool-stats")).json()
+            if use_executor:
+                stuck_read = await read_beside_stuck_writes(client)
+        server.terminate()
+        server.join()
+    print(f"/api/articles beside {STUCK_WRITES} writes waiting for the lock: {stuck_read:.1f} ms")
+    print(pool_stats)
+    # On one core the client, the event loop and the reader threads share the CPU, so handing reads to a thread costs
+    # up to about a third at p50 (and the /ping probe, answered promptly, adds work); allow that much, no more.
+    assert p50[True] < 1.5 * p50[False] and p99[True] < 1.5 * p99[False], (p50, p99)
+    # Waiting writes hold the writer thread, not the readers': the listing does not queue behind them.
+    assert stuck_read < 1000, stuck_read
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
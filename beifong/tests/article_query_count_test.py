@@ -0,0 +1,105 @@
+import os
+import sys
+import random
+import sqlite3
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+COUNT_DIR = tempfile.mkdtemp(prefix="beifong_querycount_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(COUNT_DIR, "feed_tracking.db")
+os.environ["SOURCES_DB_PATH"] = os.path.join(COUNT_DIR, "sources.db")
+
+from db import connection
+from db.connection import db_connection, attach_read_only
+from services.db_init import init_tracking_db, init_sources_db
+from services.article_service import article_service
+from utils.get_articles import _execute_search, _add_article_categories
+
+NUM_ARTICLES = 500
+PAGE_SIZES = [10, 50, 100]
+# Pool health check, count, page, categories.
+SERVICE_STATEMENTS = 4
+# Search, categories.
+SEARCH_STATEMENTS = 2
+CATEGORIES = ["ai", "science", "politics", "sports", "business", "health"]
+statements = []
+_open = connection.ConnectionPool._open
+
+
+def _traced_open(self):
+    conn = _open(self)
+    conn.set_trace_callback(lambda sql: statements.append(sql) if sql.lstrip().upper().startswith("SELECT") else None)
+    return conn
+
+
+def seed_databases():
+    init_sources_db()
+    init_tracking_db()
+    with db_connection(os.environ["SOURCES_DB_PATH"]) as conn:
+        conn.executemany("INSERT INTO sources (id, name) VALUES (?, ?)", [(i, f"Source {i}") for i in range(1, 11)])
+        conn.executemany(
+            "INSERT INTO source_feeds (id, source_id, feed_url) VALUES (?, ?, ?)",
+            [(i, (i % 10) + 1, f"https://feed{i}.example.com/rss") for i in range(1, 31)],
+        )
+        conn.commit()
+    now = datetime.now()
+    with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+        rows = []
+        for i in range(1, NUM_ARTICLES + 1):
+            published = now - timedelta(minutes=i)
+            rows.append((i, (i % 30) + 1, f"Article {i} about ai", f"https://example.com/a/{i}", published.isoformat(), int(published.timestamp())))
+        conn.executemany(
+            """
+            INSERT INTO crawled_articles (id, feed_id, title, url, published_date, published_ts, summary, processed, ai_status)
+            VALUES (?, ?, ?, ?, ?, ?, 'summary', 1, 'success')
+            """,
+            rows,
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO article_categories (article_id, category_name) VALUES (?, ?)",
+            [(i, random.choice(CATEGORIES)) for i in range(1, NUM_ARTICLES + 1) for _ in range(2)],
+        )
+        conn.commit()
+
+
+async def count_article_service_queries(per_page):
+    statements.clear()
+    page = await article_service.get_articles(page=2, per_page=per_page)
+    assert len(page.items) == per_page
+    assert all(item.categories and item.source_name != "Unknown Source" for item in page.items)
+    return len(statements)
+
+
+def count_search_queries(limit):
+    counted = []
+    conn = sqlite3.connect(os.environ["TRACKING_DB_PATH"], uri=True)
+    conn.row_factory = sqlite3.Row
+    attach_read_only(conn, "sources_db", os.environ["SOURCES_DB_PATH"])
+    # FTS5 runs its own statements on the shadow tables: nested ones prefixed with "--" (index pages, bm25 doc sizes),
+    # plus a config and data_version read addressed as 'main'.<table>. None of them are issued by the search code.
+    conn.set_trace_callback(lambda sql: None if sql.startswith("--") or "'main'." in sql else counted.append(sql))
+    cursor = conn.cursor()
+    results = _execute_search(cursor, ["ai"], (datetime.now() - timedelta(days=30)).isoformat(), "OR", limit)
+    _add_article_categories(cursor, results)
+    conn.close()
+    assert len(results) == limit and all(article["categories"] and article["source_name"] != "Unknown Source" for article in results)
+    return len(counted)
+
+
+async def main():
+    connection.ConnectionPool._open = _traced_open
+    seed_databases()
+    await article_service.get_articles(page=1, per_page=10)
+    service_counts = {per_page: await count_article_service_queries(per_page) for per_page in PAGE_SIZES}
+    search_counts = {limit: count_search_queries(limit) for limit in PAGE_SIZES}
+    print(f"ArticleService.get_articles queries per page: {service_counts}")
+    print(f"utils.get_articles search queries per page:   {search_counts}")
+    assert service_counts == {per_page: SERVICE_STATEMENTS for per_page in PAGE_SIZES}, service_counts
+    assert search_counts == {limit: SEARCH_STATEMENTS for limit in PAGE_SIZES}, search_counts
+    print("Query count is constant per page.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
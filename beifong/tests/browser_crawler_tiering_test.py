@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import socket
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from tools.browser_crawler import PlaywrightScraper
+
+NUM_STATIC = 8
+NUM_SHELLS = 2
+SENTENCE = "The committee approved the new budget after a long debate about transport and housing priorities. "
+
+
+def article_page(n):
+    paragraphs = "".join(f"<p>{SENTENCE * 4}Paragraph {i} of story {n}.</p>" for i in range(12))
+    return (
+        f"<html><head><title>Story {n}</title><meta name='author' content='Desk'></head>"
+        f"<body><nav>Home | News</nav><article><h1>Story {n}</h1>{paragraphs}</article></body></html>"
+    )
+
+
+def shell_page(n):
+    return (
+        f"<html><head><title>Loading</title></head><body><div id='root'></div>"
+        f"<noscript>Please enable JavaScript to view story {n}.</noscript><script src='/bundle.js'></script></body></html>"
+    )
+
+
+def build_stub_app():
+    app = FastAPI()
+    hits = {}
+
+    @app.middleware("http")
+    async def count_hits(request: Request, call_next):
+        hits[request.url.path] = hits.get(request.url.path, 0) + 1
+        return await call_next(request)
+
+    @app.get("/hits")
+    async def get_hits():
+        return hits
+
+    @app.get("/story/{n}")
+    async def story(n: int):
+        return Response(article_page(n), media_type="text/html")
+
+    @app.get("/app/{n}")
+    async def app_shell(n: int):
+        return Response(shell_page(n), media_type="text/html")
+
+    @app.get("/doc/{n}.pdf")
+    async def pdf(n: int):
+        return Response(b"%PDF-1.4", media_type="application/pdf")
+
+    return app
+
+
+def serve_stub(port, ready):
+    ready.set()
+    uvicorn.run(build_stub_app(), host="127.0.0.1", port=port, log_level="warning")
+
+
+class RecordingScraper(PlaywrightScraper):
+    """Records which URLs reach the browser tier instead of launching Chromium."""
+
+    def __init__(self):
+        super().__init__(timeout=5000, use_cache=False)
+        self.rendered = []
+
+    def _scrape_with_browser(self, urls):
+        self.rendered.extend(urls)
+        return [{"original_url": url, "final_url": url, "full_text": "rendered", "success": True} for url in urls]
+
+
+def main():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_stub, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+
+    base = f"http://127.0.0.1:{port}"
+    static_urls = [f"{base}/story/{n}" for n in range(NUM_STATIC)]
+    shell_urls = [f"{base}/app/{n}" for n in range(NUM_SHELLS)]
+    urls = static_urls[:4] + shell_urls + static_urls[4:] + [f"{base}/doc/1.pdf"]
+    scraper = RecordingScraper()
+    started = time.perf_counter()
+    results = scraper.scrape_urls(urls)
+    elapsed = time.perf_counter() - started
+    hits = httpx.get(f"{base}/hits").json()
+    server.terminate()
+    server.join()
+
+    assert [result["original_url"] for result in results] == urls
+    assert scraper.rendered == shell_urls, scraper.rendered
+    by_url = {result["original_url"]: result for result in results}
+    for url in static_urls:
+        result = by_url[url]
+        assert result["success"] and result["fetched_with"] == "static", result
+        assert SENTENCE.strip() in result["full_text"] and result["title"].startswith("Story")
+    assert all(by_url[url]["fetched_with"] == "browser" for url in shell_urls)
+    pdf = by_url[f"{base}/doc/1.pdf"]
+    assert not pdf["success"] and pdf["fetched_with"] == "static", pdf
+    # newspaper extracts from the fetched document; nothing is downloaded twice.
+    assert all(hits[url[len(base):]] == 1 for url in static_urls), hits
+    print(f"{len(urls)} URLs in {elapsed:.2f}s: {NUM_STATIC} static, {len(scraper.rendered)} sent to the browser, 1 non-HTML skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import socket
+import asyncio
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Response
+from utils.browser_pool import BrowserPool
+
+# Requires Chromium: python -m playwright install chromium
+NUM_SOURCES = 10
+LATENCIES = [0.2 + 0.15 * n for n in range(NUM_SOURCES)]
+
+
+def source_page(n):
+    images = "".join(f"<img src='/img/{n}-{i}.jpg'>" for i in range(5))
+    return (
+        f"<html><head><title>Source {n}</title><style>@font-face {{ font-family: F; src: url(/font/{n}.woff2); }} body {{ font-family: F; }}</style></head>"
+        f"<body><div id='root'></div>{images}<script>fetch('/api/{n}').then(r => r.text())"
+        f".then(t => document.getElementById('root').innerHTML = '<article>' + t + '</article>');</script></body></html>"
+    )
+
+
+def build_stub_app():
+    app = FastAPI()
+    hits = {"img": 0, "font": 0}
+
+    @app.get("/hits")
+    async def get_hits():
+        return hits
+
+    @app.get("/source/{n}")
+    async def source(n: int):
+        await asyncio.sleep(LATENCIES[n])
+        return Response(source_page(n), media_type="text/html")
+
+    @app.get("/api/{n}")
+    async def api(n: int):
+        return Response(f"Rendered body of source {n}", media_type="text/plain")
+
+    @app.get("/img/{name}")
+    async def image(name: str):
+        hits["img"] += 1
+        return Response(b"\x89PNG" + b"\0" * 50000, media_type="image/png")
+
+    @app.get("/font/{name}")
+    async def font(name: str):
+        hits["font"] += 1
+        return Response(b"\0" * 50000, media_type="font/woff2")
+
+    return app
+
+
+def serve_stub(port, ready):
+    ready.set()
+    uvicorn.run(build_stub_app(), host="127.0.0.1", port=port, log_level="warning")
+
+
+def main():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_stub, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+
+    base = f"http://127.0.0.1:{port}"
+    urls = [f"{base}/source/{n}" for n in range(NUM_SOURCES)]
+    print(f"{NUM_SOURCES} JS-rendered sources, {min(LATENCIES):.2f}-{max(LATENCIES):.2f}s server latency ({sum(LATENCIES):.2f}s in total)")
+    with BrowserPool() as pool:
+        pool.render_many([f"{base}/source/0"])
+        started = time.perf_counter()
+        results = pool.render_many(urls)
+        elapsed = time.perf_counter() - started
+    hits = httpx.get(f"{base}/hits").json()
+    server.terminate()
+    server.join()
+
+    assert all(not result["error"] for result in results), [result["error"] for result in results]
+    assert all(f"Rendered body of source {n}" in result["html"] for n, result in enumerate(results))
+    print(f"{'BrowserPool (warm)':<22} {elapsed:6.2f}s  slowest source {max(LATENCIES):.2f}s, {hits['img']} images, {hits['font']} fonts fetched")
+    assert hits["img"] == 0 and hits["font"] == 0, hits
+    assert elapsed < max(LATENCIES) + 1.0, elapsed
+
+
+if __name__ == "__main__":
+    main()
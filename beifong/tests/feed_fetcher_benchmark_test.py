@@ -0,0 +1,171 @@
+import io
+import os
+import sys
+import time
+import socket
+import asyncio
+import tempfile
+import multiprocessing
+import contextlib
+from email.utils import formatdate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCH_DIR = tempfile.mkdtemp(prefix="beifong_feeds_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(BENCH_DIR, "feed_tracking.db")
+os.environ["SOURCES_DB_PATH"] = os.path.join(BENCH_DIR, "sources.db")
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from db.connection import db_connection
+from services.db_init import init_tracking_db, init_sources_db
+from processors.feed_processor import fetch_and_process_feeds
+from utils.rss_feed_parser import get_feed_data
+
+NUM_FEEDS = 1000
+NUM_HOSTS = 20
+ENTRIES_PER_FEED = 20
+STUB_LATENCY = float(os.environ.get("STUB_LATENCY_MS", 100)) / 1000
+HOST_DELAY = 0.05
+SEQUENTIAL_SAMPLE = 50
+LAST_MODIFIED = formatdate(usegmt=True)
+
+
+def feed_document(feed_id, version=1, edited=False):
+    """Feed with ENTRIES_PER_FEED items; each later version adds one newer item on top. edited retitles story 0."""
+    items = "".join(
+        f"<item><title>Feed {feed_id} story {n}{' (corrected)' if edited and n == 0 else ''}</title>"
+        f"<link>https://news{feed_id}.example.com/{n}</link>"
+        f"<guid>feed-{feed_id}-{n}</guid><pubDate>{LAST_MODIFIED}</pubDate>"
+        f"<description>Story {n} from feed {feed_id}. {'Lorem ipsum dolor sit amet. ' * 20}</description></item>"
+        for n in reversed(range(ENTRIES_PER_FEED + version - 1))
+    )
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {feed_id}</title>'
+        f"<link>https://news{feed_id}.example.com/</link><description>Stub feed</description>{items}</channel></rss>"
+    ).encode()
+
+
+def build_stub_app():
+    app = FastAPI()
+    state = {"version": 1, "edited": False}
+    documents = {}
+
+    @app.post("/publish")
+    async def publish():
+        state["version"] += 1
+        return {"version": state["version"]}
+
+    @app.post("/edit")
+    async def edit():
+        state["edited"] = True
+        return {"edited": True}
+
+    @app.get("/feed/{feed_id}.xml")
+    async def feed(feed_id: int, request: Request):
+        version, edited = state["version"], state["edited"]
+        etag = f'"feed-{feed_id}-v{version}{"-edited" if edited else ""}"'
+        await asyncio.sleep(STUB_LATENCY)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        if (feed_id, version, edited) not in documents:
+            documents[(feed_id, version, edited)] = feed_document(feed_id, version, edited)
+        return Response(documents[(feed_id, version, edited)], media_type="application/rss+xml", headers={"ETag": etag, "Last-Modified": LAST_MODIFIED})
+
+    return app
+
+
+def serve_stub(port, ready):
+    sockets = []
+    for host in range(1, NUM_HOSTS + 1):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((f"127.0.0.{host}", port))
+        sockets.append(sock)
+    server = uvicorn.Server(uvicorn.Config(build_stub_app(), log_level="warning", backlog=4096))
+    ready.set()
+    server.run(sockets=sockets)
+
+
+def start_stub_server():
+    """Serve the stub app on 127.0.0.1..127.0.0.NUM_HOSTS, in its own process so it does not share our GIL."""
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve_stub, args=(port, ready), daemon=True)
+    process.start()
+    ready.wait()
+    for host in range(1, NUM_HOSTS + 1):
+        while True:
+            try:
+                socket.create_connection((f"127.0.0.{host}", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+    return process, port
+
+
+def feed_url(feed_id, port):
+    return f"http://127.0.0.{(feed_id % NUM_HOSTS) + 1}:{port}/feed/{feed_id}.xml"
+
+
+def seed_sources(port):
+    init_sources_db()
+    init_tracking_db()
+    with db_connection(os.environ["SOURCES_DB_PATH"]) as conn:
+        conn.executemany("INSERT INTO sources (id, name) VALUES (?, ?)", [(i, f"Source {i}") for i in range(1, 51)])
+        conn.executemany(
+            "INSERT INTO source_feeds (id, source_id, feed_url, feed_type) VALUES (?, ?, ?, 'rss')",
+            [(i, (i % 50) + 1, feed_url(i, port)) for i in range(1, NUM_FEEDS + 1)],
+        )
+        conn.commit()
+
+
+def timed_run(label, force=False):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = fetch_and_process_feeds(delay_between_feeds=HOST_DELAY, force=force)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<28} {elapsed:6.2f}s  {stats['due_feeds'] / elapsed:7.1f} feeds/s  due={stats['due_feeds']} processed={stats['processed_feeds']} "
+        f"unchanged={stats['unchanged_feeds']} failed={stats['failed_feeds']} new_entries={stats['new_entries']}"
+    )
+    return stats
+
+
+def main():
+    server, port = start_stub_server()
+    seed_sources(port)
+    print(
+        f"{NUM_FEEDS} feeds on {NUM_HOSTS} hosts, {STUB_LATENCY * 1000:.0f} ms stub latency, "
+        f"{HOST_DELAY}s per-host delay, {os.cpu_count()} CPU(s)"
+    )
+    started = time.perf_counter()
+    for feed_id in range(1, SEQUENTIAL_SAMPLE + 1):
+        get_feed_data(feed_url(feed_id, port))
+    sequential_rate = SEQUENTIAL_SAMPLE / (time.perf_counter() - started)
+    print(f"{'sequential get_feed_data':<28} {SEQUENTIAL_SAMPLE} feeds, {sequential_rate:7.1f} feeds/s (before the 1-2s sleep per feed)")
+    cold = timed_run("concurrent, cold (200)")
+    warm = timed_run("concurrent, warm (304)", force=True)
+    scheduled = timed_run("scheduled (none due)")
+    httpx.post(f"http://127.0.0.1:{port}/publish")
+    published = timed_run("one new entry per feed", force=True)
+    httpx.post(f"http://127.0.0.1:{port}/edit")
+    edited = timed_run("one edited entry per feed", force=True)
+    server.terminate()
+    server.join()
+    with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM feed_entries").fetchone()[0]
+        corrected = conn.execute("SELECT COUNT(*) FROM feed_entries WHERE title LIKE '% story 0 (corrected)'").fetchone()[0]
+    assert cold["processed_feeds"] == NUM_FEEDS and cold["new_entries"] == NUM_FEEDS * ENTRIES_PER_FEED, cold
+    assert warm["unchanged_feeds"] == NUM_FEEDS, warm
+    assert scheduled["due_feeds"] == 0, scheduled
+    assert published["processed_feeds"] == NUM_FEEDS and published["new_entries"] == NUM_FEEDS, published
+    assert edited["processed_feeds"] == NUM_FEEDS and edited["new_entries"] == NUM_FEEDS, edited
+    assert stored == NUM_FEEDS * (ENTRIES_PER_FEED + 1) and corrected == NUM_FEEDS, (stored, corrected)
+
+
+if __name__ == "__main__":
+    main()
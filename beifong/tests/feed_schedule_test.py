@@ -0,0 +1,68 @@
+import os
+import sys
+import random
+import bisect
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.feed_schedule import next_poll_interval, next_due_ts, FEED_MIN_INTERVAL
+
+DAYS = 7
+RUN_EVERY = 15 * 60
+FEED_WINDOW = 20
+# Feed profiles: (label, feeds, mean entries per day)
+PROFILES = [("busy", 50, 48), ("hourly-ish", 150, 8), ("daily", 400, 1), ("weekly", 300, 1 / 7), ("dormant", 100, 0)]
+
+
+def publish_times(rng, per_day):
+    times, now, horizon = [], 0.0, DAYS * 86400
+    while per_day and now < horizon:
+        now += rng.expovariate(per_day / 86400)
+        if now < horizon:
+            times.append(now)
+    return times
+
+
+def simulate(published, adaptive):
+    """Poll one feed every processor run (or only when due); return (requests, total detection delay)."""
+    requests, delay, seen, interval, due = 0, 0.0, 0, None, 0
+    for run in range(0, DAYS * 86400, RUN_EVERY):
+        if adaptive and run < due:
+            continue
+        requests += 1
+        available = bisect.bisect_right(published, run)
+        new_entries = available - seen
+        delay += sum(run - t for t in published[seen:available])
+        seen = available
+        interval = next_poll_interval(interval, new_entries, FEED_WINDOW if new_entries >= FEED_WINDOW else 0)
+        due = next_due_ts(run, interval)
+    return requests, delay, seen
+
+
+def main():
+    rng = random.Random(3)
+    print(f"{DAYS} days, processor every {RUN_EVERY // 60} min, min interval {FEED_MIN_INTERVAL // 60} min")
+    print(f"{'profile':<12} {'feeds':>6} {'fixed req':>10} {'adaptive req':>13} {'saved':>7} {'fixed delay':>12} {'adaptive delay':>15}")
+    totals = [0, 0]
+    for label, feeds, per_day in PROFILES:
+        fixed = [0, 0.0, 0]
+        adaptive = [0, 0.0, 0]
+        for _ in range(feeds):
+            published = publish_times(rng, per_day)
+            for result, is_adaptive in ((fixed, False), (adaptive, True)):
+                for i, value in enumerate(simulate(published, is_adaptive)):
+                    result[i] += value
+        totals[0] += fixed[0]
+        totals[1] += adaptive[0]
+        fixed_delay = fixed[1] / fixed[2] / 60 if fixed[2] else 0
+        adaptive_delay = adaptive[1] / adaptive[2] / 60 if adaptive[2] else 0
+        print(
+            f"{label:<12} {feeds:>6} {fixed[0]:>10,} {adaptive[0]:>13,} {1 - adaptive[0] / fixed[0]:>6.0%} "
+            f"{fixed_delay:>9.1f} min {adaptive_delay:>11.1f} min"
+        )
+    print(f"{'total':<12} {'':>6} {totals[0]:>10,} {totals[1]:>13,} {1 - totals[1] / totals[0]:>6.0%}")
+    assert totals[1] < totals[0] / 3, totals
+
+
+if __name__ == "__main__":
+    main()
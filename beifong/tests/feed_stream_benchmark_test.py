@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import tracemalloc
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rss_feed_parser import parse_feed_document, entry_key
+
+NUM_ITEMS = int(os.environ.get("FEED_STREAM_ITEMS", 10000))
+PARAGRAPH = "<p>" + "Archive feeds repeat every article they ever published, full text included. " * 12 + "</p>"
+HEADERS = {"content-type": "application/rss+xml"}
+HTML_DESCRIPTION_FEED = (
+    b'<?xml version="1.0"?><rss version="2.0"><channel><title>Markup</title><item><title>Tags &amp; handlers</title>'
+    b"<link>https://markup.example.com/1</link><guid>markup-1</guid><description>&lt;p onclick=\"track()\"&gt;Breaking &amp;amp; "
+    b"&lt;b&gt;bold&lt;/b&gt;&lt;/p&gt;&lt;script&gt;alert(1)&lt;/script&gt;\n  &lt;img src=\"a.png\"&gt;</description>"
+    b'<content:encoded xmlns:content="http://purl.org/rss/1.0/modules/content/"><![CDATA[<div onload="track()">'
+    b'<a href="javascript:run()">Read</a><iframe src="https://ads.example.com"></iframe> on</div>]]></content:encoded></item></channel></rss>'
+)
+
+
+def archive_feed():
+    items = "".join(
+        f"<item><title>Archive story {n}</title><link>https://archive.example.com/{n}</link><guid>archive-{n}</guid>"
+        f"<pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate><description>Summary of story {n}</description>"
+        f"<content:encoded><![CDATA[{PARAGRAPH * 3}]]></content:encoded></item>"
+        for n in reversed(range(NUM_ITEMS))
+    )
+    return (
+        '<?xml version="1.0"?><rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+        f"<channel><title>Archive</title><link>https://archive.example.com/</link>{items}</channel></rss>"
+    ).encode()
+
+
+def test_both_paths_store_the_same_entry():
+    """A feed that switches between feedparser and streaming stores the same sanitized markup and must not look edited."""
+    streamed, parsed = (parse_feed_document(HTML_DESCRIPTION_FEED, HEADERS, stream=stream)["parsed_entries"][0] for stream in (True, False))
+    assert streamed["fingerprint"] == parsed["fingerprint"], (streamed["summary"], parsed["summary"])
+    assert (streamed["summary"], streamed["content"]) == (parsed["summary"], parsed["content"]), (streamed, parsed)
+    assert not any(markup in streamed["summary"] + streamed["content"] for markup in ("<script", "onclick", "onload", "javascript:", "<iframe"))
+
+
+def measure(mode, path, results):
+    with open(path, "rb") as f:
+        document = f.read()
+    seen = None
+    options = {}
+    if mode == "feedparser, unbounded":
+        options = {"stream": False, "max_entries": 0, "max_content": 0}
+    elif mode == "feedparser, bounded":
+        options = {"stream": False}
+    elif mode == "stream, unbounded":
+        options = {"stream": True, "max_entries": 0, "max_content": 0}
+    elif mode == "stream, bounded":
+        options = {"stream": True}
+    elif mode == "stream, 5 new":
+        seen = {entry_key(f"archive-{n}") for n in range(NUM_ITEMS - 5)}
+        options = {"stream": True}
+    started = time.perf_counter()
+    result = parse_feed_document(document, HEADERS, seen=seen, **options)
+    elapsed = time.perf_counter() - started
+    del result
+    # Second, traced pass for the peak of Python allocations (feedparser's tree and the entry dicts).
+    tracemalloc.start()
+    result = parse_feed_document(document, HEADERS, seen=seen, **options)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    results.put((mode, len(document), elapsed, peak / 2**20, len(result["parsed_entries"]), result["entry_count"]))
+
+
+def main():
+    test_both_paths_store_the_same_entry()
+    modes = ["feedparser, unbounded", "feedparser, bounded", "stream, unbounded", "stream, bounded", "stream, 5 new"]
+    path = os.path.join(tempfile.mkdtemp(prefix="beifong_feed_"), "archive.xml")
+    with open(path, "wb") as f:
+        f.write(archive_feed())
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    print(f"{'mode':<24} {'parse':>9} {'peak alloc':>11} {'entries':>8} {'read':>7}")
+    for mode in modes:
+        process = context.Process(target=measure, args=(mode, path, results))
+        process.start()
+        mode, size, elapsed, peak_mb, parsed, read = results.get()
+        process.join()
+        print(f"{mode:<24} {elapsed * 1000:7.0f}ms {peak_mb:8.0f} MiB {parsed:>8} {read:>7}")
+    print(f"document: {NUM_ITEMS} items, {size / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+import statistics
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCH_DIR = tempfile.mkdtemp(prefix="beifong_fts_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(BENCH_DIR, "feed_tracking.db")
+
+from services.db_init import init_tracking_db
+from services.article_service import ARTICLE_LIST_SELECT, ARTICLE_LIST_FROM, ARTICLE_LIST_WHERE, ARTICLE_LIST_ORDER, ARTICLE_SEARCH_FILTER
+from db.fulltext import match_query, match_terms, bm25_rank, rebuild_fts
+
+NUM_ARTICLES = int(os.environ.get("FTS_BENCH_ARTICLES", 1_000_000))
+VOCABULARY_SIZE = 20000
+INSERT_BATCH = 10000
+RUNS = 5
+SYLLABLES = ["ka", "lo", "mi", "ter", "ran", "sol", "vex", "dro", "pel", "quin", "zu", "bar", "nor", "tic", "ase", "lum"]
+# The old ArticleService.get_articles(search=) filter, kept here as the baseline.
+LIKE_FILTER = "AND (ca.title LIKE ? OR ca.summary LIKE ?)"
+
+
+def build_vocabulary():
+    rng = random.Random(7)
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def seed(vocabulary):
+    rng = random.Random(11)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    now = int(time.time())
+
+    def text(count):
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=count))
+
+    conn = sqlite3.connect(os.environ["TRACKING_DB_PATH"])
+    started = time.perf_counter()
+    for start in range(1, NUM_ARTICLES + 1, INSERT_BATCH):
+        rows = [
+            (i, f"https://example.com/a/{i}", text(8), text(30), text(60), "2024-01-01T00:00:00", now - i * 60)
+            for i in range(start, min(start + INSERT_BATCH, NUM_ARTICLES + 1))
+        ]
+        conn.executemany(
+            """
+            INSERT INTO crawled_articles (id, url, title, summary, published_date, published_ts, processed, ai_status)
+            VALUES (?, ?, ?, ?, ?, ?, 1, 'success')
+            """,
+            [row[:4] + row[5:] for row in rows],
+        )
+        conn.executemany("INSERT INTO article_bodies (article_id, content) VALUES (?, ?)", [(row[0], row[4]) for row in rows])
+        conn.commit()
+    conn.close()
+    return time.perf_counter() - started
+
+
+def timed(conn, sql, params):
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(rows)
+
+
+def listing_queries(filter_sql):
+    where = f"{ARTICLE_LIST_FROM} {ARTICLE_LIST_WHERE} {filter_sql}"
+    return f"{ARTICLE_LIST_SELECT.split(', COALESCE')[0]} {where} {ARTICLE_LIST_ORDER} LIMIT 21", f"SELECT COUNT(*) {where}"
+
+
+def main():
+    vocabulary = build_vocabulary()
+    init_tracking_db()
+    print(f"Seeding {NUM_ARTICLES} articles in {BENCH_DIR} ...")
+    elapsed = seed(vocabulary)
+    print(f"insert with trigger sync: {elapsed:.1f}s ({NUM_ARTICLES / elapsed:,.0f} rows/s)")
+    started = time.perf_counter()
+    rebuild_fts("tracking_db")
+    print(f"rebuild + optimize:       {time.perf_counter() - started:.1f}s")
+    print(f"database size:            {os.path.getsize(os.environ['TRACKING_DB_PATH']) / 2**20:,.0f} MiB")
+
+    searches = {
+        "common word": vocabulary[3],
+        "mid word": vocabulary[800],
+        "rare word": vocabulary[15000],
+        "prefix": vocabulary[800][:5],
+        "phrase": f'"{vocabulary[3]} {vocabulary[10]}"',
+    }
+    conn = sqlite3.connect(os.environ["TRACKING_DB_PATH"])
+    like_list, like_count = listing_queries(LIKE_FILTER)
+    fts_list, fts_count = listing_queries(ARTICLE_SEARCH_FILTER)
+    print(f"\n{'ArticleService search':<22} {'LIKE page':>12} {'LIKE count':>12} {'FTS page':>12} {'FTS count':>12} {'matches':>10}")
+    for label, search in searches.items():
+        like_param = f"%{search.strip(chr(34))}%"
+        like_page_ms, _ = timed(conn, like_list, (like_param, like_param))
+        like_count_ms, _ = timed(conn, like_count, (like_param, like_param))
+        fts_page_ms, _ = timed(conn, fts_list, (match_query(search),))
+        fts_count_ms, _ = timed(conn, fts_count, (match_query(search),))
+        matches = conn.execute(fts_count, (match_query(search),)).fetchone()[0]
+        print(f"{label:<22} {like_page_ms:9.1f} ms {like_count_ms:9.1f} ms {fts_page_ms:9.1f} ms {fts_count_ms:9.1f} ms {matches:>10,}")
+
+    terms = [vocabulary[800], vocabulary[15000], f"{vocabulary[3]} {vocabulary[10]}"]
+    like_clauses = " OR ".join("(ca.title LIKE ? OR b.content LIKE ? OR ca.summary LIKE ?)" for _ in terms)
+    like_search = f"SELECT ca.id FROM crawled_articles ca JOIN article_bodies b ON b.article_id = ca.id WHERE ca.processed = 1 AND ({like_clauses}) ORDER BY ca.published_date DESC LIMIT 20"
+    like_params = [f"%{term}%" for term in terms for _ in range(3)]
+    fts_search = (
+        f"SELECT ca.id FROM crawled_articles_fts JOIN crawled_articles ca ON ca.id = crawled_articles_fts.rowid "
+        f"WHERE crawled_articles_fts MATCH ? AND ca.processed = 1 ORDER BY {bm25_rank('tracking_db')} LIMIT 20"
+    )
+    like_ms, _ = timed(conn, like_search, like_params)
+    fts_ms, _ = timed(conn, fts_search, (match_terms(terms),))
+    print(f"\nagent term search ({len(terms)} terms): LIKE {like_ms:.1f} ms, FTS bm25 {fts_ms:.1f} ms")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BATCH_DIR = tempfile.mkdtemp(prefix="beifong_llm_batch_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(BATCH_DIR, "feed_tracking.db")
+os.environ["LLM_BATCH_DIR"] = os.path.join(BATCH_DIR, "requests")
+
+import httpx
+import uvicorn
+from openai import OpenAI
+from fastapi import FastAPI, Request, UploadFile, File, Form
+from fastapi.responses import PlainTextResponse
+from db.connection import db_connection
+from db.llm_batches import get_open_batch_jobs, update_batch_job
+from services.db_init import init_tracking_db
+from processors.llm_batch_processor import run_batch, parse_batch_output, prepare_embedding_batch
+
+TRACKING_DB_PATH = os.environ["TRACKING_DB_PATH"]
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_batch_output_sample.jsonl")
+NUM_ARTICLES = 120
+# The fake Batch API fails every 10th request and finishes a batch on the third status check.
+FAIL_EVERY = 10
+POLLS_TO_COMPLETE = 3
+
+
+def build_fake_openai():
+    app = FastAPI()
+    files, batches = {}, {}
+    state = {"expire_next": False}
+
+    def new_file(content, purpose, filename):
+        file_id = f"file-{len(files) + 1}"
+        files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()), "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def respond(request):
+        article_id = int(request["custom_id"].rsplit("-", 1)[1])
+        line = {"id": f"batch_req_{request['custom_id']}", "custom_id": request["custom_id"], "error": None}
+        if article_id % FAIL_EVERY == 0:
+            line["response"] = {"status_code": 500, "request_id": "req", "body": {"error": {"message": "The server had an error", "type": "server_error"}}}
+        elif request["url"] == "/v1/embeddings":
+            body = {"object": "list", "data": [{"object": "embedding", "index": 0, "embedding": [article_id / 1000, 0.5, -0.25]}], "model": request["body"]["model"]}
+            line["response"] = {"status_code": 200, "request_id": "req", "body": body}
+        else:
+            title = request["body"]["messages"][1]["content"].split("Article Title: ", 1)[1].split("\n", 1)[0]
+            content = json.dumps({"categories": ["news", "transport"], "summary": f"Summary of {title}.", "content": f"Body of {title}."})
+            choice = {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            body = {"id": "chatcmpl", "object": "chat.completion", "created": int(time.time()), "model": request["body"]["model"], "choices": [choice]}
+            line["response"] = {"status_code": 200, "request_id": "req", "body": body}
+        return line
+
+    def finish(batch):
+        requests = [json.loads(line) for line in files[batch["input_file_id"]].decode().splitlines()]
+        if state["expire_next"]:
+            # Only the first half ran before the completion window closed.
+            state["expire_next"] = False
+            batch["status"] = "expired"
+            requests = requests[: len(requests) // 2]
+        else:
+            batch["status"] = "completed"
+        lines = [respond(request) for request in requests]
+        output = [line for line in lines if line["response"]["status_code"] == 200]
+        errors = [line for line in lines if line["response"]["status_code"] != 200]
+        batch["output_file_id"] = new_file("".join(json.dumps(line) + "\n" for line in output).encode(), "batch_output", "output.jsonl")["id"]
+        if errors:
+            batch["error_file_id"] = new_file("".join(json.dumps(line) + "\n" for line in errors).encode(), "batch_output", "errors.jsonl")["id"]
+        batch["request_counts"] = {"total": batch["request_counts"]["total"], "completed": len(output), "failed": len(errors)}
+
+    @app.post("/v1/files")
+    async def create_file(file: UploadFile = File(...), purpose: str = Form(...)):
+        return new_file(await file.read(), purpose, file.filename)
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        return PlainTextResponse(files[file_id].decode())
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request):
+        body = await request.json()
+        total = len(files[body["input_file_id"]].splitlines())
+        batch = {
+            "id": f"batch_{len(batches) + 1}",
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "completion_window": body["completion_window"],
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "errors": None,
+            "metadata": body.get("metadata"),
+            "request_counts": {"total": total, "completed": 0, "failed": 0},
+            "polls": 0,
+        }
+        batches[batch["id"]] = batch
+        return batch
+
+    @app.get("/v1/batches/{batch_id}")
+    async def retrieve_batch(batch_id: str):
+        batch = batches[batch_id]
+        batch["polls"] += 1
+        if batch["status"] == "validating":
+            batch["status"] = "in_progress"
+        elif batch["status"] == "in_progress" and batch["polls"] >= POLLS_TO_COMPLETE:
+            finish(batch)
+        return batch
+
+    @app.get("/v1/batches")
+    async def list_batches():
+        return {"object": "list", "data": list(reversed(batches.values())), "has_more": False}
+
+    @app.post("/control/expire_next")
+    async def expire_next():
+        state["expire_next"] = True
+        return state
+
+    @app.get("/stats")
+    async def stats():
+        return {"files": len(files), "batches": {batch["id"]: batch["endpoint"] for batch in batches.values()}}
+
+    return app
+
+
+def serve_fake_openai(port, ready):
+    ready.set()
+    uvicorn.run(build_fake_openai(), host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_fake_openai():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_fake_openai, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return server, port
+
+
+def count(query):
+    with db_connection(TRACKING_DB_PATH) as conn:
+        return conn.execute(query).fetchone()[0]
+
+
+def test_parse_fixture():
+    with open(FIXTURE_PATH) as f:
+        lines = [json.loads(line) for line in f]
+    parsed = {article_id: (result, error) for article_id, result, error in parse_batch_output("analysis", lines[:5])}
+    assert parsed[1][0]["categories"] == ["politics", "transport"] and parsed[1][1] is None
+    assert parsed[2][0]["categories"] == ["economy", "housing"]
+    assert parsed[3][0] is None and "maximum context length" in parsed[3][1]
+    assert parsed[4][0] is None and parsed[4][1].startswith("Unreadable batch response")
+    assert parsed[5][0] is None and "completion window expired" in parsed[5][1]
+    [(article_id, (embedding, model), error)] = parse_batch_output("embedding", lines[5:])
+    assert article_id == 7 and embedding == [0.0125, -0.031, 0.002] and model == "text-embedding-3-small" and error is None
+    print("fixture: parsed 2 analyses, 3 failures and 1 embedding")
+
+
+def main():
+    test_parse_fixture()
+    server, port = start_fake_openai()
+    base_url = f"http://127.0.0.1:{port}/v1"
+    stats = lambda: httpx.get(f"http://127.0.0.1:{port}/stats").json()
+    init_tracking_db()
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.executemany(
+            "INSERT INTO crawled_articles (id, entry_id, title, url, published_ts) VALUES (?, ?, ?, ?, ?)",
+            [(n, n, f"Story {n}", f"https://example.com/{n}", 1700000000 + n) for n in range(1, NUM_ARTICLES + 1)],
+        )
+        conn.executemany(
+            "INSERT INTO article_bodies (article_id, clean_text, metadata) VALUES (?, ?, '{}')",
+            [(n, f"Story {n}. " + "The council approved the new tram line after a long debate. " * 40) for n in range(1, NUM_ARTICLES + 1)],
+        )
+        conn.commit()
+    failing = NUM_ARTICLES // FAIL_EVERY
+
+    # Analysis, interrupted after submitting and resumed by a second run.
+    still_open = run_batch(openai_api_key="test-key", kind="analysis", wait=False, base_url=base_url)
+    assert still_open == 1 and count("SELECT COUNT(*) FROM crawled_articles WHERE ai_status = 'batched'") == NUM_ARTICLES
+    assert run_batch(openai_api_key="test-key", kind="analysis", poll_interval=0.05, base_url=base_url) == 0
+    analyzed = count("SELECT COUNT(*) FROM crawled_articles WHERE ai_status = 'success' AND processed = 1")
+    categorized = count("SELECT COUNT(DISTINCT article_id) FROM article_categories")
+    errored = count("SELECT COUNT(*) FROM crawled_articles WHERE ai_status = 'error' AND ai_error LIKE '%server had an error%'")
+    print(f"analysis: {analyzed} analyzed, {errored} failed, in {len(stats()['batches'])} batch")
+    assert analyzed == categorized == NUM_ARTICLES - failing and errored == failing
+    assert len(stats()["batches"]) == 1
+
+    # Embeddings, interrupted after the batch was created but before its id was recorded.
+    client = OpenAI(api_key="test-key", base_url=base_url)
+    job_id = prepare_embedding_batch(TRACKING_DB_PATH)
+    [job] = get_open_batch_jobs(TRACKING_DB_PATH, "embedding")
+    with open(job["input_path"], "rb") as f:
+        input_file_id = client.files.create(file=f, purpose="batch").id
+    update_batch_job(TRACKING_DB_PATH, job_id, input_file_id=input_file_id)
+    client.batches.create(input_file_id=input_file_id, endpoint="/v1/embeddings", completion_window="24h")
+    assert run_batch(openai_api_key="test-key", kind="embedding", poll_interval=0.05, base_url=base_url) == 0
+    embedded = count("SELECT COUNT(*) FROM article_embeddings")
+    embedding_batches = [endpoint for endpoint in stats()["batches"].values() if endpoint == "/v1/embeddings"]
+    print(f"embedding: resumed job {job_id}, {embedded} embeddings stored, {len(embedding_batches)} batch created")
+    assert len(embedding_batches) == 1
+    assert embedded == NUM_ARTICLES - failing
+    assert count("SELECT COUNT(*) FROM crawled_articles WHERE embedding_status = 'batched'") == 0
+
+    # An expired batch keeps the half that ran and releases the rest.
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.execute("DELETE FROM article_embeddings")
+        conn.execute("UPDATE crawled_articles SET embedding_status = NULL")
+        conn.commit()
+    httpx.post(f"http://127.0.0.1:{port}/control/expire_next")
+    assert run_batch(openai_api_key="test-key", kind="embedding", poll_interval=0.05, base_url=base_url) == 0
+    with db_connection(TRACKING_DB_PATH) as conn:
+        job = conn.execute("SELECT status, error, succeeded, failed, released FROM llm_batch_jobs ORDER BY id DESC").fetchone()
+    released = count("SELECT COUNT(*) FROM crawled_articles WHERE ai_status = 'success' AND embedding_status IS NULL")
+    print(f"expired: {job['succeeded']} embedded, {job['failed']} failed, {job['released']} released for the next run")
+    assert job["status"] == "ingested" and job["error"] == "batch expired"
+    assert job["succeeded"] + job["failed"] + job["released"] == NUM_ARTICLES - failing and job["released"] == released > 0
+    assert not get_open_batch_jobs(TRACKING_DB_PATH)
+    server.terminate()
+    server.join()
+
+
+if __name__ == "__main__":
+    main()
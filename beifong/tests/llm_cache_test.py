@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import json
+import time
+import socket
+import asyncio
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DIR = tempfile.mkdtemp(prefix="beifong_llm_cache_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(CACHE_DIR, "feed_tracking.db")
+os.environ["LLM_CACHE_DB_PATH"] = os.path.join(CACHE_DIR, "llm_cache.db")
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from db.connection import db_connection
+from db.llm_cache import get_cached_response, get_llm_cache_stats, llm_cache_key, prune_llm_cache, store_response
+from services.db_init import init_tracking_db
+from processors.ai_analysis_processor import analyze_in_batches
+from utils.translate_podcast import translate_script
+from tools.social.x_agent import analyze_posts_sentiment
+
+TRACKING_DB_PATH = os.environ["TRACKING_DB_PATH"]
+STUB_LATENCY = 0.2
+NUM_STORIES = 30
+# How each wire story shows up across feeds, under the same headline: the original, a copy with different spacing, and one with an ad line.
+SYNDICATED_COPIES = 3
+# Paywalled pages whose bodies are only boilerplate; their titles must keep their analyses apart.
+PAYWALLED_TITLES = ["Mayor resigns", "Tram fares rise"]
+
+
+def build_fake_openai():
+    app = FastAPI()
+    counts = {"analysis": 0, "translation": 0, "sentiment": 0, "sentiment_posts": 0}
+
+    @app.get("/counts")
+    async def get_counts():
+        return counts
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(STUB_LATENCY)
+        system = body["messages"][0]["content"]
+        prompt = body["messages"][-1]["content"]
+        if "professional translator" in system:
+            counts["translation"] += 1
+            script = json.loads(prompt.split("Input script:", 1)[1])
+            content = {"script": [{"text": f"[fr] {entry['text']}", "speaker": entry["speaker"]} for entry in script]}
+        elif "POST (ID: " in prompt:
+            counts["sentiment"] += 1
+            post_ids = re.findall(r"POST \(ID: ([^)]+)\)", prompt)
+            counts["sentiment_posts"] += len(post_ids)
+            posts = [
+                {"post_id": post_id, "sentiment": "neutral", "categories": ["news"], "tags": ["transport"], "reasoning": "Factual update."}
+                for post_id in post_ids
+            ]
+            content = {"analyzed_posts": posts}
+        else:
+            counts["analysis"] += 1
+            title = prompt.split("Article Title: ", 1)[1].split("\n", 1)[0]
+            content = {"categories": ["news", "transport"], "summary": f"Summary of {title}.", "content": f"Body of {title}."}
+        completion = {
+            "id": "chatcmpl",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps(content)}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 40, "total_tokens": 140},
+        }
+        return JSONResponse(completion)
+
+    return app
+
+
+def serve_fake_openai(port, ready):
+    ready.set()
+    uvicorn.run(build_fake_openai(), host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_fake_openai():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_fake_openai, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return server, port
+
+
+def test_cache_store():
+    db_path = os.path.join(CACHE_DIR, "unit.db")
+    key = llm_cache_key("unit", "gpt-4o", 1, "The council  approved\nthe tram line.")
+    assert key == llm_cache_key("unit", "gpt-4o", 1, " The council approved the tram line. ")
+    assert key != llm_cache_key("unit", "gpt-4o", 2, "The council approved the tram line.")
+    assert key != llm_cache_key("unit", "gpt-4o-mini", 1, "The council approved the tram line.")
+    store_response("unit", key, "gpt-4o", 1, {"summary": "Approved."}, ttl=60, db_path=db_path, now=1000)
+    assert get_cached_response("unit", key, db_path, now=1059) == {"summary": "Approved."}
+    assert get_cached_response("unit", key, db_path, now=1060) is None
+    for n in range(5):
+        store_response("unit", f"key-{n}", "gpt-4o", 1, n, ttl=3600, db_path=db_path, now=2000 + n)
+    # key-0 was used most recently, so key-1 and key-2 are evicted first.
+    assert get_cached_response("unit", "key-0", db_path, now=2010) == 0
+    assert prune_llm_cache(db_path, max_entries=3, now=2020) == 3
+    assert [get_cached_response("unit", f"key-{n}", db_path, now=2020) for n in range(5)] == [0, None, None, 3, 4]
+
+
+def article_rows(start, stories, copies):
+    rows = []
+    for copy in copies:
+        for n in stories:
+            text = f"Story {n}.\n" + f"The council approved tram line {n} after a long debate. " * 30
+            if copy == 1:
+                text = text.replace("\n", "\n\n  ").replace(". ", ".  ")
+            elif copy == 2:
+                text = "Advertisement\n" + text
+            rows.append((start + len(rows), f"Story {n}", text))
+    return rows
+
+
+def paywalled_rows(start):
+    return [(start + n, title, "Subscribe to read\nAdvertisement\nShare this article") for n, title in enumerate(PAYWALLED_TITLES)]
+
+
+def insert_articles(rows):
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.executemany(
+            "INSERT INTO crawled_articles (id, entry_id, title, url, published_ts) VALUES (?, ?, ?, ?, ?)",
+            [(article_id, article_id, title, f"https://feed.example/{article_id}", 1700000000 + article_id) for article_id, title, _ in rows],
+        )
+        conn.executemany(
+            "INSERT INTO article_bodies (article_id, clean_text, metadata) VALUES (?, ?, '{}')",
+            [(article_id, text) for article_id, _, text in rows],
+        )
+        conn.commit()
+
+
+def main():
+    test_cache_store()
+    server, port = start_fake_openai()
+    base_url = f"http://127.0.0.1:{port}/v1"
+    os.environ["OPENAI_API_KEY"] = "test-key"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    counts = lambda: httpx.get(f"http://127.0.0.1:{port}/counts").json()
+    init_tracking_db()
+
+    rows = article_rows(1, range(NUM_STORIES), range(SYNDICATED_COPIES))
+    rows += paywalled_rows(len(rows) + 1)
+    insert_articles(rows)
+    started = time.perf_counter()
+    stats = analyze_in_batches(openai_api_key="test-key", batch_size=len(rows), base_url=base_url)
+    first_elapsed = time.perf_counter() - started
+    first_requests = counts()["analysis"]
+    # The same stories picked up again from other feeds on a later run.
+    later = article_rows(len(rows) + 1, range(0, NUM_STORIES, 3), range(SYNDICATED_COPIES))
+    insert_articles(later)
+    started = time.perf_counter()
+    later_stats = analyze_in_batches(openai_api_key="test-key", batch_size=len(later), base_url=base_url)
+    later_elapsed = time.perf_counter() - started
+    later_requests = counts()["analysis"] - first_requests
+    with db_connection(TRACKING_DB_PATH) as conn:
+        analyzed = conn.execute("SELECT COUNT(*) FROM crawled_articles WHERE ai_status = 'success'").fetchone()[0]
+        categorized = conn.execute("SELECT COUNT(DISTINCT article_id) FROM article_categories").fetchone()[0]
+        paywalled = [row[0] for row in conn.execute("SELECT summary FROM crawled_articles WHERE title IN (?, ?) ORDER BY id", PAYWALLED_TITLES)]
+
+    script = [{"text": "Welcome to the show.", "speaker": "ALEX"}, {"text": "Today: the tram line.", "speaker": "MORGAN"}]
+    first_translation = translate_script(script, "fr")
+    again = translate_script([{"text": " Welcome to the show. ", "speaker": "ALEX"}, {"text": "Today:  the tram line.", "speaker": "MORGAN"}], "fr")
+    translations = counts()["translation"]
+
+    posts = [{"post_id": f"p{n}", "post_text": f"Tram line {n % 4} opens next spring."} for n in range(6)]
+    first_sentiment = analyze_posts_sentiment(posts)
+    second_sentiment = analyze_posts_sentiment(posts + [{"post_id": "p6", "post_text": "Rents rose again."}])
+    server_counts = counts()
+    server.terminate()
+    server.join()
+
+    articles = len(rows) + len(later)
+    saved = 1 - (first_requests + later_requests) / articles
+    print(f"analysis, first run   {len(rows)} articles: {first_requests:3d} API calls, {stats['cached_count']} reused, {first_elapsed:5.1f}s")
+    print(f"analysis, later run   {len(later)} articles: {later_requests:3d} API calls, {later_stats['cached_count']} reused, {later_elapsed:5.1f}s")
+    print(f"translation           2 runs of one script: {translations} API call")
+    print(f"sentiment             13 posts in 2 batches: {server_counts['sentiment_posts']} posts sent in {server_counts['sentiment']} calls")
+    print(f"API calls saved: {saved:.0%}; cache stats: {json.dumps(get_llm_cache_stats())}")
+    assert first_requests == NUM_STORIES + len(PAYWALLED_TITLES) and later_requests == 0
+    assert stats["cached_count"] == len(rows) - first_requests and later_stats["cached_count"] == len(later)
+    assert paywalled == [f"Summary of {title}." for title in PAYWALLED_TITLES]
+    assert analyzed == categorized == articles
+    assert first_translation == again and again[0]["text"] == "[fr] Welcome to the show." and translations == 1
+    assert sorted(result["post_id"] for result in first_sentiment) == [f"p{n}" for n in range(6)]
+    assert sorted(result["post_id"] for result in second_sentiment) == [f"p{n}" for n in range(7)]
+    assert server_counts["sentiment_posts"] == 5 and server_counts["sentiment"] == 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEDUP_DIR = tempfile.mkdtemp(prefix="beifong_near_duplicates_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(DEDUP_DIR, "feed_tracking.db")
+os.environ["LLM_CACHE_DB_PATH"] = os.path.join(DEDUP_DIR, "llm_cache.db")
+os.environ["LLM_TPM"] = "10000000"
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from db.connection import db_connection
+from db.articles import update_article_status
+from db.near_duplicates import NEAR_DUPLICATE_THRESHOLD, find_near_duplicates, get_duplicate_stats, report_corpus
+from services.db_init import init_tracking_db
+from processors.url_processor import crawl_pending_entries
+from processors.ai_analysis_processor import analyze_in_batches
+from processors.embedding_processor import get_articles_without_embeddings
+from utils.minhash import estimated_similarity, minhash
+
+TRACKING_DB_PATH = os.environ["TRACKING_DB_PATH"]
+VOCABULARY = [f"w{n}" for n in range(4000)]
+# Zipf-like word frequencies, so unrelated stories still share common phrases.
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+WIRE_STORIES = 40
+COPIES_PER_STORY = 5
+UNIQUE_STORIES = 80
+# Different stories written from one wire template (earnings, match reports): same wording, their own names and figures.
+TEMPLATE_STORIES = 10
+TEMPLATE_SLOT_SPACING = 20
+OUTLETS = ["Metro Daily", "The Courier", "Evening Post", "Valley News", "City Wire"]
+
+
+def sentence(rng):
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(10, 24))).capitalize() + "."
+
+
+def story(rng):
+    return [" ".join(sentence(rng) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(8, 16))]
+
+
+def syndicated_copy(rng, paragraphs, outlet):
+    """The wire text as an outlet runs it: its own byline and furniture, and either a reworded or a cut closing sentence."""
+    paragraphs = list(paragraphs)
+    closing = paragraphs[-1].split(". ")
+    if rng.random() < 0.5:
+        closing[-1] = sentence(rng)
+    else:
+        closing = closing[:-1] or [sentence(rng)]
+    paragraphs[-1] = ". ".join(closing).rstrip(".") + "."
+    return "\n".join([f"By {outlet} staff", "Advertisement"] + paragraphs + ["Share this article", f"© 2024 {outlet}. All rights reserved."])
+
+
+def template_story(rng, template):
+    """Another story filled into template: every TEMPLATE_SLOT_SPACING-th word is this story's own name or figure."""
+    paragraphs = []
+    for paragraph in template:
+        words = paragraph.split(" ")
+        for i in range(rng.randrange(TEMPLATE_SLOT_SPACING), len(words), TEMPLATE_SLOT_SPACING):
+            words[i] = f"fact{rng.randrange(10**6)}"
+        paragraphs.append(" ".join(words))
+    return "\n".join(paragraphs)
+
+
+def build_corpus():
+    """(story number, text) per article in crawl order; wire copies of a story are spread across the crawl."""
+    rng = random.Random(11)
+    articles = []
+    for n in range(WIRE_STORIES):
+        paragraphs = story(rng)
+        articles.extend((n, syndicated_copy(rng, paragraphs, outlet)) for outlet in OUTLETS[:COPIES_PER_STORY])
+    articles.extend((WIRE_STORIES + n, "\n".join(story(rng))) for n in range(UNIQUE_STORIES))
+    template = story(rng)
+    articles.extend((WIRE_STORIES + UNIQUE_STORIES + n, template_story(rng, template)) for n in range(TEMPLATE_STORIES))
+    rng.shuffle(articles)
+    return articles
+
+
+class FakeCrawler:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def crawl_many(self, urls):
+        results = []
+        for url in urls:
+            page = self.pages[url]
+            results.append({"skipped": False, "error": None, "raw_html": f"<html>{page}</html>", "metadata": {}, "clean_text": page, "truncated": False})
+        return results
+
+
+def build_fake_openai():
+    app = FastAPI()
+    state = {"requests": 0}
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        await asyncio.sleep(0.01)
+        title = body["messages"][-1]["content"].split("Article Title: ", 1)[1].split("\n", 1)[0]
+        content = {"categories": ["news", title.lower()], "summary": f"Summary of {title}.", "content": f"Body of {title}."}
+        completion = {
+            "id": f"chatcmpl-{state['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps(content)}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 40, "total_tokens": 140},
+        }
+        return JSONResponse(completion)
+
+    return app
+
+
+def serve_fake_openai(port, ready):
+    ready.set()
+    uvicorn.run(build_fake_openai(), host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_fake_openai():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_fake_openai, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return server, port
+
+
+def add_entries(articles, start):
+    """Feed entries for articles; returns {url: text} for the fake crawler."""
+    pages = {}
+    with db_connection(TRACKING_DB_PATH) as conn:
+        for offset, (story_number, text) in enumerate(articles):
+            n = start + offset
+            url = f"https://outlet.example/{n}"
+            pages[url] = text
+            # Entries are crawled newest first; descending timestamps keep crawl order equal to corpus order.
+            conn.execute(
+                "INSERT INTO feed_entries (feed_id, source_id, entry_id, title, link, published_date, published_ts) VALUES (1, 1, ?, ?, ?, ?, ?)",
+                (str(n), f"Story {story_number}", url, "2024-01-01T00:00:00", 1800000000 - n),
+            )
+        conn.commit()
+    return pages
+
+
+def check_signatures(corpus):
+    """Closest estimated similarity between copies of a story, between template stories and between unrelated stories."""
+    by_story = {}
+    for story_number, text in corpus:
+        by_story.setdefault(story_number, []).append(text)
+    copies = [texts for texts in by_story.values() if len(texts) > 1]
+    near = [estimated_similarity(minhash(texts[0]), minhash(other)) for texts in copies for other in texts[1:]]
+    first_template = WIRE_STORIES + UNIQUE_STORIES
+    templated = [minhash(by_story[first_template + n][0]) for n in range(TEMPLATE_STORIES)]
+    template = [estimated_similarity(a, b) for n, a in enumerate(templated) for b in templated[n + 1 :]]
+    unique = [minhash(by_story[WIRE_STORIES + n][0]) for n in range(UNIQUE_STORIES)]
+    far = [estimated_similarity(a, b) for n, a in enumerate(unique) for b in unique[n + 1 :]]
+    assert minhash("too short to compare") is None
+    assert min(near) >= NEAR_DUPLICATE_THRESHOLD > max(template) and max(far) < 0.2, (min(near), max(template), max(far))
+    # The template stories are similar enough that the old 0.5 threshold merged them.
+    assert min(template) >= 0.5, min(template)
+    return min(near), max(template), max(far)
+
+
+def test_signatures():
+    check_signatures(build_corpus())
+
+
+def main():
+    corpus = build_corpus()
+    closest_copy, closest_template, closest_unrelated = check_signatures(corpus)
+    links = find_near_duplicates([(n, text) for n, (_, text) in enumerate(corpus)])
+    assert all(corpus[article][0] == corpus[canonical][0] for article, canonical in links.items())
+    expected_duplicates = WIRE_STORIES * (COPIES_PER_STORY - 1)
+    assert len(links) == expected_duplicates, len(links)
+
+    # Most of the corpus in two crawl batches, analysis, then the remaining copies after their canonicals are analyzed.
+    init_tracking_db()
+    held_back = [n for n, (story_number, _) in enumerate(corpus) if story_number < 5][-5:]
+    first = [article for n, article in enumerate(corpus) if n not in held_back]
+    later = [corpus[n] for n in held_back]
+    pages = add_entries(first, 0)
+    crawler = FakeCrawler(pages)
+    crawl_stats = [crawl_pending_entries(TRACKING_DB_PATH, batch_size=(len(first) + 1) // 2, crawler=crawler) for _ in range(2)]
+
+    server, port = start_fake_openai()
+    base_url = f"http://127.0.0.1:{port}/v1"
+    analysis_stats = analyze_in_batches(openai_api_key="test-key", batch_size=len(first), base_url=base_url)
+    pages.update(add_entries(later, len(first)))
+    crawl_stats.append(crawl_pending_entries(TRACKING_DB_PATH, batch_size=len(later), crawler=crawler))
+    requests = httpx.get(f"http://127.0.0.1:{port}/stats").json()["requests"]
+    server.terminate()
+    server.join()
+
+    embedding_queue = get_articles_without_embeddings(TRACKING_DB_PATH, limit=len(corpus))
+    linked = get_duplicate_stats(TRACKING_DB_PATH)
+    with db_connection(TRACKING_DB_PATH) as conn:
+        duplicates = conn.execute(
+            """
+            SELECT d.id, d.duplicate_of, d.processed, d.summary = c.summary AS same_summary, db.content = cb.content AS same_content,
+                   (SELECT COUNT(*) FROM article_categories WHERE article_id = d.id) AS categories
+            FROM crawled_articles d
+            JOIN crawled_articles c ON c.id = d.duplicate_of
+            JOIN article_bodies db ON db.article_id = d.id
+            JOIN article_bodies cb ON cb.article_id = c.id
+            WHERE d.ai_status = 'duplicate'
+            """
+        ).fetchall()
+        # A canonical that gives up on analysis hands its place to its oldest pending duplicate.
+        canonical = conn.execute(
+            "SELECT id FROM crawled_articles WHERE ai_status = 'success' AND id IN (SELECT duplicate_of FROM crawled_articles) ORDER BY id LIMIT 1"
+        ).fetchone()[0]
+        conn.execute("UPDATE crawled_articles SET ai_status = 'error', ai_attempts = 2 WHERE id = ?", (canonical,))
+        conn.execute("UPDATE crawled_articles SET processed = 0 WHERE duplicate_of = ?", (canonical,))
+        conn.commit()
+        waiting = [row[0] for row in conn.execute("SELECT id FROM crawled_articles WHERE duplicate_of = ? ORDER BY id", (canonical,))]
+    update_article_status(TRACKING_DB_PATH, canonical, success=False, error_message="model refused")
+    with db_connection(TRACKING_DB_PATH) as conn:
+        promoted = conn.execute("SELECT ai_status, duplicate_of FROM crawled_articles WHERE id = ?", (waiting[0],)).fetchone()
+        others = waiting[1:]
+        relinked = {row[0] for row in conn.execute(f"SELECT duplicate_of FROM crawled_articles WHERE id IN ({','.join('?' * len(others))})", others)}
+
+    total = len(corpus)
+    corpus_report = report_corpus(TRACKING_DB_PATH)
+    print(
+        f"{total} articles: {WIRE_STORIES} wire stories x {COPIES_PER_STORY} outlets + {UNIQUE_STORIES} unique stories "
+        f"+ {TEMPLATE_STORIES} stories from one template"
+    )
+    print(
+        f"estimated similarity: farthest syndicated copy {closest_copy:.2f}, closest template stories {closest_template:.2f}, "
+        f"closest unrelated pair {closest_unrelated:.2f} (threshold {NEAR_DUPLICATE_THRESHOLD})"
+    )
+    print(f"crawl batches linked {[stats['duplicate_count'] for stats in crawl_stats]} near-duplicates ({linked['duplicates']} in all)")
+    print(f"analysis: {requests} API calls for {total} articles ({1 - requests / total:.1%} saved)")
+    print(f"embedding: {len(embedding_queue)} articles queued of {total} ({1 - len(embedding_queue) / total:.1%} saved)")
+    print(f"corpus report: {json.dumps(corpus_report)}")
+    assert sum(stats["duplicate_count"] for stats in crawl_stats) == linked["duplicates"] == expected_duplicates
+    assert crawl_stats[-1]["duplicate_count"] == len(later)
+    assert requests == analysis_stats["success_count"] == total - expected_duplicates
+    assert len(embedding_queue) == total - expected_duplicates
+    assert len(duplicates) == expected_duplicates
+    assert all(row[2] == 1 and row[3] == 1 and row[4] == 1 and row[5] == 2 for row in duplicates)
+    assert tuple(promoted) == ("pending", None) and relinked == {waiting[0]}
+    assert corpus_report["duplicates"] == expected_duplicates
+
+
+if __name__ == "__main__":
+    main()
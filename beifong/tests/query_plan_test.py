@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PLAN_DIR = tempfile.mkdtemp(prefix="beifong_plans_")
+for db_name in ["sources_db", "tracking_db", "podcasts_db", "tasks_db", "internal_sessions_db", "social_media_db", "llm_cache_db"]:
+    os.environ[f"{db_name.upper()}_PATH"] = os.path.join(PLAN_DIR, f"{db_name}.db")
+
+from services.db_init import (
+    init_sources_db,
+    init_tracking_db,
+    init_podcasts_db,
+    init_tasks_db,
+    init_internal_sessions_db,
+    init_social_media_db,
+    init_llm_cache_db,
+    find_full_scans,
+    check_query_plans,
+    HOT_QUERIES,
+)
+
+
+def main():
+    init_sources_db()
+    init_tracking_db()
+    init_podcasts_db()
+    init_tasks_db()
+    init_internal_sessions_db()
+    init_social_media_db()
+    init_llm_cache_db()
+    for db_name in HOT_QUERIES:
+        problems = dict(find_full_scans(db_name))
+        for name in HOT_QUERIES[db_name]:
+            print(f"{'FAIL' if name in problems else 'ok':<5} {db_name:<16} {name} {problems.get(name, '')}")
+    check_query_plans()
+    print("All hot queries use an index.")
+
+
+if __name__ == "__main__":
+    main()
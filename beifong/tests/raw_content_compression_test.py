@@ -0,0 +1,100 @@
+import os
+import sys
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+COMPRESSION_DIR = tempfile.mkdtemp(prefix="beifong_compression_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(COMPRESSION_DIR, "feed_tracking.db")
+
+from db.batch import WriteBuffer
+from db.connection import db_connection
+from db.compression import compact_raw_content, train_dictionary, frame_dict_id
+from db.articles import queue_crawled_article, get_article_by_id, get_unprocessed_articles, update_article_status
+from services.db_init import init_tracking_db
+
+NUM_ARTICLES = 2000
+WORDS = "officials confirmed the plan would proceed despite objections from several regional groups and analysts".split()
+TRACKING_DB_PATH = os.environ["TRACKING_DB_PATH"]
+
+
+def article_body(rng, n):
+    menu = "".join(f"<li class='menu-item'><a href='/section/{i}'>Section {i}</a></li>" for i in range(30))
+    paragraphs = "".join(f"<p>{' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 90)))}</p>" for _ in range(rng.randint(10, 30)))
+    scripts = "".join(f"<script>window.dataLayer.push({{'event': 'view', 'slot': {i}, 'id': {n}}});</script>" for i in range(15))
+    return (
+        f"<body class='article-page'><header><nav><ul>{menu}</ul></nav></header><main><article><h1>Story {n}</h1>{paragraphs}</article>"
+        f"<aside class='related'>{''.join(f'<a href=/story/{n + i}>Related {i}</a>' for i in range(15))}</aside></main>"
+        f"<footer><ul>{menu}</ul><p>&copy; Example News</p></footer>{scripts}</body>"
+    )
+
+
+def report(label, stats=None):
+    size = os.path.getsize(TRACKING_DB_PATH)
+    line = f"{label:<34} file {size / 2**20:7.2f} MiB"
+    if stats:
+        line += f"  raw_content {stats['content_bytes_before'] / 2**20:6.2f} -> {stats['content_bytes_after'] / 2**20:6.2f} MiB"
+        line += f", {stats['reclaimed_bytes'] / 2**20:.2f} MiB reclaimed"
+    print(line)
+
+
+def main():
+    rng = random.Random(16)
+    init_tracking_db()
+    bodies = [article_body(rng, n) for n in range(NUM_ARTICLES)]
+    legacy = NUM_ARTICLES // 2
+    # Rows crawled before compression: plain TEXT, no clean_text.
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.executemany(
+            "INSERT INTO crawled_articles (id, entry_id, title, url, published_ts) VALUES (?, ?, ?, ?, ?)",
+            [(n + 1, n, f"Story {n}", f"https://example.com/{n}", 1700000000 + n) for n in range(legacy)],
+        )
+        conn.executemany(
+            "INSERT INTO article_bodies (article_id, raw_content, metadata) VALUES (?, ?, '{}')", [(n + 1, bodies[n]) for n in range(legacy)]
+        )
+        conn.commit()
+    with WriteBuffer(TRACKING_DB_PATH) as writer:
+        for n in range(legacy, NUM_ARTICLES):
+            entry = {"id": n, "title": f"Story {n}", "link": f"https://example.com/{n}"}
+            queue_crawled_article(writer, entry, bodies[n], {}, f"Story {n} text")
+    report(f"{legacy} TEXT + {NUM_ARTICLES - legacy} zstd rows")
+
+    stats = compact_raw_content(TRACKING_DB_PATH, drop_analyzed=False)
+    assert stats["compressed"] == legacy, stats
+    report("compact (zstd)", stats)
+
+    dict_id = train_dictionary(TRACKING_DB_PATH)
+    stats = compact_raw_content(TRACKING_DB_PATH, drop_analyzed=False)
+    assert dict_id and stats["compressed"] == NUM_ARTICLES, stats
+    report("train dictionary + compact", stats)
+
+    for n in rng.sample(range(NUM_ARTICLES), 50):
+        assert get_article_by_id(TRACKING_DB_PATH, n + 1)["raw_content"] == bodies[n]
+
+    articles = get_unprocessed_articles(TRACKING_DB_PATH, limit=NUM_ARTICLES, max_attempts=1)
+    assert len(articles) == NUM_ARTICLES
+    assert all(("raw_content" in article) == (article["clean_text"] is None) for article in articles)
+    assert all(article["raw_content"] == bodies[article["entry_id"]] for article in articles if "raw_content" in article)
+
+    analyzed = rng.sample(range(1, NUM_ARTICLES + 1), NUM_ARTICLES * 3 // 4)
+    update_article_status(TRACKING_DB_PATH, analyzed[0], {"summary": "s", "content": "c", "categories": []}, success=True)
+    assert get_article_by_id(TRACKING_DB_PATH, analyzed[0])["raw_content"] is None
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.executemany("UPDATE crawled_articles SET ai_status = 'success', processed = 1 WHERE id = ?", [(i,) for i in analyzed])
+        conn.commit()
+    # Rows analyzed before the retention policy: the backfill drops them, and without VACUUM the space is free for reuse.
+    stats = compact_raw_content(TRACKING_DB_PATH, vacuum=False)
+    assert stats["dropped"] == len(analyzed) - 1 and stats["compressed"] == 0, stats
+    assert stats["database_bytes_after"] == stats["database_bytes_before"] and stats["reclaimed_bytes"] > 0, stats
+    report("drop analyzed (no VACUUM)", stats)
+    freed = stats["reclaimed_bytes"]
+    stats = compact_raw_content(TRACKING_DB_PATH)
+    assert stats["dropped"] == 0 and stats["reclaimed_bytes"] >= freed // 2, (freed, stats)
+    report("VACUUM", stats)
+    with db_connection(TRACKING_DB_PATH) as conn:
+        values = [row[0] for row in conn.execute("SELECT raw_content FROM article_bodies WHERE raw_content IS NOT NULL")]
+    assert values and all(frame_dict_id(value) == dict_id for value in values)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import socket
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DIR = tempfile.mkdtemp(prefix="beifong_scrape_cache_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(CACHE_DIR, "feed_tracking.db")
+os.environ["CRAWL_HOST_DELAY"] = "0"
+os.environ["CRAWL_HOST_CONCURRENCY"] = "8"
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from db.connection import db_connection
+from services.db_init import init_tracking_db
+from tools.browser_crawler import PlaywrightScraper
+
+TRACKING_DB_PATH = os.environ["TRACKING_DB_PATH"]
+SENTENCE = "Regional officials said the new rail link would open next spring after years of delays and rising costs. "
+CRAWLED = range(3)
+
+
+def story_page(n):
+    paragraphs = "".join(f"<p>{SENTENCE * 3}Paragraph {i} of story {n}.</p>" for i in range(10))
+    return f"<html><head><title>Story {n}</title></head><body><article><h1>Story {n}</h1>{paragraphs}</article></body></html>"
+
+
+def build_stub_app():
+    app = FastAPI()
+    counts = {"200": 0, "304": 0}
+
+    @app.get("/counts")
+    async def get_counts():
+        return counts
+
+    @app.get("/story/{n}")
+    async def story(n: int, request: Request):
+        etag = f'"v1-{n}"'
+        if request.headers.get("if-none-match") == etag:
+            counts["304"] += 1
+            return Response(status_code=304, headers={"ETag": etag})
+        counts["200"] += 1
+        return Response(story_page(n), media_type="text/html", headers={"ETag": etag})
+
+    return app
+
+
+def serve_stub(port, ready):
+    ready.set()
+    uvicorn.run(build_stub_app(), host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_stub_server():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_stub, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return server, port
+
+
+def run(label, scraper, urls, base):
+    before = httpx.get(f"{base}/counts").json()
+    results = scraper.scrape_urls(urls)
+    after = httpx.get(f"{base}/counts").json()
+    stats = scraper.last_stats
+    downloads, not_modified = after["200"] - before["200"], after["304"] - before["304"]
+    print(f"{label:<28} hit rate {stats['hit_rate']:4.0%}  {downloads:2d} downloads, {not_modified:2d} x 304")
+    assert all(result["success"] for result in results)
+    return stats, downloads, not_modified
+
+
+def main():
+    server, port = start_stub_server()
+    base = f"http://127.0.0.1:{port}"
+    story = lambda n: f"{base}/story/{n}"
+    init_tracking_db()
+    # The feed crawler already stored a few of the stories.
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.executemany(
+            "INSERT INTO crawled_articles (id, entry_id, title, url, published_ts) VALUES (?, ?, ?, ?, ?)",
+            [(n + 1, n, f"Story {n}", story(n), 1700000000 + n) for n in CRAWLED],
+        )
+        conn.executemany("INSERT INTO article_bodies (article_id, clean_text) VALUES (?, ?)", [(n + 1, f"Story {n}\n{SENTENCE}") for n in CRAWLED])
+        conn.commit()
+
+    scraper = PlaywrightScraper(timeout=5000)
+    stats, downloads, _ = run("config A, first run", scraper, [story(n) for n in range(10)], base)
+    assert stats["crawled_articles"] == 3 and stats["static"] == 7 and downloads == 7, stats
+
+    # Overlapping config, including a tracking-parameter alias of a cached story.
+    urls = [story(n) for n in range(5, 15)] + [story(6) + "?utm_source=newsletter#top"]
+    stats, downloads, _ = run("config B, overlapping", scraper, urls, base)
+    assert stats["cache"] == 6 and stats["static"] == 5 and downloads == 5, stats
+
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.execute("UPDATE scrape_cache SET expires_ts = 0")
+        conn.commit()
+    stats, downloads, not_modified = run("config A, after TTL", scraper, [story(n) for n in range(10)], base)
+    assert stats["crawled_articles"] == 3 and stats["revalidated"] == 7 and downloads == 0 and not_modified == 7, stats
+
+    stats, downloads, _ = run("config A, again", scraper, [story(n) for n in range(10)], base)
+    assert stats["hit_rate"] == 1.0 and downloads == 0, stats
+    with db_connection(TRACKING_DB_PATH) as conn:
+        entries, texts = conn.execute("SELECT COUNT(*), COUNT(DISTINCT content_hash) FROM scrape_cache").fetchone()
+    print(f"{entries} cached URLs, {texts} distinct texts")
+    server.terminate()
+    server.join()
+
+
+if __name__ == "__main__":
+    main()
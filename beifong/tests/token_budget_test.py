@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BUDGET_DIR = tempfile.mkdtemp(prefix="beifong_token_budget_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(BUDGET_DIR, "feed_tracking.db")
+os.environ["LLM_CACHE_DB_PATH"] = os.path.join(BUDGET_DIR, "llm_cache.db")
+# The fake API reports no rate limits; keep the default token budget from throttling the long stories.
+os.environ["LLM_TPM"] = "10000000"
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from db.connection import db_connection
+from services.db_init import init_tracking_db
+from utils.token_budget import count_tokens, fit_to_budget, get_tokenizer, split_into_chunks, strip_boilerplate
+from processors.ai_analysis_processor import (
+    WEB_PAGE_ANALYSE_MODEL,
+    analyze_in_batches,
+    build_analysis_messages,
+    count_prompt_tokens,
+    merge_categories,
+)
+
+TRACKING_DB_PATH = os.environ["TRACKING_DB_PATH"]
+MAX_TOKENS = 8000
+WORDS = "council tram line budget vote residents mayor station route funding delay contract engineers city plan transport network".split()
+BOILERPLATE = ["Advertisement", "Subscribe to our newsletter", "Share this article", "Related articles", "© 2024 Example News. All rights reserved."]
+# (articles, paragraphs each) for short, medium, long and very long stories.
+CORPUS_SHAPE = [(24, 8), (10, 40), (4, 150), (2, 900)]
+
+
+def paragraph(rng):
+    sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 18))).capitalize() + "." for _ in range(5)]
+    return " ".join(sentences)
+
+
+def build_corpus():
+    rng = random.Random(7)
+    corpus = []
+    for count, paragraphs in CORPUS_SHAPE:
+        for _ in range(count):
+            lines = ["Skip to main content", "Home", "World", "Business"]
+            for n in range(paragraphs):
+                lines.append(paragraph(rng))
+                if n % 4 == 3:
+                    lines.extend([BOILERPLATE[n % len(BOILERPLATE)], ""])
+            lines.extend(["Related articles", "Home", "World", "Business", "Follow us on social media"])
+            corpus.append("\n".join(lines))
+    return corpus
+
+
+def legacy_prompt_text(text, max_tokens=MAX_TOKENS):
+    # The previous extract_clean_text: len / 4 as the token estimate, cut at max_tokens * 4 characters.
+    return text[: max_tokens * 4] if len(text) / 4 > max_tokens else text
+
+
+def test_budgeting():
+    page = "Skip to main content\nHome\nThe council approved the tram line.\n\nAdvertisement\n\n\nHome\nIt opens in 2026.\nAdvertisement\nShare this article"
+    assert strip_boilerplate(page) == "Home\nThe council approved the tram line.\n\nIt opens in 2026."
+    text = "\n".join(f"Line {n}: " + "the tram line was approved " * 20 for n in range(200))
+    chunks = split_into_chunks(text, 500, WEB_PAGE_ANALYSE_MODEL)
+    assert all(count_tokens(chunk, WEB_PAGE_ANALYSE_MODEL) <= 500 for chunk in chunks)
+    assert "\n".join(chunks).split() == text.split()
+    cut, tokens, truncated = fit_to_budget(text, 500, WEB_PAGE_ANALYSE_MODEL)
+    assert truncated and tokens == 500 and text.startswith(cut) and count_tokens(cut, WEB_PAGE_ANALYSE_MODEL) <= 500
+    assert merge_categories([["Transport", "Politics"], ["transport", "Cities"], ["Budget", "politics"]], limit=3) == ["Transport", "Politics", "Cities"]
+
+
+def build_fake_openai():
+    app = FastAPI()
+    state = {"requests": 0, "merges": 0}
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        await asyncio.sleep(0.02)
+        prompt = body["messages"][1]["content"]
+        title = prompt.split("Article Title: ", 1)[1].split("\n", 1)[0]
+        if "summaries of consecutive parts" in prompt:
+            state["merges"] += 1
+            content = json.dumps({"summary": f"Merged summary of {title}."})
+        else:
+            part = prompt.split("This is part ", 1)[1].split(" ", 1)[0] if "This is part " in prompt else "1"
+            content = json.dumps({"categories": ["Transport", f"Topic {int(part) % 2}"], "summary": f"Part {part} of {title}.", "content": f"Body {part}."})
+        prompt_tokens = sum(len(message["content"]) for message in body["messages"]) // 4
+        completion = {
+            "id": f"chatcmpl-{state['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 40, "total_tokens": prompt_tokens + 40},
+        }
+        return JSONResponse(completion)
+
+    return app
+
+
+def serve_fake_openai(port, ready):
+    ready.set()
+    uvicorn.run(build_fake_openai(), host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_fake_openai():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve_fake_openai, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return server, port
+
+
+def main():
+    print(f"tokenizer: {get_tokenizer(WEB_PAGE_ANALYSE_MODEL).name}")
+    test_budgeting()
+    corpus = build_corpus()
+    articles = [{"title": f"Story {n}", "url": f"https://example.com/{n}", "clean_text": text} for n, text in enumerate(corpus)]
+    legacy_tokens = [count_prompt_tokens(build_analysis_messages(article, clean_text=legacy_prompt_text(article["clean_text"]))) for article in articles]
+    # Articles that fit the budget either way show what boilerplate removal saves per request.
+    fitting = [n for n, article in enumerate(articles) if count_tokens(article["clean_text"], WEB_PAGE_ANALYSE_MODEL) <= MAX_TOKENS]
+    budgeted_fitting = sum(count_prompt_tokens(build_analysis_messages(articles[n])) for n in fitting) / len(fitting)
+    legacy_fitting = sum(legacy_tokens[n] for n in fitting) / len(fitting)
+    legacy_truncated = sum(len(text) / 4 > MAX_TOKENS for text in corpus)
+    boilerplate_tokens = sum(count_tokens(text, WEB_PAGE_ANALYSE_MODEL) - count_tokens(strip_boilerplate(text), WEB_PAGE_ANALYSE_MODEL) for text in corpus)
+
+    server, port = start_fake_openai()
+    init_tracking_db()
+    with db_connection(TRACKING_DB_PATH) as conn:
+        conn.executemany(
+            "INSERT INTO crawled_articles (id, entry_id, title, url, published_ts) VALUES (?, ?, ?, ?, ?)",
+            [(n + 1, n, f"Story {n}", f"https://example.com/{n}", 1700000000 + n) for n in range(len(corpus))],
+        )
+        conn.executemany(
+            "INSERT INTO article_bodies (article_id, clean_text, metadata) VALUES (?, ?, '{}')",
+            [(n + 1, text) for n, text in enumerate(corpus)],
+        )
+        conn.commit()
+    stats = analyze_in_batches(openai_api_key="test-key", batch_size=len(corpus), base_url=f"http://127.0.0.1:{port}/v1")
+    server_stats = httpx.get(f"http://127.0.0.1:{port}/stats").json()
+    server.terminate()
+    server.join()
+    with db_connection(TRACKING_DB_PATH) as conn:
+        long_story = conn.execute(
+            "SELECT ca.summary, b.content FROM crawled_articles ca JOIN article_bodies b ON b.article_id = ca.id WHERE ca.id = ?", (len(corpus),)
+        ).fetchone()
+        categories = [row[0] for row in conn.execute("SELECT category_name FROM article_categories WHERE article_id = ?", (len(corpus),))]
+
+    total = len(corpus)
+    print(f"{total} articles, {boilerplate_tokens} boilerplate tokens removed")
+    print(f"{len(fitting)} articles within budget: {legacy_fitting:.0f} -> {budgeted_fitting:.0f} prompt tokens/article")
+    print(f"{'legacy (len/4, cut)':<22} {sum(legacy_tokens) / total:7.0f} prompt tokens/article, {legacy_truncated / total:5.1%} truncated")
+    print(
+        f"{'budgeted + chunked':<22} {stats['prompt_tokens'] / total:7.0f} prompt tokens/article, {stats['truncated_count'] / total:5.1%} truncated, "
+        f"{stats['chunked_count'] / total:5.1%} chunked, {server_stats['requests']} requests ({server_stats['merges']} merges)"
+    )
+    assert stats["success_count"] == total and budgeted_fitting < legacy_fitting
+    assert stats["chunked_count"] == sum(count for count, paragraphs in CORPUS_SHAPE if paragraphs > 100)
+    assert stats["truncated_count"] < legacy_truncated
+    assert long_story["summary"] == f"Merged summary of Story {total - 1}." and long_story["content"].startswith("Body 1.\n\nBody 2.")
+    assert categories and {"transport", "topic 0", "topic 1"} <= {category.lower() for category in categories}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import io
+import os
+import sys
+import time
+import socket
+import asyncio
+import tempfile
+import contextlib
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCH_DIR = tempfile.mkdtemp(prefix="beifong_crawl_")
+os.environ["TRACKING_DB_PATH"] = os.path.join(BENCH_DIR, "feed_tracking.db")
+os.environ["CRAWL_HOST_DELAY"] = "0.02"
+os.environ["CRAWL_MAX_BYTES"] = str(2 * 1024 * 1024)
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from db.connection import db_connection
+from services.db_init import init_tracking_db
+from processors.url_processor import crawl_in_batches, crawl_pending_entries
+from utils.crawl_url import get_web_data
+from utils.page_crawler import PageCrawler
+
+NUM_PAGES = 500
+NUM_HOSTS = 10
+SEQUENTIAL_SAMPLE = 50
+STUB_LATENCY = float(os.environ.get("STUB_LATENCY_MS", 50)) / 1000
+LARGE_BYTES = 20 * 1024 * 1024
+CHUNK = b"<p>" + b"x" * 65530 + b"</p>"
+
+
+def article_page(n):
+    paragraphs = "".join(f"<p>Paragraph {i} of article {n}. {'Lorem ipsum dolor sit amet, consectetur adipiscing. ' * 8}</p>" for i in range(60))
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Article {n}</title>"
+        f"<meta name='description' content='Description of article {n}'><meta name='author' content='Stub'>"
+        f"<meta property='twitter:card' content='summary'><script>var x = {n};</script></head>"
+        f"<body><nav>Home | News | About</nav><article><h1>Article {n}</h1>{paragraphs}</article><footer>Footer</footer></body></html>"
+    ).encode()
+
+
+def build_stub_app():
+    app = FastAPI()
+    connections = set()
+
+    @app.middleware("http")
+    async def count_connections(request: Request, call_next):
+        connections.add((request.scope["server"][0], request.client.port))
+        return await call_next(request)
+
+    @app.get("/stats")
+    async def stats():
+        return {"connections": len(connections)}
+
+    @app.get("/article/{n}.html")
+    async def article(n: int):
+        await asyncio.sleep(STUB_LATENCY)
+        return Response(article_page(n), media_type="text/html; charset=utf-8")
+
+    async def large_body():
+        for _ in range(LARGE_BYTES // len(CHUNK)):
+            yield CHUNK
+            await asyncio.sleep(0.001)
+
+    @app.get("/file/{n}.pdf")
+    async def pdf(n: int):
+        await asyncio.sleep(STUB_LATENCY)
+        return StreamingResponse(large_body(), media_type="application/pdf")
+
+    @app.get("/huge/{n}.html")
+    async def huge(n: int):
+        await asyncio.sleep(STUB_LATENCY)
+        return StreamingResponse(large_body(), media_type="text/html")
+
+    return app
+
+
+def serve_stub(port, ready):
+    sockets = []
+    for host in range(1, NUM_HOSTS + 1):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((f"127.0.0.{host}", port))
+        sockets.append(sock)
+    server = uvicorn.Server(uvicorn.Config(build_stub_app(), log_level="warning", backlog=4096))
+    ready.set()
+    server.run(sockets=sockets)
+
+
+def start_stub_server():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve_stub, args=(port, ready), daemon=True)
+    process.start()
+    ready.wait()
+    for host in range(1, NUM_HOSTS + 1):
+        while True:
+            try:
+                socket.create_connection((f"127.0.0.{host}", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+    return process, port
+
+
+class RacingCrawler:
+    """Stores articles for some URLs from outside the batch while crawl_many runs."""
+
+    def __init__(self, crawler, stored):
+        self.crawler = crawler
+        self.stored = stored
+
+    def crawl_many(self, urls):
+        with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+            conn.executemany("INSERT INTO crawled_articles (title, url) VALUES ('Stored elsewhere', ?)", [(link,) for link in self.stored])
+            conn.commit()
+        return self.crawler.crawl_many(urls)
+
+
+def url(port, n, kind="article", ext="html"):
+    return f"http://127.0.0.{(n % NUM_HOSTS) + 1}:{port}/{kind}/{n}.{ext}"
+
+
+def connections(port):
+    return httpx.get(f"http://127.0.0.1:{port}/stats").json()["connections"]
+
+
+def main():
+    server, port = start_stub_server()
+    print(f"{NUM_PAGES} pages on {NUM_HOSTS} hosts, {STUB_LATENCY * 1000:.0f} ms stub latency, {os.cpu_count()} CPU(s)")
+
+    opened = connections(port)
+    started = time.perf_counter()
+    for n in range(SEQUENTIAL_SAMPLE):
+        get_web_data(url(port, n))
+    elapsed = time.perf_counter() - started
+    print(f"{'sequential get_web_data':<26} {SEQUENTIAL_SAMPLE / elapsed:7.1f} pages/s  {connections(port) - opened - 1} connections")
+
+    with PageCrawler() as crawler:
+        opened = connections(port)
+        started = time.perf_counter()
+        results = crawler.crawl_many([url(port, n) for n in range(NUM_PAGES)])
+        elapsed = time.perf_counter() - started
+        assert all(result["raw_html"] and not result["error"] for result in results), [r["error"] for r in results if r["error"]][:3]
+        print(f"{'PageCrawler':<26} {NUM_PAGES / elapsed:7.1f} pages/s  {connections(port) - opened - 1} connections")
+
+        started = time.perf_counter()
+        results = crawler.crawl_many([url(port, n, "file", "pdf") for n in range(10)])
+        elapsed = time.perf_counter() - started
+        assert all(result["skipped"] for result in results)
+        print(f"{'10 x 20 MiB PDF':<26} {elapsed:7.2f}s  skipped after headers")
+
+        started = time.perf_counter()
+        results = crawler.crawl_many([url(port, n, "huge") for n in range(10)])
+        elapsed = time.perf_counter() - started
+        assert all(result["truncated"] for result in results)
+        print(f"{'10 x 20 MiB HTML':<26} {elapsed:7.2f}s  truncated at {crawler.max_bytes // 2**20} MiB")
+
+    init_tracking_db()
+    with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+        conn.executemany(
+            "INSERT INTO feed_entries (feed_id, source_id, entry_id, title, link, published_ts) VALUES (?, 1, ?, ?, ?, ?)",
+            [(n % 20, f"e{n}", f"Article {n}", url(port, NUM_PAGES + n), 1700000000 + n) for n in range(NUM_PAGES)],
+        )
+        conn.commit()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = crawl_in_batches(batch_size=100, total_batches=NUM_PAGES // 100 + 1)
+    elapsed = time.perf_counter() - started
+    with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM crawled_articles").fetchone()[0]
+    print(f"{'url_processor batches':<26} {NUM_PAGES / elapsed:7.1f} pages/s  {stored} articles stored")
+
+    # Another writer stores some of the pages while a batch is being crawled; those entries fail as before batching.
+    with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+        conn.executemany(
+            "INSERT INTO feed_entries (feed_id, source_id, entry_id, title, link, published_ts) VALUES (99, 1, ?, ?, ?, ?)",
+            [(f"late{n}", f"Article {n}", url(port, 2 * NUM_PAGES + n), 1800000000 + n) for n in range(10)],
+        )
+        conn.commit()
+    with PageCrawler() as page_crawler, contextlib.redirect_stdout(io.StringIO()):
+        racing_crawler = RacingCrawler(page_crawler, [url(port, 2 * NUM_PAGES + n) for n in range(3)])
+        race_stats = crawl_pending_entries(batch_size=10, crawler=racing_crawler)
+    with db_connection(os.environ["TRACKING_DB_PATH"]) as conn:
+        race_status = dict(conn.execute("SELECT link, crawl_status FROM feed_entries WHERE feed_id = 99").fetchall())
+    server.terminate()
+    server.join()
+    assert stats["success_count"] == NUM_PAGES and stored == NUM_PAGES, stats
+    assert race_stats["success_count"] == 7 and race_stats["failed_count"] == 3, race_stats
+    assert [race_status[link] for link in racing_crawler.stored] == ["failed"] * 3, race_status
+    assert list(race_status.values()).count("success") == 7, race_status
+
+
+if __name__ == "__main__":
+    main()
@@ -1,124 +1,154 @@
-from playwright.sync_api import sync_playwright
+import os
+import re
 import newspaper
-import time
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from db.config import get_tracking_db_path
+from db.scrape_cache import get_crawled_texts, get_cached_scrapes, store_scrapes, refresh_scrapes, record_scrape_hits
+from utils.page_crawler import PageCrawler
+from utils.browser_pool import BROWSER_TIMEOUT, get_browser_pool
+
+# A static fetch is used as-is when newspaper extracts at least this much text from it.
+STATIC_MIN_TEXT_CHARS = int(os.environ.get("SCRAPE_STATIC_MIN_TEXT_CHARS", 500))
+# Pages that ask for JavaScript need more text than usual before the static result is trusted.
+JS_REQUIRED_PATTERN = re.compile(r"enable javascript|javascript is (?:disabled|required)|requires javascript", re.IGNORECASE)
+
+
+def needs_rendering(document: str, text: str) -> bool:
+    """True when a statically fetched page looks JS-rendered or empty, judged by the text newspaper extracted from it."""
+    if len(text.strip()) < STATIC_MIN_TEXT_CHARS:
+        return True
+    return bool(JS_REQUIRED_PATTERN.search(document)) and len(text.strip()) < STATIC_MIN_TEXT_CHARS * 4
 
 
 class PlaywrightScraper:
+    """
+    Scrapes article pages, rendering them in Chromium only when needed.
+
+    With use_cache, URLs the feed crawler already stored in crawled_articles
+    and fresh entries of the scrape cache (db.scrape_cache) are answered
+    without a request; stale cache entries with an ETag or Last-Modified are
+    revalidated with a conditional GET. With static_first, the remaining URLs
+    are fetched over plain HTTP (concurrently, through utils.page_crawler) and
+    extracted with newspaper; only pages whose static result fails or looks
+    JS-rendered (see needs_rendering) are opened in the browser. Those are
+    rendered concurrently in the process-wide utils.browser_pool and extracted
+    from the browser's DOM, so no URL is downloaded twice. Every result records
+    where it came from in fetched_with, and last_stats counts them per call.
+    """
+
     def __init__(
         self,
         headless: bool = True,
-        timeout: int = 20000,
+        timeout: int = BROWSER_TIMEOUT,
         fresh_context_per_url: bool = False,
+        static_first: bool = True,
+        use_cache: bool = True,
+        tracking_db_path: Optional[str] = None,
     ):
         self.headless = headless
         self.timeout = timeout
         self.fresh_context_per_url = fresh_context_per_url
+        self.static_first = static_first
+        self.use_cache = use_cache
+        self.tracking_db_path = tracking_db_path or get_tracking_db_path()
+        self.last_stats = {}
 
     def scrape_urls(self, urls: List[str]) -> List[Dict]:
-        with sync_playwright() as playwright:
-            browser = playwright.chromium.launch(
-                headless=self.headless,
-                args=["--no-sandbox", "--disable-setuid-sandbox"],
+        unique_urls = list(dict.fromkeys(urls))
+        results, stale = self._lookup_cache(unique_urls) if self.use_cache else ({}, {})
+        pending = [url for url in unique_urls if url not in results]
+        if self.static_first:
+            results.update(self._scrape_static(pending, stale))
+            pending = [url for url in pending if url not in results]
+        if pending:
+            print(f"Rendering {len(pending)}/{len(unique_urls)} URLs in the browser")
+            for url, result in zip(pending, self._scrape_with_browser(pending)):
+                result["fetched_with"] = "browser"
+                if not result["success"] and url in stale:
+                    # The origin is unreachable right now; an expired copy beats the search snippet.
+                    result = dict(stale[url]["result"], fetched_with="stale")
+                results[url] = result
+        if self.use_cache:
+            self._update_cache(results)
+        self.last_stats = _scrape_stats(results)
+        if self.use_cache and results:
+            stats = self.last_stats
+            print(
+                f"Scrape cache: {stats['hits']}/{stats['urls']} hits ({stats.get('crawled_articles', 0)} crawled articles, "
+                f"{stats.get('cache', 0)} cached, {stats.get('revalidated', 0)} revalidated), "
+                f"{stats.get('static', 0)} fetched, {stats.get('browser', 0)} rendered"
             )
-            if self.fresh_context_per_url:
-                results = []
-                for url in urls:
-                    result = self._scrape_single_with_new_context(browser, url)
-                    results.append(result)
+        return [results[url] for url in urls]
+
+    def _lookup_cache(self, urls: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """Results answered from crawled_articles or fresh cache entries, and the stale cache entries of the rest."""
+        try:
+            results = get_crawled_texts(self.tracking_db_path, urls)
+            for result in results.values():
+                result["fetched_with"] = "crawled_articles"
+            cached = get_cached_scrapes(self.tracking_db_path, [url for url in urls if url not in results])
+        except Exception as e:
+            print(f"Scrape cache lookup failed: {e}")
+            return {}, {}
+        stale = {}
+        for url, entry in cached.items():
+            if entry["fresh"]:
+                results[url] = dict(entry["result"], fetched_with="cache")
             else:
-                results = self._scrape_with_reused_page(browser, urls)
-            browser.close()
-            return results
-
-    def _scrape_with_reused_page(self, browser, urls: List[str]) -> List[Dict]:
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-        )
-        page = context.new_page()
-        page.set_extra_http_headers(
-            {
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            }
-        )
-        results = []
+                stale[url] = entry
+        return results, stale
+
+    def _update_cache(self, results: Dict[str, Dict]):
+        by_source = {}
+        for url, result in results.items():
+            by_source.setdefault(result.get("fetched_with"), []).append(url)
         try:
-            for i, url in enumerate(urls):
-                print(f"Scraping {i+1}/{len(urls)}")
-                result = self._scrape_single_url(page, url)
-                results.append(result)
-                if i < len(urls) - 1:
-                    time.sleep(1)
-        finally:
-            context.close()
+            record_scrape_hits(self.tracking_db_path, by_source.get("cache"))
+            refresh_scrapes(self.tracking_db_path, by_source.get("revalidated"))
+            store_scrapes(
+                self.tracking_db_path, [results[url] for url in by_source.get("static", []) + by_source.get("browser", [])]
+            )
+        except Exception as e:
+            print(f"Scrape cache update failed: {e}")
+
+    def _scrape_static(self, urls: List[str], stale: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """Results for the URLs a plain HTTP fetch is good enough for; the rest are left for the browser."""
+        stale = stale or {}
+        validators = {url: entry for url, entry in stale.items() if entry["etag"] or entry["last_modified"]}
+        results = {}
+        with PageCrawler(timeout=self.timeout / 1000, parse=False) as crawler:
+            pages = crawler.crawl_many(list(dict.fromkeys(urls)), validators)
+        for page in pages:
+            url = page["url"]
+            if page["not_modified"] and url in stale:
+                results[url] = dict(stale[url]["result"], fetched_with="revalidated")
+                continue
+            if page["skipped"]:
+                # Not HTML (e.g. a PDF); a browser would not extract anything either.
+                results[url] = _failed_result(url, page["error"], final_url=page["final_url"], fetched_with="static")
+                continue
+            if page["error"]:
+                continue
+            result = self._parse_with_newspaper(url, page["final_url"], page["document"])
+            if result["success"] and not needs_rendering(page["document"], result["full_text"]):
+                result.update(fetched_with="static", etag=page["etag"], last_modified=page["last_modified"])
+                results[url] = result
         return results
 
-    def _scrape_single_url(self, page, url: str) -> Dict:
-        max_retries = 0
-        for attempt in range(max_retries + 1):
-            try:
-                page.goto(url, wait_until="load", timeout=self.timeout)
-                page.wait_for_selector("body", timeout=5000)
-                page.wait_for_timeout(2000)
-                final_url = page.url
-                return self._parse_with_newspaper(url, final_url)
-            except Exception as e:
-                if attempt < max_retries:
-                    print(f"Retry {attempt + 1} for {url}")
-                    time.sleep(2**attempt)
-                    continue
-                else:
-                    return {
-                        "originalUrl": url,
-                        "error": str(e),
-                        "success": False,
-                        "timestamp": datetime.now().isoformat(),
-                    }
-
-    def _scrape_single_with_new_context(self, browser, url: str) -> Dict:
-        max_retries = 0
-        for attempt in range(max_retries + 1):
-            context = None
-            try:
-                context = browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    viewport={"width": 1920, "height": 1080},
-                )
-                page = context.new_page()
-                page.set_extra_http_headers(
-                    {
-                        "Accept-Language": "en-US,en;q=0.9",
-                        "Accept-Encoding": "gzip, deflate, br",
-                        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    }
-                )
-                page.goto(url, wait_until="load", timeout=self.timeout)
-                page.wait_for_selector("body", timeout=5000)
-                page.wait_for_timeout(2000)
-                final_url = page.url
-                return self._parse_with_newspaper(url, final_url)
-            except Exception as e:
-                if attempt < max_retries:
-                    time.sleep(2**attempt)
-                    continue
-                else:
-                    return {
-                        "originalUrl": url,
-                        "error": str(e),
-                        "success": False,
-                        "timestamp": datetime.now().isoformat(),
-                    }
-            finally:
-                if context:
-                    context.close()
-
-    def _parse_with_newspaper(self, original_url: str, final_url: str) -> Dict:
+    def _scrape_with_browser(self, urls: List[str]) -> List[Dict]:
+        pages = get_browser_pool(self.headless).render_many(urls, timeout=self.timeout, fresh_context=self.fresh_context_per_url)
+        results = []
+        for page in pages:
+            if page["error"]:
+                results.append(_failed_result(page["url"], page["error"], final_url=page["final_url"]))
+            else:
+                results.append(self._parse_with_newspaper(page["url"], page["final_url"], page["html"]))
+        return results
+
+    def _parse_with_newspaper(self, original_url: str, final_url: str, html: str) -> Dict:
         try:
-            article = newspaper.article(final_url)
+            article = newspaper.article(final_url, input_html=html)
             return {
                 "original_url": original_url,
                 "final_url": final_url,
@@ -129,18 +159,41 @@ class PlaywrightScraper:
                 "success": True,
             }
         except Exception as e:
-            return {
-                "original_url": original_url,
-                "final_url": final_url,
-                "error": f"Newspaper4k parsing failed: {str(e)}",
-                "success": False,
-            }
+            return _failed_result(original_url, f"Newspaper4k parsing failed: {str(e)}", final_url=final_url)
+
+
+def _failed_result(original_url: str, error: str, final_url: Optional[str] = None, fetched_with: Optional[str] = None) -> Dict:
+    result = {
+        "original_url": original_url,
+        "error": error,
+        "success": False,
+        "timestamp": datetime.now().isoformat(),
+    }
+    if final_url:
+        result["final_url"] = final_url
+    if fetched_with:
+        result["fetched_with"] = fetched_with
+    return result
+
+
+def _scrape_stats(results: Dict[str, Dict]) -> Dict:
+    """Result counts per fetched_with source, failures and the share answered without a fresh download."""
+    stats = {"urls": len(results), "failed": 0}
+    for result in results.values():
+        source = result.get("fetched_with")
+        stats[source] = stats.get(source, 0) + 1
+        stats["failed"] += not result.get("success")
+    stats["hits"] = sum(stats.get(source, 0) for source in ("crawled_articles", "cache", "revalidated"))
+    stats["hit_rate"] = stats["hits"] / len(results) if results else 0.0
+    return stats
 
 
-def create_browser_crawler(headless=True, timeout=20000, fresh_context_per_url=False):
+def create_browser_crawler(headless=True, timeout=BROWSER_TIMEOUT, fresh_context_per_url=False, static_first=True, use_cache=True):
     """Factory function to create a new PlaywrightScraper instance."""
     return PlaywrightScraper(
         headless=headless,
         timeout=timeout,
-        fresh_context_per_url=fresh_context_per_url
-    )
\ No newline at end of file
+        fresh_context_per_url=fresh_context_per_url,
+        static_first=static_first,
+        use_cache=use_cache,
+    )
@@ -47,37 +47,14 @@ def get_article_details(tracking_db_path, article_ids):
         return []
     placeholders = ",".join(["?"] * len(article_ids))
     query = f"""
-    SELECT id, title, url, published_date, summary, source_id, feed_id, content
-    FROM crawled_articles
-    WHERE id IN ({placeholders})
+    SELECT ca.id, ca.title, ca.url, ca.published_date, ca.summary, ca.source_id, ca.feed_id, b.content,
+           s.name AS source_name
+    FROM crawled_articles ca
+    LEFT JOIN article_bodies b ON b.article_id = ca.id
+    LEFT JOIN sources_db.sources s ON s.id = ca.source_id
+    WHERE ca.id IN ({placeholders})
     """
-    return execute_query(tracking_db_path, query, article_ids, fetch=True)
-
-
-def get_source_names(source_ids):
-    if not source_ids:
-        return {}
-    unique_ids = list(set([src_id for src_id in source_ids if src_id]))
-    if not unique_ids:
-        return {}
-    try:
-        sources_db_path = get_sources_db_path()
-        check_query = """
-        SELECT name FROM sqlite_master 
-        WHERE type='table' AND name='sources'
-        """
-        table_exists = execute_query(sources_db_path, check_query, fetch=True)
-        if not table_exists:
-            return {}
-        placeholders = ",".join(["?"] * len(unique_ids))
-        query = f"""
-        SELECT id, name FROM sources
-        WHERE id IN ({placeholders})
-        """
-        results = execute_query(sources_db_path, query, unique_ids, fetch=True)
-        return {str(row["id"]): row["name"] for row in results} if results else {}
-    except Exception as _:
-        return {}
+    return execute_query(tracking_db_path, query, article_ids, fetch=True, attach={"sources_db": get_sources_db_path()})
 
 
 def embedding_search(agent: Agent, prompt: str) -> str:
@@ -125,15 +102,13 @@ def embedding_search(agent: Agent, prompt: str) -> str:
         if not result_article_ids:
             return "No high-quality semantic matches found (threshold: 85%). Continuing with other search methods."
         results = get_article_details(tracking_db_path, result_article_ids)
-        source_ids = [result.get("source_id") for result in results if result.get("source_id")]
-        source_names = get_source_names(source_ids)
         formatted_results = []
         for i, result in enumerate(results):
             article_id = result.get("id")
             similarity = next((item[2] for item in results_with_metrics if item[3] == article_id), 0)
             similarity_percent = int(similarity * 100)
             source_id = str(result.get("source_id", "unknown"))
-            source_name = source_names.get(source_id, source_id)
+            source_name = result.get("source_name") or source_id
             formatted_result = {
                 "id": article_id,
                 "title": f"{result.get('title', 'Untitled')} (Relevance: {similarity_percent}%)",
@@ -6,11 +6,17 @@ from agno.agent import Agent
 from agno.models.openai import OpenAIChat
 from dotenv import load_dotenv
 import uuid
+from db.llm_cache import LLM_CACHE, llm_cache_key, get_cached_response, store_response
 
 
 load_dotenv()
 
 
+SENTIMENT_MODEL = "gpt-4o"
+# Bump when the sentiment instructions change so cached analyses from the old ones are not reused.
+SENTIMENT_PROMPT_VERSION = 1
+
+
 class SentimentType(str, Enum):
     POSITIVE = "positive"
     NEGATIVE = "negative"
@@ -71,10 +77,10 @@ SENTIMENT_AGENT_INSTRUCTIONS = dedent("""
 """)
 
 
-def analyze_posts_sentiment(posts_data):
+def _run_sentiment_agent(posts):
     session_id = str(uuid.uuid4())
     analysis_agent = Agent(
-        model=OpenAIChat(id="gpt-4o"),
+        model=OpenAIChat(id=SENTIMENT_MODEL),
         instructions=SENTIMENT_AGENT_INSTRUCTIONS,
         description=SENTIMENT_AGENT_DESCRIPTION,
         use_json_mode=True,
@@ -82,22 +88,42 @@ def analyze_posts_sentiment(posts_data):
         session_id=session_id,
     )
     posts_prompt = "Analyze the sentiment and categorize the following social media posts:\n\n"
-    valid_posts = []
-    for post in posts_data:
-        post_text = post.get("post_text", "")
-        post_id = post.get("post_id", "")
-        if post_text and post_id:
-            valid_posts.append(post)
-            posts_prompt += f"POST (ID: {post_id}):\n{post_text}\n\n"
+    for post in posts:
+        posts_prompt += f"POST (ID: {post['post_id']}):\n{post['post_text']}\n\n"
+    response = analysis_agent.run(posts_prompt, session_id=session_id)
+    return response.to_dict()["content"]["analyzed_posts"]
+
+
+def analyze_posts_sentiment(posts_data):
+    """
+    Sentiment, categories and tags for each post with text and an id.
+
+    Analyses are cached per post text, so re-scraped posts and reposts of
+    the same text are answered from the LLM cache; only the rest go to the
+    model, each distinct text once.
+    """
+    valid_posts = [post for post in posts_data if post.get("post_text", "") and post.get("post_id", "")]
     if not valid_posts:
         return []
-    response = analysis_agent.run(posts_prompt, session_id=session_id)
-    analysis_results = response.to_dict()["content"]["analyzed_posts"]
     validated_results = []
-    valid_post_ids = {post.get("post_id") for post in valid_posts}
-    for analysis in analysis_results:
-        if analysis.get("post_id") in valid_post_ids:
-            validated_results.append(analysis)
+    # Posts still to analyze, grouped by cache key; the first post of each group is sent.
+    uncached = {}
+    for post in valid_posts:
+        key = llm_cache_key("sentiment", SENTIMENT_MODEL, SENTIMENT_PROMPT_VERSION, post["post_text"])
+        cached = get_cached_response("sentiment", key) if LLM_CACHE else None
+        if cached is not None:
+            validated_results.append({**cached, "post_id": post["post_id"]})
         else:
+            uncached.setdefault(key, []).append(post)
+    if not uncached:
+        return validated_results
+    keys_by_post_id = {posts[0]["post_id"]: key for key, posts in uncached.items()}
+    for analysis in _run_sentiment_agent([posts[0] for posts in uncached.values()]):
+        key = keys_by_post_id.get(analysis.get("post_id"))
+        if key is None:
             print(f"Warning: Analysis returned with invalid post_id: {analysis.get('post_id')}")
-    return validated_results
\ No newline at end of file
+            continue
+        if LLM_CACHE:
+            store_response("sentiment", key, SENTIMENT_MODEL, SENTIMENT_PROMPT_VERSION, analysis)
+        validated_results.extend({**analysis, "post_id": post["post_id"]} for post in uncached[key])
+    return validated_results
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from contextlib import contextmanager
 from agno.agent import Agent
 from db.config import get_db_path
+from db.fulltext import match_terms, bm25_rank
 
 
 @contextmanager
@@ -35,26 +36,29 @@ def social_media_search(agent: Agent, topic: str, limit: int = 10) -> str:
         days_back: int = 7
         date_from = (datetime.now() - timedelta(days=days_back)).isoformat()
         with get_social_media_db() as conn:
+            match = match_terms([topic])
+            if not match:
+                return f"No positive news posts found for '{topic}' in the last {days_back} days."
             cursor = conn.cursor()
-            sql_query = """
+            sql_query = f"""
             SELECT 
-                post_id,
-                user_display_name,
-                post_timestamp,
-                post_url,
-                post_text,
-                platform
-            FROM posts 
+                p.post_id,
+                p.user_display_name,
+                p.post_timestamp,
+                p.post_url,
+                p.post_text,
+                p.platform
+            FROM posts_fts
+            JOIN posts p ON p.rowid = posts_fts.rowid
             WHERE 
-                categories LIKE '%"news"%' 
-                AND sentiment = 'positive'
-                AND datetime(post_timestamp) >= datetime(?)
-                AND (post_text LIKE ? OR user_display_name LIKE ?)
-            ORDER BY datetime(post_timestamp) DESC
+                posts_fts MATCH ?
+                AND p.categories LIKE '%"news"%' 
+                AND p.sentiment = 'positive'
+                AND datetime(p.post_timestamp) >= datetime(?)
+            ORDER BY {bm25_rank("social_media_db")}, datetime(p.post_timestamp) DESC
             LIMIT ?
             """
-            search_term = f"%{topic}%"
-            cursor.execute(sql_query, (date_from, search_term, search_term, limit))
+            cursor.execute(sql_query, (match, date_from, limit))
             rows = cursor.fetchall()
             if not rows:
                 return f"No positive news posts found for '{topic}' in the last {days_back} days."
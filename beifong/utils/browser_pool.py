@@ -0,0 +1,176 @@
+import os
+import atexit
+import asyncio
+import threading
+from typing import Any, Dict, List
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 10))
+BROWSER_TIMEOUT = int(os.environ.get("BROWSER_TIMEOUT", 20000))
+# After DOMContentLoaded, wait at most this long (ms) for the network to go idle before reading the DOM.
+BROWSER_IDLE_TIMEOUT = int(os.environ.get("BROWSER_IDLE_TIMEOUT", 3000))
+BROWSER_BLOCKED_RESOURCES = frozenset(
+    resource.strip() for resource in os.environ.get("BROWSER_BLOCKED_RESOURCES", "image,font,media").split(",") if resource.strip()
+)
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+EXTRA_HEADERS = {
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class BrowserPool:
+    """
+    Headless Chromium kept open across calls, rendering up to `size` pages at once.
+
+    The async Playwright API runs on a private event loop in a daemon thread,
+    so render_many can be called from any thread, including ones that already
+    run an event loop. Each slot is a browser context with one page that is
+    reused URL after URL (or replaced per URL with fresh_context). Images,
+    fonts and media are aborted before they are downloaded. A page is read
+    once DOMContentLoaded has fired and the network has gone idle, or after
+    idle_timeout ms of continuous traffic. Chromium is launched on first use
+    and relaunched if it dies.
+    """
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        headless: bool = True,
+        idle_timeout: int = BROWSER_IDLE_TIMEOUT,
+        blocked_resources=BROWSER_BLOCKED_RESOURCES,
+    ):
+        self.size = size
+        self.headless = headless
+        self.idle_timeout = idle_timeout
+        self.blocked_resources = frozenset(blocked_resources)
+        self._playwright = None
+        self._browser = None
+        self._launch_lock = None
+        self._slots = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+        self._thread.start()
+
+    def render_many(self, urls: List[str], timeout: int = BROWSER_TIMEOUT, fresh_context: bool = False) -> List[Dict[str, Any]]:
+        """
+        Render urls concurrently; returns one result per url, in input order.
+
+        Each result has url, final_url (after redirects), status, html (the
+        rendered DOM) and error (None on success). timeout is per navigation, in ms.
+        """
+        if not urls:
+            return []
+        return asyncio.run_coroutine_threadsafe(self._render_all(urls, timeout, fresh_context), self._loop).result()
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    async def _render_all(self, urls: List[str], timeout: int, fresh_context: bool) -> List[Dict[str, Any]]:
+        try:
+            await self._ensure_browser()
+        except Exception as e:
+            return [_render_result(url, error=f"{type(e).__name__}: {e}") for url in urls]
+        return await asyncio.gather(*(self._render(url, timeout, fresh_context) for url in urls))
+
+    async def _ensure_browser(self):
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+            self._slots = asyncio.Queue()
+            for _ in range(self.size):
+                self._slots.put_nowait(None)
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=["--no-sandbox", "--disable-setuid-sandbox"],
+            )
+
+    async def _new_page(self):
+        context = await self._browser.new_context(user_agent=USER_AGENT, viewport={"width": 1920, "height": 1080})
+        if self.blocked_resources:
+            await context.route("**/*", self._block_resources)
+        page = await context.new_page()
+        await page.set_extra_http_headers(EXTRA_HEADERS)
+        return page
+
+    async def _block_resources(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, url: str, timeout: int, fresh_context: bool) -> Dict[str, Any]:
+        page = await self._slots.get()
+        try:
+            if page is None or page.is_closed() or page.context.browser is not self._browser:
+                # Slots start empty; pages of a crashed browser are replaced too.
+                page = None
+                page = await self._new_page()
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            try:
+                await page.wait_for_load_state("networkidle", timeout=self.idle_timeout)
+            except PlaywrightTimeoutError:
+                pass  # Polling and analytics can keep the network busy indefinitely; the DOM is already usable.
+            return _render_result(url, page.url, response.status if response else None, await page.content())
+        except Exception as e:
+            return _render_result(url, error=f"{type(e).__name__}: {e}")
+        finally:
+            if page is not None and fresh_context:
+                await _close_quietly(page.context)
+                page = None
+            self._slots.put_nowait(page)
+
+    async def _shutdown(self):
+        if self._browser is not None:
+            await _close_quietly(self._browser)
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+async def _close_quietly(closable):
+    try:
+        await closable.close()
+    except Exception:
+        pass
+
+
+def _render_result(url, final_url=None, status=None, html=None, error=None):
+    return {"url": url, "final_url": final_url or url, "status": status, "html": html, "error": error}
+
+
+def get_browser_pool(headless: bool = True) -> BrowserPool:
+    """The process-wide pool, so Chromium and its warm pages are shared by every caller in a worker."""
+    with _pools_lock:
+        pool = _pools.get(headless)
+        if pool is None:
+            pool = _pools[headless] = BrowserPool(headless=headless)
+        return pool
+
+
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
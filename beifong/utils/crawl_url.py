@@ -1,6 +1,8 @@
+import re
 import requests
-from bs4 import BeautifulSoup
 import random
+import lxml.html
+from lxml import etree
 from typing import Dict, List, TypedDict
 
 
@@ -14,6 +16,7 @@ class MetadataDict(TypedDict):
 
 class WebData(TypedDict):
     raw_html: str
+    clean_text: str
     metadata: MetadataDict
 
 
@@ -33,18 +36,27 @@ HEADERS: Dict[str, str] = {
 }
 
 
-def extract_meta_tags(soup: BeautifulSoup) -> MetadataDict:
-    metadata: MetadataDict = {
+# Elements whose text is page chrome rather than article content.
+BOILERPLATE_TAGS = ("script", "style", "nav", "header", "footer", "aside")
+XML_DECLARATION_PATTERN = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+def empty_metadata() -> MetadataDict:
+    return {
         "title": "",
         "description": "",
         "og": {},
         "twitter": {},
         "other_meta": {},
     }
-    title_tag = soup.find("title")
-    if title_tag:
-        metadata["title"] = title_tag.text.strip()
-    for meta in soup.find_all("meta"):
+
+
+def extract_meta_tags(root: lxml.html.HtmlElement) -> MetadataDict:
+    metadata = empty_metadata()
+    title_tag = next(root.iter("title"), None)
+    if title_tag is not None:
+        metadata["title"] = title_tag.text_content().strip()
+    for meta in root.iter("meta"):
         name = meta.get("name", "").lower()
         prop = meta.get("property", "").lower()
         content = meta.get("content", "")
@@ -61,10 +73,28 @@ def extract_meta_tags(soup: BeautifulSoup) -> MetadataDict:
     return metadata
 
 
+def extract_clean_text(body: lxml.html.HtmlElement) -> str:
+    """Visible body text, one line per text node, without BOILERPLATE_TAGS. Empties those elements in place."""
+    for element in list(body.iter(*BOILERPLATE_TAGS)):
+        element.clear(keep_tail=True)
+    return "\n".join(line for text in body.itertext() for line in (part.strip() for part in text.splitlines()) if line)
+
+
+def parse_web_page(html: str) -> WebData:
+    """Parse once with lxml for the metadata, the <body> markup and its clean text."""
+    try:
+        root = lxml.html.document_fromstring(XML_DECLARATION_PATTERN.sub("", html, count=1))
+    except etree.ParserError:
+        return {"raw_html": "", "clean_text": "", "metadata": empty_metadata()}
+    metadata = extract_meta_tags(root)
+    body = root.find("body")
+    if body is None:
+        return {"raw_html": "", "clean_text": "", "metadata": metadata}
+    raw_html = lxml.html.tostring(body, encoding="unicode")
+    return {"raw_html": raw_html, "clean_text": extract_clean_text(body), "metadata": metadata}
+
+
 def get_web_data(url: str) -> WebData:
     HEADERS["User-Agent"] = random.choice(USER_AGENTS)
     response = requests.get(url, headers=HEADERS, timeout=10)
-    soup = BeautifulSoup(response.text, "html.parser")
-    metadata = extract_meta_tags(soup)
-    body = str(soup.find("body"))
-    return {"raw_html": body, "metadata": metadata}
+    return parse_web_page(response.text)
@@ -0,0 +1,33 @@
+import os
+import random
+
+FEED_MIN_INTERVAL = int(os.environ.get("FEED_MIN_INTERVAL", 15 * 60))
+FEED_MAX_INTERVAL = int(os.environ.get("FEED_MAX_INTERVAL", 6 * 3600))
+FEED_DEFAULT_INTERVAL = int(os.environ.get("FEED_DEFAULT_INTERVAL", 3600))
+FEED_BACKOFF_FACTOR = float(os.environ.get("FEED_BACKOFF_FACTOR", 2.0))
+FEED_BUSY_ENTRIES = int(os.environ.get("FEED_BUSY_ENTRIES", 5))
+FEED_SCHEDULE_JITTER = 0.1
+
+
+def next_poll_interval(interval, new_entries=0, window=0):
+    """
+    Seconds until a feed should be polled again, given its current interval and
+    how many new entries the last poll found out of the `window` it returned.
+
+    Polls without new entries (304s, identical content, errors) back off
+    exponentially up to FEED_MAX_INTERVAL. Polls with new entries halve the
+    interval; busy feeds (FEED_BUSY_ENTRIES or more new entries, or a window
+    made entirely of new entries, which may have dropped some) go straight to
+    FEED_MIN_INTERVAL.
+    """
+    interval = interval or FEED_DEFAULT_INTERVAL
+    if new_entries <= 0:
+        return min(FEED_MAX_INTERVAL, int(interval * FEED_BACKOFF_FACTOR))
+    if new_entries >= FEED_BUSY_ENTRIES or (window and new_entries >= window):
+        return FEED_MIN_INTERVAL
+    return max(FEED_MIN_INTERVAL, int(interval / FEED_BACKOFF_FACTOR))
+
+
+def next_due_ts(now_ts, interval):
+    """Due time for the next poll, jittered so feeds added together drift apart."""
+    return int(now_ts + interval * random.uniform(1 - FEED_SCHEDULE_JITTER, 1 + FEED_SCHEDULE_JITTER))
@@ -3,8 +3,19 @@ import openai
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
+from db.config import get_sources_db_path
+from db.connection import attach_read_only
+from db.fulltext import match_terms, bm25_rank
+from db.timestamps import to_published_ts
 
 TOPIC_EXTRACTION_MODEL = "gpt-4o-mini"
+# sources_db is attached to the search connection; prefer the article's own source, then its feed's.
+SOURCE_NAME_COLUMN = "COALESCE(s.name, fs.name, 'Unknown Source') AS source_name"
+SOURCE_NAME_JOINS = """
+        LEFT JOIN sources_db.sources s ON s.id = ca.source_id
+        LEFT JOIN sources_db.source_feeds sf ON sf.id = ca.feed_id
+        LEFT JOIN sources_db.sources fs ON fs.id = sf.source_id
+"""
 
 
 def extract_search_terms(prompt: str, api_key: str, max_terms: int = 10) -> list:
@@ -44,6 +55,7 @@ def search_articles(
     from_date: str = None,
     use_categories: bool = True,
     fallback_to_broader: bool = True,
+    sources_db_path: str = None,
 ) -> List[Dict[str, Any]]:
     if from_date is None:
         from_date = (datetime.now() - timedelta(hours=48)).isoformat()
@@ -56,6 +68,7 @@ def search_articles(
     cursor = conn.cursor()
     results = []
     try:
+        attach_read_only(conn, "sources_db", sources_db_path or get_sources_db_path())
         results = _execute_search(cursor, terms, from_date, operator, limit, use_categories)
         if fallback_to_broader and len(results) < min(5, limit):
             print(f"Initial search returned only {len(results)} results. Trying broader search...")
@@ -71,10 +84,7 @@ def search_articles(
                 if len(broader_results) > len(results):
                     print(f"Broader search found {len(broader_results)} results")
                     results = broader_results
-        if results:
-            _add_source_names(cursor, results)
-        for article in results:
-            article["categories"] = _get_article_categories(cursor, article["id"])
+        _add_article_categories(cursor, results)
     except Exception as e:
         print(f"Error searching articles: {e}")
     finally:
@@ -99,92 +109,45 @@ def _execute_search(
             from_date = adjusted_date
         except Exception as e:
             print(f"Warning: Could not adjust date with fallback: {e}")
-    base_query = """
-        SELECT DISTINCT ca.id, ca.title, ca.url, ca.published_date, ca.summary as content, 
-               ca.source_id, ca.feed_id
-        FROM crawled_articles ca
-        WHERE ca.processed = 1 AND ca.published_date >= ?
+    match = match_terms(terms, operator, prefix=partial_match)
+    if not match:
+        return []
+    # Candidates come from the full-text index (ranked by bm25); with OR, articles
+    # whose category equals a term join in behind the text matches.
+    candidates = f"SELECT rowid AS id, {bm25_rank('tracking_db')} AS rank FROM crawled_articles_fts WHERE crawled_articles_fts MATCH ?"
+    params = [match]
+    categories = sorted({str(term).strip().lower() for term in terms if str(term).strip()})
+    if use_categories and operator.upper() == "OR" and categories:
+        placeholders = ",".join(["?"] * len(categories))
+        candidates += f" UNION ALL SELECT article_id, 0.0 FROM article_categories WHERE category_name IN ({placeholders})"
+        params.extend(categories)
+    sql = f"""
+        SELECT ca.id, ca.title, ca.url, ca.published_date, ca.summary as content,
+               ca.source_id, ca.feed_id, {SOURCE_NAME_COLUMN}
+        FROM (SELECT id, MIN(rank) AS rank FROM ({candidates}) GROUP BY id) m
+        JOIN crawled_articles ca ON ca.id = m.id
+        {SOURCE_NAME_JOINS}
+        WHERE ca.processed = 1 AND ca.published_ts >= ?
+        ORDER BY m.rank, ca.published_ts DESC
+        LIMIT ?
     """
-    if use_categories:
-        base_query = """
-            SELECT DISTINCT ca.id, ca.title, ca.url, ca.published_date, ca.summary as content,
-                   ca.source_id, ca.feed_id
-            FROM crawled_articles ca
-            LEFT JOIN article_categories ac ON ca.id = ac.article_id
-            WHERE ca.processed = 1 AND ca.published_date >= ?
-        """
-    clauses, params = [], [from_date]
-    for term in terms:
-        term_clauses = []
-        like = f"%{term}%"
-        term_clauses.append("(ca.title LIKE ? OR ca.content LIKE ? OR ca.summary LIKE ?)")
-        params.extend([like, like, like])
-        if use_categories:
-            term_clauses.append("(ac.category_name LIKE ?)")
-            params.append(like)
-        if term_clauses:
-            clauses.append(f"({' OR '.join(term_clauses)})")
-    where = f" {operator} ".join(clauses)
-    sql = f"{base_query} AND ({where}) ORDER BY ca.published_date DESC LIMIT {limit}"
+    params.extend([to_published_ts(from_date, default=0), limit])
     cursor.execute(sql, params)
     return [dict(row) for row in cursor.fetchall()]
 
 
-def _add_source_names(cursor, articles):
-    source_ids = {a.get("source_id") for a in articles if a.get("source_id")}
-    feed_ids = {a.get("feed_id") for a in articles if a.get("feed_id")}
-    if not source_ids and not feed_ids:
-        return
-    source_names = {}
-    if source_ids:
-        source_ids = [id for id in source_ids if id is not None]
-        if source_ids:
-            placeholders = ",".join(["?"] * len(source_ids))
-            try:
-                cursor.execute(
-                    f"SELECT id, name FROM sources WHERE id IN ({placeholders})",
-                    list(source_ids),
-                )
-                for row in cursor.fetchall():
-                    source_names[row["id"]] = row["name"]
-            except Exception as e:
-                print(f"Error fetching source names: {e}")
-    if feed_ids:
-        feed_ids = [id for id in feed_ids if id is not None]
-        if feed_ids:
-            placeholders = ",".join(["?"] * len(feed_ids))
-            try:
-                cursor.execute(
-                    f"""
-                    SELECT sf.id, s.name 
-                    FROM source_feeds sf
-                    JOIN sources s ON sf.source_id = s.id
-                    WHERE sf.id IN ({placeholders})
-                """,
-                    list(feed_ids),
-                )
-                for row in cursor.fetchall():
-                    source_names[row["id"]] = row["name"]
-            except Exception as e:
-                print(f"Error fetching feed source names: {e}")
+def _add_article_categories(cursor, articles):
+    categories = {}
+    if articles:
+        placeholders = ",".join(["?"] * len(articles))
+        try:
+            cursor.execute(
+                f"SELECT article_id, category_name FROM article_categories WHERE article_id IN ({placeholders})",
+                [article["id"] for article in articles],
+            )
+            for row in cursor.fetchall():
+                categories.setdefault(row["article_id"], []).append(row["category_name"])
+        except Exception as e:
+            print(f"Error fetching article categories: {e}")
     for article in articles:
-        source_id = article.get("source_id")
-        feed_id = article.get("feed_id")
-        if source_id and source_id in source_names:
-            article["source_name"] = source_names[source_id]
-        elif feed_id and feed_id in source_names:
-            article["source_name"] = source_names[feed_id]
-        else:
-            article["source_name"] = "Unknown Source"
-
-
-def _get_article_categories(cursor, article_id):
-    try:
-        cursor.execute(
-            "SELECT category_name FROM article_categories WHERE article_id = ?",
-            (article_id,),
-        )
-        return [row["category_name"] for row in cursor.fetchall()]
-    except Exception as e:
-        print(f"Error fetching article categories: {e}")
-        return []
+        article["categories"] = categories.get(article["id"], [])
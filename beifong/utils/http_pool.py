@@ -0,0 +1,36 @@
+import asyncio
+import importlib.util
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+# httpx only negotiates HTTP/2 when the optional h2 package is installed.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class HostGate:
+    """At most `concurrency` requests in flight to one host, started at least `delay` seconds apart."""
+
+    def __init__(self, concurrency: int, delay: float):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._delay = delay
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        start = max(loop.time(), self._next_start)
+        self._next_start = start + self._delay
+        if start > loop.time():
+            await asyncio.sleep(start - loop.time())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+
+def parse_executor(workers: int, thread_name_prefix: str) -> Executor:
+    """Process pool for CPU-bound parsing; a thread pool in daemonic processes (e.g. a prefork Celery child) or for <= 1 worker."""
+    if workers > 1 and not multiprocessing.current_process().daemon:
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix=thread_name_prefix)
@@ -0,0 +1,156 @@
+import os
+import re
+import random
+import asyncio
+from typing import Any, Mapping, Optional
+import openai
+
+# Budgets used until the API reports its own limits in x-ratelimit-* headers.
+LLM_RPM = int(os.environ.get("LLM_RPM", 500))
+LLM_TPM = int(os.environ.get("LLM_TPM", 30000))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 6))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", 1.0))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", 60.0))
+DURATION_PART_PATTERN = re.compile(r"([\d.]+)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a rate-limit reset value such as "20ms", "1s" or "6m0.5s" (a bare number is seconds)."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(float(headers[name]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateBudget:
+    """Per-minute budget (requests or tokens) refilled continuously, corrected by what the API reports."""
+
+    def __init__(self, limit_per_minute: int):
+        self.limit = limit_per_minute
+        self.available = float(limit_per_minute)
+        self._updated = None
+
+    def _refill(self, now: float):
+        if self._updated is not None:
+            self.available = min(self.limit, self.available + (now - self._updated) * self.limit / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.limit)
+        return 0.0 if self.available >= amount else (amount - self.available) * 60 / self.limit
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.available -= amount
+
+    def give_back(self, amount: float, now: float):
+        self._refill(now)
+        self.available = min(self.limit, self.available + amount)
+
+    def observe(self, limit: Optional[int], remaining: Optional[int], now: float):
+        self._refill(now)
+        if limit:
+            self.limit = limit
+        if remaining is not None:
+            # Other clients may share the key, so the server's count wins when it is lower.
+            self.available = min(self.available, remaining)
+
+
+class RateLimiter:
+    """
+    Request and token budgets shared by every worker calling one API key.
+
+    acquire() waits until both budgets have room for a request, admitting
+    callers in order. observe() tightens the budgets from the x-ratelimit-*
+    headers of each response. A 429 pauses every worker: for the server's
+    retry-after when given, otherwise for an exponential backoff with jitter
+    that grows with consecutive 429s and resets after a success.
+    """
+
+    def __init__(self, rpm: int = LLM_RPM, tpm: int = LLM_TPM):
+        self.requests = RateBudget(rpm)
+        self.tokens = RateBudget(tpm)
+        self.rate_limited = 0
+        self._consecutive_limited = 0
+        self._cooldown_until = 0.0
+        self._lock = None
+
+    async def acquire(self, tokens: int):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                now = loop.time()
+                wait = max(self._cooldown_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                if wait <= 0:
+                    self.requests.take(1, now)
+                    self.tokens.take(tokens, now)
+                    return
+                await asyncio.sleep(wait)
+
+    def observe(self, headers: Mapping[str, str], reserved_tokens: int, used_tokens: Optional[int]):
+        now = asyncio.get_running_loop().time()
+        self._consecutive_limited = 0
+        if used_tokens is not None and used_tokens < reserved_tokens:
+            self.tokens.give_back(reserved_tokens - used_tokens, now)
+        self.requests.observe(_header_int(headers, "x-ratelimit-limit-requests"), _header_int(headers, "x-ratelimit-remaining-requests"), now)
+        self.tokens.observe(_header_int(headers, "x-ratelimit-limit-tokens"), _header_int(headers, "x-ratelimit-remaining-tokens"), now)
+
+    def backoff(self, headers: Mapping[str, str]) -> float:
+        """Pause all workers after a 429; returns the pause in seconds."""
+        self.rate_limited += 1
+        self._consecutive_limited += 1
+        delay = parse_duration(headers.get("retry-after-ms"))
+        delay = delay / 1000 if delay is not None else parse_duration(headers.get("retry-after"))
+        if delay is None:
+            delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** (self._consecutive_limited - 1))
+            delay *= random.uniform(0.5, 1.0)
+        now = asyncio.get_running_loop().time()
+        self._cooldown_until = max(self._cooldown_until, now + delay)
+        return delay
+
+
+async def create_chat_completion(
+    client: openai.AsyncOpenAI, limiter: RateLimiter, estimated_tokens: int, max_retries: int = LLM_MAX_RETRIES, **request: Any
+):
+    """
+    chat.completions.create through limiter; estimated_tokens is the prompt size plus max_tokens.
+
+    429s (except an exhausted quota), timeouts, connection errors and 5xx
+    responses are retried up to max_retries times; other errors are raised.
+    The client should be created with max_retries=0 so the SDK does not retry
+    behind the limiter's back.
+    """
+    for attempt in range(max_retries + 1):
+        await limiter.acquire(estimated_tokens)
+        try:
+            raw = await client.chat.completions.with_raw_response.create(**request)
+        except openai.RateLimitError as e:
+            if e.code == "insufficient_quota" or attempt == max_retries:
+                raise
+            limiter.backoff(e.response.headers)
+            continue
+        except (openai.APIConnectionError, openai.InternalServerError):
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2**attempt) * random.uniform(0.5, 1.0))
+            continue
+        completion = raw.parse()
+        limiter.observe(raw.headers, estimated_tokens, completion.usage.total_tokens if completion.usage else None)
+        return completion
@@ -0,0 +1,189 @@
+import os
+import re
+import random
+import asyncio
+from urllib.parse import urlsplit
+from typing import Any, Dict, List, Optional
+import httpx
+from utils.crawl_url import USER_AGENTS, HEADERS, parse_web_page
+from utils.http_pool import HTTP2_AVAILABLE, HostGate, parse_executor
+
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", 16))
+CRAWL_HOST_CONCURRENCY = int(os.environ.get("CRAWL_HOST_CONCURRENCY", 2))
+CRAWL_HOST_DELAY = float(os.environ.get("CRAWL_HOST_DELAY", 0.5))
+CRAWL_TIMEOUT = float(os.environ.get("CRAWL_TIMEOUT", 10))
+CRAWL_MAX_BYTES = int(os.environ.get("CRAWL_MAX_BYTES", 5 * 1024 * 1024))
+CRAWL_KEEPALIVE_CONNECTIONS = int(os.environ.get("CRAWL_KEEPALIVE_CONNECTIONS", 100))
+CRAWL_PARSE_WORKERS = int(os.environ.get("CRAWL_PARSE_WORKERS", min(os.cpu_count() or 1, 4)))
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+META_CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset=["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+def decode_html(body: bytes, charset: Optional[str]) -> str:
+    """Decode with the header charset, else a <meta charset> near the top, else UTF-8."""
+    if not charset:
+        match = META_CHARSET_PATTERN.search(body[:4096])
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+class PageCrawler:
+    """
+    Concurrent article page crawler with a shared keep-alive connection pool.
+
+    One httpx client (HTTP/2 when h2 is installed) is kept open across
+    crawl_many calls on a private event loop, so repeat visits to a host reuse
+    its connections. Requests run under a global concurrency limit and a
+    per-host gate. Bodies are streamed: non-HTML responses are dropped as soon
+    as their headers arrive and downloads stop at max_bytes. Pages are parsed
+    with crawl_url.parse_web_page in a worker pool, or returned as the whole
+    decoded document with parse=False. Use as a context manager to close the
+    pool.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = CRAWL_CONCURRENCY,
+        host_concurrency: int = CRAWL_HOST_CONCURRENCY,
+        host_delay: float = CRAWL_HOST_DELAY,
+        timeout: float = CRAWL_TIMEOUT,
+        max_bytes: int = CRAWL_MAX_BYTES,
+        parse_workers: int = CRAWL_PARSE_WORKERS,
+        parse: bool = True,
+    ):
+        self.concurrency = concurrency
+        self.host_concurrency = host_concurrency
+        self.host_delay = host_delay
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.parse = parse
+        self._loop = asyncio.new_event_loop()
+        self._client = None
+        self._semaphore = None
+        self._gates = {}
+        self._parse_executor = parse_executor(parse_workers, "page-parse")
+
+    def close(self):
+        if self._client is not None:
+            self._loop.run_until_complete(self._client.aclose())
+            self._client = None
+        self._loop.close()
+        self._parse_executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def crawl_many(self, urls: List[str], validators: Optional[Dict[str, Dict[str, str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Crawl urls concurrently; returns one result per url, in input order.
+
+        Each result has url, final_url (after redirects), status, raw_html,
+        clean_text, metadata (as crawl_url.get_web_data) or, with parse=False,
+        document (the whole page), etag, last_modified, truncated, skipped
+        (non-HTML content), not_modified and error (None on success).
+        validators maps a url to its stored etag / last_modified; that url is
+        requested conditionally and a 304 comes back with not_modified set.
+        """
+        if not urls:
+            return []
+        return self._loop.run_until_complete(self._crawl_all(urls, validators or {}))
+
+    async def _crawl_all(self, urls: List[str], validators: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+        if self._client is None:
+            # In-flight requests are bounded by the semaphore; the pool only needs room to keep idle connections to many hosts.
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=CRAWL_KEEPALIVE_CONNECTIONS)
+            # Connection is a hop-by-hop header that HTTP/2 forbids; httpx manages keep-alive itself.
+            headers = {key: value for key, value in HEADERS.items() if key != "Connection"}
+            self._client = httpx.AsyncClient(
+                limits=limits, headers=headers, timeout=self.timeout, follow_redirects=True, http2=HTTP2_AVAILABLE
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._crawl_gated(url, validators.get(url)) for url in urls))
+
+    async def _crawl_gated(self, url: str, validator: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        host = urlsplit(url).netloc.lower()
+        gate = self._gates.setdefault(host, HostGate(self.host_concurrency, self.host_delay))
+        async with gate, self._semaphore:
+            try:
+                return await self._crawl(url, validator)
+            except Exception as e:
+                return _crawl_result(url, error=f"{type(e).__name__}: {e}")
+
+    async def _crawl(self, url: str, validator: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        headers = {"User-Agent": random.choice(USER_AGENTS)}
+        if validator and validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator and validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+        async with self._client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return _crawl_result(url, 304, final_url=str(response.url), not_modified=True)
+            if response.status_code >= 400:
+                return _crawl_result(url, response.status_code, error=f"HTTP {response.status_code}")
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                return _crawl_result(url, response.status_code, skipped=True, error=f"non-HTML content type {content_type}")
+            body = bytearray()
+            truncated = False
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) >= self.max_bytes:
+                    del body[self.max_bytes :]
+                    truncated = True
+                    break
+            charset = response.charset_encoding
+            final_url = str(response.url)
+            validator = {"etag": response.headers.get("etag"), "last_modified": response.headers.get("last-modified")}
+        html = decode_html(bytes(body), charset)
+        if not self.parse:
+            return _crawl_result(url, response.status_code, final_url=final_url, document=html, truncated=truncated, **validator)
+        web_data = await asyncio.get_running_loop().run_in_executor(self._parse_executor, parse_web_page, html)
+        return _crawl_result(
+            url,
+            response.status_code,
+            web_data["raw_html"],
+            web_data["metadata"],
+            web_data["clean_text"],
+            final_url=final_url,
+            truncated=truncated,
+            **validator,
+        )
+
+
+def _crawl_result(
+    url,
+    status=None,
+    raw_html=None,
+    metadata=None,
+    clean_text=None,
+    final_url=None,
+    document=None,
+    etag=None,
+    last_modified=None,
+    truncated=False,
+    skipped=False,
+    not_modified=False,
+    error=None,
+):
+    return {
+        "url": url,
+        "final_url": final_url or url,
+        "status": status,
+        "raw_html": raw_html,
+        "metadata": metadata,
+        "clean_text": clean_text,
+        "document": document,
+        "etag": etag,
+        "last_modified": last_modified,
+        "truncated": truncated,
+        "skipped": skipped,
+        "not_modified": not_modified,
+        "error": error,
+    }
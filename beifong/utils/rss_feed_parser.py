@@ -1,24 +1,179 @@
+import io
+import os
+import re
+import html
 import feedparser
+from feedparser.sanitizer import _sanitize_html
 from datetime import datetime
 import hashlib
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, AbstractSet, Tuple
+from lxml import etree
 
+# Documents at least this large are parsed incrementally (see iter_feed_entries).
+FEED_STREAM_THRESHOLD = int(os.environ.get("FEED_STREAM_THRESHOLD", 1024 * 1024))
+# Stop reading a feed after this many new entries (0 = no limit).
+FEED_MAX_NEW_ENTRIES = int(os.environ.get("FEED_MAX_NEW_ENTRIES", 200))
+# Truncate each entry's content and summary to this many characters (0 = no limit).
+FEED_MAX_CONTENT_CHARS = int(os.environ.get("FEED_MAX_CONTENT_CHARS", 100_000))
 
-def get_hash(entries: List[Dict[str, str]]) -> str:
-    texts = ""
-    for entry in entries:
-        texts += (
-            str(entry.get("id", ""))
-            + str(entry.get("title", ""))
-            + str(entry.get("published_date", ""))
-        )
-    return hashlib.md5(texts.encode()).hexdigest()
+ATOM = "{http://www.w3.org/2005/Atom}"
+RSS1 = "{http://purl.org/rss/1.0/}"
+XMLNS_PATTERN = re.compile(r'\sxmlns(?::[\w.-]+)?="[^"]*"')
+RDF_ABOUT = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about"
+# Markup dropped before a summary is fingerprinted: elements whose text feedparser's sanitizer removes, then all tags.
+UNSAFE_ELEMENT_PATTERN = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]*>")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+ENTRY_TAGS = ("item", f"{RSS1}item", f"{ATOM}entry")
+# Entry keys whose streamed markup goes through feedparser's sanitizer, as it does when feedparser reads the feed.
+HTML_FIELDS = ("summary", "content")
+# Streamed element tag -> feedparser entry key; the first occurrence wins.
+ENTRY_FIELDS = {
+    "title": "title",
+    "link": "link",
+    "guid": "id",
+    "description": "summary",
+    "pubDate": "published",
+    "{http://purl.org/rss/1.0/modules/content/}encoded": "content",
+    "{http://purl.org/dc/elements/1.1/}date": "updated",
+    f"{RSS1}title": "title",
+    f"{RSS1}link": "link",
+    f"{RSS1}description": "summary",
+    f"{ATOM}title": "title",
+    f"{ATOM}id": "id",
+    f"{ATOM}summary": "summary",
+    f"{ATOM}content": "content",
+    f"{ATOM}published": "published",
+    f"{ATOM}updated": "updated",
+}
+
+
+def entry_key(value: str) -> int:
+    """Compact 64-bit fingerprint of an entry id or link, as kept in seen-entry sets."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+def _summary_text(summary: str) -> str:
+    """Visible text of a summary, equal whether it went through feedparser's sanitizer or was streamed as is."""
+    text = TAG_PATTERN.sub(" ", UNSAFE_ELEMENT_PATTERN.sub(" ", summary))
+    return WHITESPACE_PATTERN.sub(" ", html.unescape(text)).strip()
+
+
+def entry_fingerprint(entry_id: str, link: str, title: str, summary: str, updated: str) -> int:
+    """
+    entry_key of an entry's id, link, title, summary text and updated date, so
+    an edited entry gets a new fingerprint. Only the summary's text counts, so
+    a feed read by feedparser one time and streamed the next keeps its fingerprints.
+    """
+    return entry_key("\x1f".join((entry_id, link, title, _summary_text(summary), updated)))
+
+
+def _element_text(element: Any) -> str:
+    if element.get("type") != "xhtml":
+        return "".join(element.itertext())
+    # Inline XHTML: serialize the markup inside the wrapping <div>, without namespaces.
+    container = element[0] if len(element) == 1 and etree.QName(element[0]).localname == "div" else element
+    for descendant in container.iterdescendants():
+        if isinstance(descendant.tag, str):
+            descendant.tag = etree.QName(descendant).localname
+    markup = "".join(etree.tostring(child, encoding=str, with_tail=True) for child in container)
+    return (container.text or "") + XMLNS_PATTERN.sub("", markup)
+
+
+def _is_html(element: Any) -> bool:
+    """RSS descriptions and content are HTML; Atom text constructs only when typed html or xhtml."""
+    if not element.tag.startswith(ATOM):
+        return True
+    return element.get("type") in ("html", "xhtml")
+
+
+class StreamedEntry(dict):
+    """Entry from iter_feed_entries; the keys in unsanitized hold HTML as published, not yet through feedparser's sanitizer."""
+
+    unsanitized: Tuple[str, ...] = ()
+
+
+def _streamed_entry(element: Any) -> StreamedEntry:
+    entry = StreamedEntry()
+    unsanitized = []
+    for child in element:
+        if not isinstance(child.tag, str):
+            continue
+        if child.tag == f"{ATOM}link":
+            if child.get("rel", "alternate") == "alternate":
+                entry.setdefault("link", child.get("href", ""))
+            continue
+        key = ENTRY_FIELDS.get(child.tag)
+        if key and key not in entry:
+            entry[key] = _element_text(child).strip()
+            if key in HTML_FIELDS and _is_html(child):
+                unsanitized.append(key)
+    if element.get(RDF_ABOUT):
+        entry.setdefault("id", element.get(RDF_ABOUT))
+    if "summary" in entry:
+        entry["description"] = entry["summary"]
+        if "summary" in unsanitized:
+            unsanitized.append("description")
+    entry.unsanitized = tuple(unsanitized)
+    return entry
+
+
+def _sanitized(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """A streamed entry with its HTML sanitized as feedparser would have; other entries unchanged."""
+    unsanitized = getattr(entry, "unsanitized", ())
+    if not unsanitized:
+        return entry
+    return {**entry, **{key: _sanitize_html(entry[key], "utf-8", "text/html") for key in unsanitized}}
+
+
+def iter_feed_entries(source: Any) -> Iterator[StreamedEntry]:
+    """
+    Yield feedparser-like entry dicts from an RSS, RSS 1.0 or Atom document.
+
+    Entries are read with lxml iterparse and each element is discarded once
+    converted, so memory stays flat however long the feed is, and a consumer
+    that stops early stops the parse. HTML summaries and content are left
+    as published (see StreamedEntry) and sanitized by parse_feed_entries
+    only for the entries it keeps. Raises etree.XMLSyntaxError on malformed
+    documents, which feedparser may still be able to read.
+    """
+    context = etree.iterparse(
+        source, events=("end",), tag=ENTRY_TAGS, resolve_entities=False, no_network=True, remove_comments=True, remove_pis=True
+    )
+    for _, element in context:
+        entry = _streamed_entry(element)
+        element.clear(keep_tail=False)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+        yield entry
+
+
+def _cap(text: str, limit: int) -> str:
+    return text[:limit] if limit and len(text) > limit else text
+
+
+def _entry_content(entry: Dict[str, Any]) -> str:
+    content = entry.get("content")
+    if isinstance(content, list):
+        # feedparser returns content as a list of {"type", "value", ...} parts
+        content = "\n".join(part.get("value", "") for part in content)
+    return content or entry.get("description") or ""
 
 
-def parse_feed_entries(entries: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+def _parse_entries(
+    entries: Iterable[Dict[str, Any]], seen: Optional[AbstractSet[int]], max_entries: int, max_content: int
+) -> Tuple[List[Dict[str, str]], int]:
     parsed_entries = []
+    read = 0
     for entry in entries:
-        content = entry.get("content") or entry.get("description") or ""
+        read += 1
+        link = entry.get("link", "")
+        entry_id = entry.get("id") or link
+        fingerprint = entry_fingerprint(entry_id, link, entry.get("title") or "", entry.get("summary") or "", entry.get("updated") or "")
+        # Bare id and link keys stand for entries stored before fingerprints were.
+        if seen and (fingerprint in seen or entry_key(entry_id) in seen or (link and entry_key(link) in seen)):
+            continue
+        entry = _sanitized(entry)
         published = (
             entry.get("published")
             or entry.get("updated")
@@ -26,51 +181,140 @@ def parse_feed_entries(entries: List[Dict[str, Any]]) -> List[Dict[str, str]]:
             or entry.get("created")
             or datetime.now().isoformat()
         )
-        entry_id = entry.get("id") or entry.get("link", "")
-        link = entry.get("link", "")
-        summary = entry.get("summary", "")
-        title = entry.get("title", "")
         parsed_entries.append(
             {
-                "title": title,
+                "title": entry.get("title", ""),
                 "link": link,
-                "summary": summary,
-                "content": content,
+                "summary": _cap(entry.get("summary", ""), max_content),
+                "content": _cap(_entry_content(entry), max_content),
                 "published_date": published,
                 "entry_id": entry_id,
+                "fingerprint": fingerprint,
             }
         )
-    return parsed_entries
+        if max_entries and len(parsed_entries) >= max_entries:
+            break
+    return parsed_entries, read
+
+
+def parse_feed_entries(
+    entries: Iterable[Dict[str, Any]],
+    seen: Optional[AbstractSet[int]] = None,
+    max_entries: int = FEED_MAX_NEW_ENTRIES,
+    max_content: int = FEED_MAX_CONTENT_CHARS,
+) -> List[Dict[str, str]]:
+    """
+    Convert feedparser (or iter_feed_entries) entries to feed_entries rows.
+
+    Entries whose entry_fingerprint (or, for entries stored without one, whose
+    id or link entry_key) is in seen are skipped before their content is read,
+    so the work done scales with the new and edited entries only.
+    Stops after max_entries new entries and truncates content and summary to
+    max_content characters.
+    """
+    return _parse_entries(entries, seen, max_entries, max_content)[0]
 
 
 def is_rss_feed(feed_data: Any) -> bool:
     return feed_data.bozo and hasattr(feed_data, "bozo_exception")
 
 
-def get_feed_data(
-    feed_url: str, etag: Optional[str] = None, modified: Optional[Any] = None
+def _not_a_feed() -> Dict[str, Any]:
+    return {
+        "is_rss_feed": False,
+        "parsed_entries": None,
+        "entry_count": 0,
+        "modified": None,
+        "status": None,
+        "etag": None,
+    }
+
+
+def _entries_result(
+    entries: Iterable[Dict[str, Any]],
+    status: int,
+    etag: Optional[str],
+    modified: Optional[str],
+    seen: Optional[AbstractSet[int]],
+    max_entries: int,
+    max_content: int,
 ) -> Dict[str, Any]:
-    feed_data = feedparser.parse(feed_url, etag=etag, modified=modified)
-    if is_rss_feed(feed_data):
-        return {
-            "is_rss_feed": False,
-            "parsed_entries": None,
-            "modified": None,
-            "status": None,
-            "current_hash": None,
-            "etag": None,
-        }
-    status = feed_data.get("status", 200)
-    etag = feed_data.get("etag", None)
-    modified = feed_data.get("modified")
-    entries = feed_data.get("entries", [])
-    parsed_entries = parse_feed_entries(entries)
-    current_hash = get_hash(parsed_entries)
+    parsed_entries, read = _parse_entries(entries, seen, max_entries, max_content)
     return {
         "parsed_entries": parsed_entries,
+        "entry_count": read,
         "modified": modified,
         "status": status,
-        "current_hash": current_hash,
         "etag": etag,
         "is_rss_feed": True,
     }
+
+
+def _feed_result(
+    feed_data: Any,
+    status: int,
+    etag: Optional[str],
+    modified: Optional[str],
+    seen: Optional[AbstractSet[int]] = None,
+    max_entries: int = FEED_MAX_NEW_ENTRIES,
+    max_content: int = FEED_MAX_CONTENT_CHARS,
+) -> Dict[str, Any]:
+    if is_rss_feed(feed_data):
+        return _not_a_feed()
+    return _entries_result(feed_data.get("entries", []), status, etag, modified, seen, max_entries, max_content)
+
+
+def get_feed_data(
+    feed_url: str,
+    etag: Optional[str] = None,
+    modified: Optional[Any] = None,
+    seen: Optional[AbstractSet[int]] = None,
+    max_entries: int = FEED_MAX_NEW_ENTRIES,
+    max_content: int = FEED_MAX_CONTENT_CHARS,
+) -> Dict[str, Any]:
+    """
+    Fetch and parse a feed. parsed_entries holds at most max_entries entries
+    not in seen (entry_key fingerprints); entry_count is the number of feed
+    entries read.
+    """
+    feed_data = feedparser.parse(feed_url, etag=etag, modified=modified)
+    return _feed_result(
+        feed_data,
+        feed_data.get("status", 200),
+        feed_data.get("etag", None),
+        feed_data.get("modified"),
+        seen,
+        max_entries,
+        max_content,
+    )
+
+
+def parse_feed_document(
+    content: bytes,
+    response_headers: Dict[str, str],
+    status: int = 200,
+    seen: Optional[AbstractSet[int]] = None,
+    max_entries: int = FEED_MAX_NEW_ENTRIES,
+    max_content: int = FEED_MAX_CONTENT_CHARS,
+    stream: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Same result as get_feed_data for a document that was already downloaded.
+
+    Documents of FEED_STREAM_THRESHOLD bytes or more (or any, with stream=True)
+    are read with iter_feed_entries, stopping after max_entries new entries;
+    if that finds no entries or the XML is malformed, feedparser reads it instead.
+    """
+    headers = {key.lower(): value for key, value in response_headers.items()}
+    etag, modified = headers.get("etag"), headers.get("last-modified")
+    if stream is None:
+        stream = len(content) >= FEED_STREAM_THRESHOLD
+    if stream:
+        try:
+            result = _entries_result(iter_feed_entries(io.BytesIO(content)), status, etag, modified, seen, max_entries, max_content)
+            if result["entry_count"]:
+                return result
+        except etree.XMLSyntaxError:
+            pass
+    feed_data = feedparser.parse(content, response_headers=response_headers)
+    return _feed_result(feed_data, status, etag, modified, seen, max_entries, max_content)
@@ -0,0 +1,110 @@
+import re
+import functools
+from typing import List, Tuple
+import tiktoken
+
+TOKENIZER_FALLBACK_ENCODING = "o200k_base"
+# Lines this short that match BOILERPLATE_PATTERN are page furniture, not article text.
+BOILERPLATE_MAX_LINE_CHARS = 120
+BOILERPLATE_PATTERN = re.compile(
+    r"^\W*("
+    r"advertisement|sponsored( content)?|skip to (main )?content|share (this|on)\b.*|click here\b.*|read more\b.*|"
+    r"related (articles|stories|posts)|recommended( for you)?|most (read|popular)|trending( now)?|"
+    r"(sign up|subscribe)\b.*|follow us\b.*|(all rights reserved|copyright ©?)\b.*|©.*|"
+    r"(this (site|website) uses|we use) cookies\b.*|(get|join) our newsletter\b.*|(log|sign) in|back to top|"
+    r"image( credit| source)?:.*|photo:.*"
+    r")\W*$",
+    re.IGNORECASE,
+)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class ApproximateTokenizer:
+    """Stand-in used when the tiktoken vocabulary cannot be loaded: one token per 4 characters."""
+
+    name = "approximate"
+
+    def encode(self, text: str) -> List[str]:
+        return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(model: str):
+    """
+    The tiktoken encoding for model, loaded once per process.
+
+    tiktoken downloads a vocabulary on first use and keeps it under
+    TIKTOKEN_CACHE_DIR. When that fails (no network, no cache) counts fall
+    back to ApproximateTokenizer.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(TOKENIZER_FALLBACK_ENCODING)
+    except Exception as e:
+        print(f"Could not load the tiktoken vocabulary for {model} ({type(e).__name__}); estimating 4 characters per token")
+        return ApproximateTokenizer()
+
+
+def count_tokens(text: str, model: str) -> int:
+    return len(get_tokenizer(model).encode(text)) if text else 0
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Drop page furniture from extracted article text: short lines such as
+    "Advertisement" or "Subscribe to our newsletter", and any line repeated
+    earlier in the text (compared ignoring case and whitespace). Runs of
+    blank lines collapse to one.
+    """
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        normalized = WHITESPACE_PATTERN.sub(" ", line).strip().casefold()
+        if not normalized:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+        if len(normalized) <= BOILERPLATE_MAX_LINE_CHARS and BOILERPLATE_PATTERN.match(normalized):
+            continue
+        lines.append(line.strip())
+    return "\n".join(lines).strip()
+
+
+def fit_to_budget(text: str, max_tokens: int, model: str) -> Tuple[str, int, bool]:
+    """text cut to at most max_tokens tokens at a token boundary; returns (text, tokens, truncated)."""
+    tokenizer = get_tokenizer(model)
+    tokens = tokenizer.encode(text)
+    if len(tokens) <= max_tokens:
+        return text, len(tokens), False
+    return tokenizer.decode(tokens[:max_tokens]), max_tokens, True
+
+
+def split_into_chunks(text: str, max_tokens: int, model: str) -> List[str]:
+    """
+    Split text into pieces of at most max_tokens tokens, breaking between
+    lines where possible. A single line longer than the budget is cut at
+    token boundaries.
+    """
+    tokenizer = get_tokenizer(model)
+    chunks, current, current_tokens = [], [], 0
+    for line in text.splitlines():
+        tokens = tokenizer.encode(line + "\n")
+        if current and current_tokens + len(tokens) > max_tokens:
+            chunks.append("\n".join(current).strip())
+            current, current_tokens = [], 0
+        while len(tokens) > max_tokens:
+            chunks.append(tokenizer.decode(tokens[:max_tokens]).strip())
+            tokens = tokens[max_tokens:]
+        current.append(tokenizer.decode(tokens).rstrip("\n"))
+        current_tokens += len(tokens)
+    if current:
+        chunks.append("\n".join(current).strip())
+    return [chunk for chunk in chunks if chunk]
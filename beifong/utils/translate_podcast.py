@@ -1,9 +1,12 @@
 import json
 from typing import List, Dict, Any
 from openai import OpenAI
+from db.llm_cache import cached_call
 from utils.load_api_keys import load_api_key
 
 TRANSLATION_MODEL = "gpt-4o"
+# Bump when the translation prompt changes so cached translations from the old one are not reused.
+TRANSLATION_PROMPT_VERSION = 1
 LANG_CODE_TO_NAME = {
     "en": "English",
     "h": "Hindi",
@@ -25,6 +28,12 @@ def translate_script(script: List[Dict[str, Any]], lang_code: str = "b") -> List
     target_lang = LANG_CODE_TO_NAME.get(lang_code)
     if target_lang is None:
         return script
+    # Re-runs for the same script and language reuse the stored translation.
+    content = {"lang": target_lang, "script": script}
+    return cached_call("translation", TRANSLATION_MODEL, TRANSLATION_PROMPT_VERSION, content, lambda: _translate(script, target_lang))
+
+
+def _translate(script: List[Dict[str, Any]], target_lang: str) -> List[Dict[str, Any]]:
     api_key = load_api_key("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY environment variable not set")